@@ -0,0 +1,365 @@
+"""Game affinity: each game is served by one owning worker.
+
+Without affinity any worker may serve any request, so each one re-reads the
+game from storage (bar a short cache TTL). In affinity mode, every worker is
+listed in ``GAME_AFFINITY_PEERS`` with its own URL in ``GAME_AFFINITY_SELF``,
+and each game code belongs to one live worker, chosen by rendezvous hashing
+so that a worker joining or leaving only moves the games it gains or loses.
+
+The owner is authoritative for its games: they stay pinned in its game cache
+and are served without storage reads, and guesses are checkpointed in the
+background (write-behind) instead of written one by one. Other workers
+forward game requests to the owner, or serve them from storage if the owner
+cannot be reached. Only a request that never reached the owner is served
+locally; any other failure is answered with 502 or 504 so a guess the owner
+may have applied is not applied twice. A worker lists the games it wrote this
+way in its heartbeat document, and their owner drops its copy when it reads
+the heartbeat.
+
+Workers announce themselves with a heartbeat document whose lease expires
+unless renewed, so a worker that dies stops owning games within a few
+heartbeats. When ownership moves, the previous owner writes its buffered
+changes and unpins the game; the new owner loads it from storage. If two
+workers briefly both act as owner, versioned writes keep the stored game
+consistent. A game is also unpinned when it turns out not to exist, expires or
+is deleted, and at most ``GAME_CACHE_MAX_PINNED`` games are pinned; beyond
+that, owned games are served like any other, through the cache TTL.
+
+Forwarded requests carry an HMAC of the request line keyed with
+``GAME_AFFINITY_SECRET``, so only peers can have a request served where it
+arrives instead of by its owner.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Sequence
+
+import metrics
+from game_cache import game_cache
+from game_service import GUESS_WRITE_BEHIND_SECONDS, flush_game_writes
+from storage import DocumentStore
+
+logger = logging.getLogger(__name__)
+
+PEERS_COLLECTION = "affinity_peers"
+AFFINITY_PEERS = [p.strip().rstrip("/") for p in os.getenv("GAME_AFFINITY_PEERS", "").split(",") if p.strip()]
+AFFINITY_SELF = os.getenv("GAME_AFFINITY_SELF", "").rstrip("/")
+AFFINITY_SECRET = os.getenv("GAME_AFFINITY_SECRET", "")
+AFFINITY_HEARTBEAT_SECONDS = float(os.getenv("AFFINITY_HEARTBEAT_SECONDS", "5"))
+AFFINITY_CHECKPOINT_SECONDS = float(os.getenv("AFFINITY_CHECKPOINT_MS", "1000")) / 1000
+# Heartbeats missed before a worker is considered gone
+LEASE_HEARTBEATS = 3
+# Forwarded requests wait this long for the owner, except event streams
+FORWARD_TIMEOUT_SECONDS = float(os.getenv("AFFINITY_FORWARD_TIMEOUT_SECONDS", "10"))
+# Fallback writes listed in one heartbeat document
+MAX_FALLBACK_WRITES = 1000
+
+FORWARDED_HEADER = b"x-feud-forwarded"
+# Hop-by-hop headers are not relayed by the proxy
+HOP_HEADERS = {b"connection", b"keep-alive", b"transfer-encoding", b"te", b"upgrade", b"host", b"content-length"}
+GAME_PATH = re.compile(r"^/api/games/([A-Za-z0-9]+)(?:/|$)")
+STREAM_PATH = re.compile(r"^/api/games/[A-Za-z0-9]+/events$")
+
+affinity_requests = metrics.registry.counter(
+    "feud_affinity_requests_total", "Game requests by where they were served.", ("outcome",)
+)
+
+
+def _weight(peer: str, code: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{peer}|{code}".encode(), digest_size=8).digest(), "big")
+
+
+def rendezvous_owner(code: str, peers: Sequence[str]) -> str:
+    """The peer with the highest hash weight for ``code``."""
+    return max(peers, key=lambda peer: _weight(peer, code))
+
+
+class Membership:
+    """This worker's view of the live peers and the games it owns."""
+
+    def __init__(
+        self,
+        peers: List[str],
+        me: str,
+        heartbeat_seconds: float = AFFINITY_HEARTBEAT_SECONDS,
+        checkpoint_seconds: float = AFFINITY_CHECKPOINT_SECONDS,
+        secret: str = AFFINITY_SECRET,
+    ):
+        if peers and me not in peers:
+            raise ValueError(f"GAME_AFFINITY_SELF {me!r} is not in GAME_AFFINITY_PEERS")
+        if peers and not secret:
+            raise ValueError("GAME_AFFINITY_SECRET must be set with GAME_AFFINITY_PEERS")
+        self.peers = sorted(peers)
+        self.me = me
+        self._secret = secret.encode()
+        self.heartbeat_seconds = heartbeat_seconds
+        self.checkpoint_seconds = checkpoint_seconds
+        self.live: List[str] = list(self.peers)
+        # Games written here while their owner was unreachable, announced to it
+        self._fallback_writes: Dict[str, datetime] = {}
+        # Latest announced fallback write handled, per owned game
+        self._fallbacks_seen: Dict[str, datetime] = {}
+        self._client = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.peers)
+
+    def owner(self, code: str) -> str:
+        return rendezvous_owner(code, self.live)
+
+    def owns(self, code: str) -> bool:
+        return self.enabled and self.owner(code) == self.me
+
+    def adopt(self, code: str) -> None:
+        """Start serving an owned game from memory.
+
+        A cached copy may predate ownership (another owner wrote since), so it
+        is dropped and the game is loaded fresh on first use. Nothing is
+        pinned once the pinned set is full.
+        """
+        if not game_cache.is_pinned(code) and game_cache.pin(code):
+            game_cache.invalidate(code)
+
+    def write_behind_seconds(self, code: str) -> float:
+        """How long guesses on a game are buffered before being written."""
+        if self.owns(code) and game_cache.is_pinned(code):
+            return self.checkpoint_seconds
+        return GUESS_WRITE_BEHIND_SECONDS
+
+    def sign(self, method: str, target: bytes) -> bytes:
+        """The forwarded-request header value for a method and path + query."""
+        message = method.encode() + b" " + target
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest().encode()
+
+    def is_forwarded(self, scope) -> bool:
+        """Whether a request was forwarded by a peer (carries a valid signature)."""
+        for name, value in scope["headers"]:
+            if name == FORWARDED_HEADER:
+                expected = self.sign(scope["method"], _target(scope))
+                return hmac.compare_digest(value, expected)
+        return False
+
+    def note_fallback_write(self, code: str) -> None:
+        """Record a write made here to a game whose owner could not be reached."""
+        self._fallback_writes.pop(code, None)
+        self._fallback_writes[code] = datetime.now(timezone.utc)
+        if len(self._fallback_writes) > MAX_FALLBACK_WRITES:
+            del self._fallback_writes[next(iter(self._fallback_writes))]
+
+    async def heartbeat(self, store: DocumentStore) -> None:
+        """Renew this worker's lease, refresh the live peers, hand off moved games."""
+        now = datetime.now(timezone.utc)
+        lease = timedelta(seconds=self.heartbeat_seconds * LEASE_HEARTBEATS)
+        self._fallback_writes = {code: at for code, at in self._fallback_writes.items() if at > now - lease}
+        await store.put(PEERS_COLLECTION, self._key(self.me), {
+            "url": self.me, "expires_at": now + lease, "fallback_writes": dict(self._fallback_writes),
+        })
+        docs = await store.get_many(PEERS_COLLECTION, [self._key(peer) for peer in self.peers])
+        live = [
+            peer for peer in self.peers
+            if peer == self.me or (
+                (doc := docs.get(self._key(peer))) is not None and doc["expires_at"] > now
+            )
+        ]
+        if live != self.live:
+            logger.info("Live peers changed: %s", live)
+            self.live = live
+        self._drop_stale(docs.values(), now - lease)
+        await self.hand_off(store)
+
+    def _drop_stale(self, docs, since: datetime) -> None:
+        """Reload owned games that peers wrote while this worker was unreachable."""
+        self._fallbacks_seen = {code: at for code, at in self._fallbacks_seen.items() if at > since}
+        for doc in docs:
+            if doc is None or doc.get("url") == self.me:
+                continue
+            for code, at in doc.get("fallback_writes", {}).items():
+                if at > self._fallbacks_seen.get(code, since) and self.owns(code):
+                    self._fallbacks_seen[code] = at
+                    game_cache.invalidate(code)
+
+    async def hand_off(self, store: DocumentStore, everything: bool = False) -> None:
+        """Write and release pinned games this worker no longer owns."""
+        for code in game_cache.pinned():
+            if everything or not self.owns(code):
+                try:
+                    await flush_game_writes(store, code)
+                except Exception:
+                    logger.exception("Handing off game %s failed", code)
+                game_cache.unpin(code)
+                game_cache.invalidate(code)
+
+    async def run(self, store: DocumentStore) -> None:
+        """Heartbeat until cancelled."""
+        while True:
+            try:
+                await self.heartbeat(store)
+            except Exception:
+                logger.exception("Affinity heartbeat failed")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def leave(self, store: DocumentStore) -> None:
+        """Release every game and the lease, so peers take over right away."""
+        await self.hand_off(store, everything=True)
+        await store.delete(PEERS_COLLECTION, self._key(self.me))
+
+    def http(self):
+        """Pooled client for forwarding requests to peers."""
+        if self._client is None:
+            import httpx  # only needed in affinity mode
+
+            self._client = httpx.AsyncClient(timeout=FORWARD_TIMEOUT_SECONDS)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @staticmethod
+    def _key(peer: str) -> str:
+        return hashlib.blake2b(peer.encode(), digest_size=12).hexdigest()
+
+
+membership = Membership(AFFINITY_PEERS, AFFINITY_SELF)
+
+
+def _target(scope) -> bytes:
+    query = scope.get("query_string", b"")
+    return scope["path"].encode() + (b"?" + query if query else b"")
+
+
+class AffinityMiddleware:
+    """ASGI middleware serving game requests on the game's owner.
+
+    Requests for games owned elsewhere are relayed to the owner, with the
+    response streamed back so event streams work too. Forwarded requests are always served
+    where they arrive, and if the owner is unreachable the request is served
+    locally from storage.
+    """
+
+    def __init__(self, app, membership: Membership = membership):
+        self.app = app
+        self.membership = membership
+
+    async def __call__(self, scope, receive, send):
+        match = GAME_PATH.match(scope["path"]) if scope["type"] == "http" else None
+        if match is None or not self.membership.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        code = match.group(1).upper()
+        owner = self.membership.owner(code)
+        forwarded = self.membership.is_forwarded(scope)
+        if owner == self.membership.me:
+            self.membership.adopt(code)
+            affinity_requests.inc(1, "owner")
+        elif not forwarded:
+            body = await self._read_body(receive)
+            try:
+                outcome = await self._forward(owner, scope, body, receive, send)
+                affinity_requests.inc(1, outcome)
+                return
+            except ConnectionError as exc:
+                logger.warning("Owner %s of game %s unreachable: %r", owner, code, exc)
+                affinity_requests.inc(1, "fallback")
+                if scope["method"] not in ("GET", "HEAD"):
+                    self.membership.note_fallback_write(code)
+                receive = self._replay(body)
+        else:
+            affinity_requests.inc(1, "forwarded_here")
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    def _replay(body: bytes):
+        sent = False
+
+        async def receive() -> Dict:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await asyncio.Event().wait()  # never: nothing more to read
+
+        return receive
+
+    @staticmethod
+    async def _send_error(send, status: int, detail: str) -> None:
+        body = ('{"detail":"%s"}' % detail).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body, "more_body": False})
+
+    async def _forward(self, owner: str, scope, body: bytes, receive, send) -> str:
+        """Relay a request to its owner; returns the outcome for metrics.
+
+        Raises ConnectionError if the request never reached the owner.
+        """
+        import httpx
+
+        query = scope.get("query_string", b"")
+        url = owner + scope["path"] + (f"?{query.decode('latin-1')}" if query else "")
+        headers = [(k, v) for k, v in scope["headers"] if k not in HOP_HEADERS and k != FORWARDED_HEADER]
+        headers.append((FORWARDED_HEADER, self.membership.sign(scope["method"], _target(scope))))
+        client = self.membership.http()
+        # Event streams stay open indefinitely between updates
+        stream = STREAM_PATH.match(scope["path"])
+        timeout = httpx.Timeout(FORWARD_TIMEOUT_SECONDS, read=None) if stream else httpx.USE_CLIENT_DEFAULT
+        request = client.build_request(scope["method"], url, headers=headers, content=body, timeout=timeout)
+        try:
+            response = await client.send(request, stream=True)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as exc:
+            raise ConnectionError(str(exc)) from exc
+        except httpx.TransportError as exc:
+            # The owner may have acted on the request; running it here could repeat it
+            logger.warning("Forwarding to owner %s failed: %r", owner, exc)
+            if isinstance(exc, httpx.TimeoutException):
+                await self._send_error(send, 504, "Game owner timed out")
+            else:
+                await self._send_error(send, 502, "Game owner failed")
+            return "owner_error"
+
+        async def relay() -> None:
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [(k, v) for k, v in response.headers.raw if k.lower() not in HOP_HEADERS],
+            })
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        async def until_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        # Stop relaying (and close the upstream stream) if the client goes away
+        relaying = asyncio.create_task(relay())
+        watching = asyncio.create_task(until_disconnect())
+        try:
+            await asyncio.wait({relaying, watching}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watching.cancel()
+            relaying.cancel()
+            outcome, _ = await asyncio.gather(relaying, watching, return_exceptions=True)
+            await response.aclose()
+        if isinstance(outcome, Exception):
+            raise RuntimeError("Relaying the owner's response failed") from outcome
+        return "forwarded"
@@ -0,0 +1,266 @@
+"""Per-question guess analytics, recorded off the request path (opt-in).
+
+With ``GUESS_ANALYTICS=1`` every scored guess is queued in memory together
+with the question and the answer it matched (if any); recording is a list
+append, so guesses are not slowed down. A background task drains the queue
+every ``ANALYTICS_FLUSH_SECONDS``, normalizes and aggregates the guesses per
+question, and adds the counts to the question's counters with one merge write
+per question.
+
+A question is identified by its normalized text, so its counters cover every
+game that asked it. They are sharded over ``ANALYTICS_SHARDS`` documents and
+each flush writes to a random shard, so a popular question does not run into
+the per-document write limit. Reading sums the shards with one multi-get.
+
+Guess texts are open-ended, so the per-guess maps are bounded: a flush writes
+the ``ANALYTICS_MAX_TERMS`` most frequent guesses of a question and adds the
+rest to an "other" counter, and a shard whose maps grow past
+``ANALYTICS_MAX_SHARD_TERMS`` entries is trimmed to its most frequent half.
+Analytics are best effort: guesses queued when a worker stops, or beyond
+``ANALYTICS_QUEUE_MAX`` between flushes, are dropped and counted.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+from models import Question
+from question_bank import LRUCache
+from storage import DocumentStore, Increment
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_COLLECTION = "guess_analytics"
+GUESS_ANALYTICS = os.getenv("GUESS_ANALYTICS", "0") == "1"
+ANALYTICS_FLUSH_SECONDS = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "5"))
+ANALYTICS_SHARDS = int(os.getenv("ANALYTICS_SHARDS", "8"))
+ANALYTICS_QUEUE_MAX = int(os.getenv("ANALYTICS_QUEUE_MAX", "100000"))
+ANALYTICS_MAX_TERMS = int(os.getenv("ANALYTICS_MAX_TERMS", "50"))
+ANALYTICS_MAX_SHARD_TERMS = int(os.getenv("ANALYTICS_MAX_SHARD_TERMS", "2000"))
+# Longer guesses are cut short so the counter documents stay small
+MAX_GUESS_LENGTH = 40
+
+analytics_guesses = metrics.registry.counter(
+    "feud_analytics_guesses_total", "Guesses seen by the analytics queue.", ("outcome",)
+)
+
+# (question, guess text, index of the matched answer or None)
+_Record = Tuple[Question, str, Optional[int]]
+
+# Guess maps of a shard document and the counters of guesses left out of them
+TERM_MAPS = (("terms", "terms_other"), ("missed_terms", "missed_other"))
+
+
+def question_key(text: str) -> str:
+    """Identifies a question by its normalized text."""
+    from rapidfuzz.utils import default_process
+
+    return hashlib.blake2b(default_process(text).encode(), digest_size=12).hexdigest()
+
+
+def shard_key(key: str, shard: int) -> str:
+    return f"{key}-{shard}"
+
+
+class GuessAnalytics:
+    """Queue of scored guesses, flushed to sharded per-question counters."""
+
+    def __init__(
+        self,
+        enabled: bool = GUESS_ANALYTICS,
+        flush_seconds: float = ANALYTICS_FLUSH_SECONDS,
+        shards: int = ANALYTICS_SHARDS,
+        max_queued: int = ANALYTICS_QUEUE_MAX,
+        max_terms: int = ANALYTICS_MAX_TERMS,
+        max_shard_terms: int = ANALYTICS_MAX_SHARD_TERMS,
+    ):
+        self.enabled = enabled
+        self.flush_seconds = flush_seconds
+        self.shards = shards
+        self.max_queued = max_queued
+        self.max_terms = max_terms
+        self.max_shard_terms = max_shard_terms
+        self._queue: List[_Record] = []
+        # Per shard document: guess map entries this worker wrote since checking its size
+        self._terms_written = LRUCache(10_000)
+
+    def record(self, question: Question, guess: str, index: Optional[int]) -> None:
+        """Queue one scored guess with the index of the answer it matched."""
+        if not self.enabled:
+            return
+        if len(self._queue) >= self.max_queued:
+            analytics_guesses.inc(1, "dropped")
+            return
+        self._queue.append((question, guess, index))
+
+    def record_many(self, question: Question, guesses: List[str], indices: List[Optional[int]]) -> None:
+        """Queue a batch of guesses with their matched answer indices."""
+        for guess, index in zip(guesses, indices):
+            self.record(question, guess, index)
+
+    @staticmethod
+    def aggregate(records: List[_Record]) -> Dict[str, Dict[str, Any]]:
+        """Counter increments per question key for a batch of records."""
+        from rapidfuzz.utils import default_process
+
+        totals: Dict[str, Dict[str, Any]] = {}
+        keys: Dict[str, str] = {}  # question text -> key
+        for question, guess, index in records:
+            key = keys.get(question.text)
+            if key is None:
+                key = keys[question.text] = question_key(question.text)
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = {
+                    "text": question.text, "guesses": 0, "misses": 0,
+                    "answers": Counter(), "terms": Counter(), "missed_terms": Counter(),
+                }
+            entry["guesses"] += 1
+            term = " ".join(default_process(guess).split())[:MAX_GUESS_LENGTH]
+            if index is None:
+                entry["misses"] += 1
+                if term:
+                    entry["missed_terms"][term] += 1
+            else:
+                entry["answers"][question.answers[index].text] += 1
+            if term:
+                entry["terms"][term] += 1
+        return totals
+
+    async def flush(self, store: DocumentStore) -> int:
+        """Write the queued guesses to their counters; returns how many were written."""
+        records, self._queue = self._queue, []
+        if not records:
+            return 0
+        now = datetime.now(timezone.utc)
+        # Normalizing a large batch takes a while; keep the event loop serving
+        totals = await asyncio.to_thread(self.aggregate, records)
+        writes = []
+        doc_keys = []
+        for key, entry in totals.items():
+            data = {
+                "question": key,
+                "text": entry["text"],
+                "updated_at": now,
+                "guesses": Increment(entry["guesses"]),
+                "misses": Increment(entry["misses"]),
+                "answers": {text: Increment(count) for text, count in entry["answers"].items()},
+            }
+            written = 0
+            for name, other in TERM_MAPS:
+                kept = entry[name].most_common(self.max_terms)
+                data[name] = {text: Increment(count) for text, count in kept}
+                left_out = sum(entry[name].values()) - sum(count for _, count in kept)
+                if left_out:
+                    data[other] = Increment(left_out)
+                written += len(kept)
+            doc_key = shard_key(key, random.randrange(self.shards))
+            doc_keys.append((doc_key, written))
+            writes.append(store.merge(ANALYTICS_COLLECTION, doc_key, data))
+        outcomes = await asyncio.gather(*writes, return_exceptions=True)
+        lost = 0
+        for entry, (doc_key, written), outcome in zip(totals.values(), doc_keys, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("Writing analytics of question %r failed: %r", entry["text"], outcome)
+                lost += entry["guesses"]
+                continue
+            await self._check_size(store, doc_key, written)
+        analytics_guesses.inc(len(records) - lost, "flushed")
+        if lost:
+            analytics_guesses.inc(lost, "dropped")
+        return len(records) - lost
+
+    async def _check_size(self, store: DocumentStore, doc_key: str, written: int) -> None:
+        """Trim a shard's guess maps once enough entries may have been added."""
+        written += self._terms_written.get(doc_key) or 0
+        if written < self.max_shard_terms // 4:
+            self._terms_written.put(doc_key, written)
+            return
+        self._terms_written.put(doc_key, 0)
+        try:
+            await self.trim(store, doc_key)
+        except Exception:
+            logger.exception("Trimming analytics document %s failed", doc_key)
+
+    async def trim(self, store: DocumentStore, doc_key: str) -> bool:
+        """Cut guess maps larger than ``max_shard_terms`` to their most frequent half.
+
+        The counts cut are added to the map's "other" counter. Returns False if
+        nothing was trimmed or the shard was written concurrently.
+        """
+        doc = await store.get(ANALYTICS_COLLECTION, doc_key)
+        if doc is None:
+            return False
+        fields: Dict[str, Any] = {}
+        for name, other in TERM_MAPS:
+            counts = doc.get(name, {})
+            if len(counts) > self.max_shard_terms:
+                kept = dict(Counter(counts).most_common(self.max_shard_terms // 2))
+                fields[name] = kept
+                fields[other] = doc.get(other, 0) + sum(counts.values()) - sum(kept.values())
+        if not fields:
+            return False
+        fields["updated_at"] = datetime.now(timezone.utc)
+        # Any flush in between changes updated_at, so its counts are not lost
+        return await store.compare_and_update(ANALYTICS_COLLECTION, doc_key, fields, "updated_at", doc["updated_at"])
+
+    async def run(self, store: DocumentStore) -> None:
+        """Flush periodically until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush(store)
+            except Exception:
+                logger.exception("Analytics flush failed")
+
+    async def question_stats(
+        self, store: DocumentStore, questions: List[Question], top: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Guess statistics of each question, summed over its shards."""
+        if not questions:
+            return []
+        keys = [question_key(question.text) for question in questions]
+        docs = await store.get_many(
+            ANALYTICS_COLLECTION, [shard_key(key, shard) for key in dict.fromkeys(keys) for shard in range(self.shards)]
+        )
+        stats = []
+        for question, key in zip(questions, keys):
+            guesses = misses = other_guesses = other_misses = 0
+            answers: Counter = Counter()
+            terms: Counter = Counter()
+            missed: Counter = Counter()
+            for shard in range(self.shards):
+                doc = docs.get(shard_key(key, shard))
+                if doc is None:
+                    continue
+                guesses += doc.get("guesses", 0)
+                misses += doc.get("misses", 0)
+                other_guesses += doc.get("terms_other", 0)
+                other_misses += doc.get("missed_other", 0)
+                answers.update(doc.get("answers", {}))
+                terms.update(doc.get("terms", {}))
+                missed.update(doc.get("missed_terms", {}))
+            stats.append({
+                "question_id": question.id,
+                "text": question.text,
+                "guesses": guesses,
+                "misses": misses,
+                "miss_rate": round(misses / guesses, 4) if guesses else 0.0,
+                "answers": [
+                    {"text": answer.text, "count": answers.get(answer.text, 0)} for answer in question.answers
+                ],
+                "top_guesses": [{"guess": term, "count": count} for term, count in terms.most_common(top)],
+                "top_misses": [{"guess": term, "count": count} for term, count in missed.most_common(top)],
+                # Guesses too rare to be counted individually
+                "other_guesses": other_guesses,
+                "other_misses": other_misses,
+            })
+        return stats
+
+
+guess_analytics = GuessAnalytics()
@@ -0,0 +1,5 @@
+"""Benchmarks for the game API. Run from the backend directory, e.g.
+
+    python -m benchmarks.bench_throughput
+    python -m benchmarks.run_all --compare benchmarks/results/<older>.json
+"""
@@ -0,0 +1,75 @@
+"""Guess latency with and without guess analytics, and the cost of a flush.
+
+Guesses are fed to the app in process (in-memory store) in alternating
+blocks with analytics off and on, so both see the same conditions; with
+analytics on, each guess is only queued. The queued guesses are then flushed
+to their sharded counters, which happens in the background in the app.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Dict, List
+
+os.environ.setdefault("GAME_STORE", "memory")
+
+import httpx
+
+from analytics import guess_analytics
+from benchmarks.bench_write_behind import _miss
+from benchmarks.bench_write_bytes import make_questions
+from storage import get_store
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+async def _measure(guesses: int, block: int) -> Dict[str, Dict[str, float]]:
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        created = (await client.post("/api/games", json={"mode": "host"})).json()
+        code, headers = created["code"], {"X-Host-Id": created["host_id"]}
+        questions = [{"text": q.text, "answers": [a.model_dump() for a in q.answers]} for q in make_questions(1)]
+        await client.post(f"/api/games/{code}/questions/bulk", json={"questions": questions}, headers=headers)
+        await client.post(f"/api/games/{code}/start", headers=headers)
+
+        latencies: Dict[bool, List[float]] = {False: [], True: []}
+        for number in range(guesses):
+            enabled = (number // block) % 2 == 1
+            guess_analytics.enabled = enabled
+            text = _miss(number) if number % 3 else "answer 1"
+            start = time.perf_counter()
+            (await client.post(f"/api/games/{code}/guess", json={"text": text})).raise_for_status()
+            latencies[enabled].append(time.perf_counter() - start)
+
+    queued = len(guess_analytics._queue)
+    start = time.perf_counter()
+    await guess_analytics.flush(get_store())
+    flush_ms = (time.perf_counter() - start) * 1000
+    return {
+        "analytics_off": _summary(latencies[False]),
+        "analytics_on": _summary(latencies[True]),
+        "flush": {"guesses": queued, "flush_ms": round(flush_ms, 2)},
+    }
+
+
+def run(guesses: int = 4000, block: int = 100) -> Dict[str, Dict[str, float]]:
+    return asyncio.run(_measure(guesses, block))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--guesses", type=int, default=4000)
+    parser.add_argument("--block", type=int, default=100, help="Guesses per on/off block")
+    args = parser.parse_args()
+    print(json.dumps(run(args.guesses, args.block), indent=2))
@@ -0,0 +1,97 @@
+"""Cold start: time to first response and the cost of the first guess.
+
+Starts a fresh uvicorn process (in-memory store) with and without the startup
+warm-up, waits for ``/healthz`` to answer, gives the warm-up a moment as a real
+first player would, then times creating a game and its first guess. Also
+measures, in a fresh interpreter, what importing and initializing Firebase
+costs (connecting comes on top); with the Firestore store the warm-up takes
+that off the first request.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cold_start(warmup: bool, think_seconds: float) -> Dict[str, float]:
+    port = _free_port()
+    env = {**os.environ, "GAME_STORE": "memory", "STARTUP_WARMUP": "1" if warmup else "0"}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while True:
+                try:
+                    health = client.get("/healthz")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.005)
+            first_response = time.perf_counter() - started
+            time.sleep(think_seconds)
+
+            step = time.perf_counter()
+            created = client.post("/api/games", json={"mode": "host"}).json()
+            create_ms = (time.perf_counter() - step) * 1000
+            code, headers = created["code"], {"X-Host-Id": created["host_id"]}
+            question = {"text": "Name a fruit", "answers": [{"text": "Apple", "weight": 40}, {"text": "Banana", "weight": 30}]}
+            client.post(f"/api/games/{code}/questions", json=question, headers=headers)
+            client.post(f"/api/games/{code}/start", headers=headers)
+
+            step = time.perf_counter()
+            client.post(f"/api/games/{code}/guess", json={"text": "bananna"})
+            guess_ms = (time.perf_counter() - step) * 1000
+            report = client.get("/healthz").json()
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "first_response_seconds": round(first_response, 3),
+        "app_import_seconds": health.json()["phases"].get("import"),
+        "first_create_ms": round(create_ms, 2),
+        "first_guess_ms": round(guess_ms, 2),
+        "warmup_phases": report["phases"],
+    }
+
+
+def _firebase_init_seconds() -> float:
+    code = (
+        "import time; t = time.perf_counter(); import firebase_config; "
+        "firebase_config.initialize(); print(time.perf_counter() - t)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True
+    ).stdout
+    return round(float(output), 3)
+
+
+def run(think_seconds: float = 0.5) -> Dict[str, object]:
+    return {
+        "without_warmup": _cold_start(False, think_seconds),
+        "with_warmup": _cold_start(True, think_seconds),
+        "firebase_init_seconds": _firebase_init_seconds(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--think-seconds", type=float, default=0.5, help="Pause before the first player request")
+    args = parser.parse_args()
+    print(json.dumps(run(args.think_seconds), indent=2))
@@ -0,0 +1,112 @@
+"""``create_game`` latency at increasing game-code keyspace occupancy.
+
+Fills the in-memory store with live games until a given share of the
+4-character keyspace is taken, then times game creation with a simulated
+round-trip latency. Compares the old probe-one-code-per-read loop with the
+batched allocator, both pinned to 4-character codes and with adaptive code
+length enabled.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import game_service
+from game_cache import game_cache
+from game_service import CODE_CHARS, CODE_LENGTH, GAMES_COLLECTION, CodeAllocator
+from models import GameMode
+from storage import MemoryStore
+
+
+class CountingStore(MemoryStore):
+    """Memory store that counts round trips."""
+
+    def __init__(self, latency_ms: float):
+        super().__init__(latency_ms)
+        self.round_trips = 0
+
+    async def _round_trip(self) -> None:
+        self.round_trips += 1
+        await super()._round_trip()
+
+
+def _fill(store: MemoryStore, occupancy: float) -> None:
+    keyspace = [''.join(c) for c in itertools.product(CODE_CHARS, repeat=CODE_LENGTH)]
+    live = {"expires_at": datetime.now(timezone.utc) + timedelta(hours=1)}
+    docs = store._docs(GAMES_COLLECTION)
+    # Documents are never modified here, so they can share one dict
+    for code in random.sample(keyspace, int(len(keyspace) * occupancy)):
+        docs[code] = live
+
+
+async def _probe_one_by_one(store: MemoryStore) -> str:
+    """The previous allocator: one read per random candidate, then a put."""
+    for _ in range(100):
+        code = ''.join(random.choices(CODE_CHARS, k=CODE_LENGTH))
+        data = await store.get(GAMES_COLLECTION, code)
+        if data is None or data["expires_at"] < datetime.now(timezone.utc):
+            await store.put(GAMES_COLLECTION, code, {"expires_at": datetime.now(timezone.utc)})
+            return code
+    raise RuntimeError("Could not generate unique game code")
+
+
+async def _measure(store: CountingStore, create, games: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    failures = 0
+    store.round_trips = 0
+    for _ in range(games):
+        start = time.perf_counter()
+        try:
+            await create()
+        except RuntimeError:
+            failures += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+        "round_trips_per_game": round(store.round_trips / games, 2),
+        "failures": failures,
+    }
+
+
+async def _at_occupancy(occupancy: float, games: int, latency_ms: float) -> Dict[str, object]:
+    store = CountingStore(latency_ms)
+    _fill(store, occupancy)
+    result: Dict[str, object] = {"occupancy": occupancy}
+
+    result["probe_one_by_one"] = await _measure(store, lambda: _probe_one_by_one(store), games)
+
+    for name, allocator in (
+        ("batched_fixed_length", CodeAllocator(max_length=CODE_LENGTH)),
+        ("batched_adaptive", CodeAllocator()),
+    ):
+        game_service.code_allocator = allocator
+        result[name] = await _measure(
+            store, lambda: game_service.create_game(store, GameMode.AUTO_ADVANCE, "host"), games
+        )
+        result[name]["final_code_length"] = allocator.length
+        game_cache.clear()
+    return result
+
+
+def run(occupancies=(0.1, 0.5, 0.9), games: int = 200, latency_ms: float = 2.0) -> List[Dict[str, object]]:
+    original = game_service.code_allocator
+    try:
+        return [asyncio.run(_at_occupancy(o, games, latency_ms)) for o in occupancies]
+    finally:
+        game_service.code_allocator = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--occupancy", type=float, nargs="+", default=[0.1, 0.5, 0.9])
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.occupancy, args.games, args.latency_ms), indent=2))
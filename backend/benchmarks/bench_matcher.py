@@ -0,0 +1,126 @@
+"""Guesses/sec for answer matching, per-guess scan vs compiled question index.
+
+The "per-guess" path mirrors the original matcher: rebuild the choice list,
+preprocess every answer on each call, then map the match back to its Answer.
+The "compiled" path uses the question's precompiled AnswerIndex, with the
+shared match memo ("memoized", as served) and without it ("uncached"), and
+"batch" scores all guesses in one match_question_many call. If thefuzz
+(the matcher's former dependency) is installed, it is measured as well.
+"""
+import argparse
+import importlib.util
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+from rapidfuzz import process
+from rapidfuzz.utils import default_process
+
+import game_logic
+from game_logic import AnswerMatcher
+from models import Answer, Question
+from question_bank import LRUCache
+
+WORDS = [
+    "apple", "banana", "cherry", "dog", "elephant", "flamingo", "guitar", "hammer",
+    "igloo", "jacket", "kitten", "lemon", "mountain", "notebook", "orange", "pencil",
+    "quilt", "rocket", "sandwich", "tiger", "umbrella", "violin", "window", "yogurt",
+]
+
+
+def make_question(answer_count: int) -> Question:
+    rng = random.Random(answer_count)
+    texts = {f"{rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(answer_count * 4)}
+    answers = [Answer(text=t, weight=answer_count - i) for i, t in enumerate(sorted(texts)[:answer_count])]
+    return Question(text="Benchmark question", answers=answers)
+
+
+def make_guesses(question: Question, count: int) -> List[str]:
+    rng = random.Random(count)
+    guesses = []
+    for _ in range(count):
+        kind = rng.random()
+        text = rng.choice(question.answers).text
+        if kind < 0.4:
+            guesses.append(text.upper())  # exact after normalization
+        elif kind < 0.7:
+            guesses.append(text[:-1])  # typo
+        else:
+            guesses.append(f"{rng.choice(WORDS)}s")  # likely miss
+    return guesses
+
+
+def _per_guess_match(guess: str, answers: List[Answer], threshold: int) -> Optional[Answer]:
+    choices = [a.text for a in answers]
+    match = process.extractOne(guess, choices, processor=default_process)
+    if match and round(match[1]) >= threshold:
+        return next((a for a in answers if a.text == match[0]), None)
+    return None
+
+
+def _thefuzz_match(guess: str, answers: List[Answer], threshold: int) -> Optional[Answer]:
+    from thefuzz import process as thefuzz_process
+
+    match = thefuzz_process.extractOne(guess, [a.text for a in answers])
+    if match and match[1] >= threshold:
+        return next((a for a in answers if a.text == match[0]), None)
+    return None
+
+
+def _rate(fn, guesses: List[str]) -> float:
+    start = time.perf_counter()
+    for guess in guesses:
+        fn(guess)
+    return round(len(guesses) / (time.perf_counter() - start))
+
+
+def _uncached_rate(fn, guesses: List[str]) -> float:
+    shared, game_logic.match_cache = game_logic.match_cache, LRUCache(0)
+    try:
+        return _rate(fn, guesses)
+    finally:
+        game_logic.match_cache = shared
+
+
+def _batch_rate(matcher: AnswerMatcher, question: Question, guesses: List[str]) -> float:
+    matcher.match_question_many(guesses[:10], question)  # warm up (numpy import)
+    start = time.perf_counter()
+    matcher.match_question_many(guesses, question)
+    return round(len(guesses) / (time.perf_counter() - start))
+
+
+def run(answer_counts=(8, 100), guesses: int = 20_000) -> List[Dict[str, float]]:
+    matcher = AnswerMatcher()
+    results = []
+    for count in answer_counts:
+        game_logic.match_cache = LRUCache(game_logic.match_cache.max_entries)
+        question = make_question(count)
+        batch = make_guesses(question, guesses)
+        question.answer_index()  # compiled once when the question is loaded
+        result = {
+            "answers": count,
+            "per_guess_guesses_per_sec": _rate(
+                lambda g: _per_guess_match(g, question.answers, matcher.threshold), batch
+            ),
+            "compiled_uncached_guesses_per_sec": _uncached_rate(
+                lambda g: matcher.match_question(g, question), batch
+            ),
+            "compiled_memoized_guesses_per_sec": _rate(lambda g: matcher.match_question(g, question), batch),
+            "batch_guesses_per_sec": _batch_rate(matcher, question, batch),
+            "memo_hit_rate": round(game_logic.match_cache.stats()["hit_rate"], 3),
+        }
+        if importlib.util.find_spec("thefuzz"):
+            result["thefuzz_guesses_per_sec"] = _rate(
+                lambda g: _thefuzz_match(g, question.answers, matcher.threshold), batch
+            )
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--answers", type=int, nargs="+", default=[8, 100])
+    parser.add_argument("--guesses", type=int, default=20_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.answers, args.guesses), indent=2))
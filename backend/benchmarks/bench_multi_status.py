@@ -0,0 +1,79 @@
+"""Dashboard poll of many games: one status request per game vs one batch.
+
+An operator dashboard shows every game in a venue. Polling them one request
+at a time costs a storage read (plus its question set) per game whenever the
+game is not cached; the batch endpoint reads them all with one multi-get.
+Requests are fed straight to the ASGI app against an in-memory store with a
+simulated round trip; the game cache is cleared before each poll so every
+poll reads storage, as a dashboard on another worker would.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List
+
+os.environ.setdefault("GAME_STORE", "memory")
+
+import httpx
+
+import storage
+from benchmarks.bench_write_bytes import make_questions
+from game_cache import game_cache
+from game_service import add_questions_to_game, create_game
+from models import GameMode
+from question_bank import question_set_cache
+from storage import MemoryStore
+
+
+async def _poll(games: int, polls: int, latency_ms: float) -> Dict[str, Dict[str, float]]:
+    import main
+
+    store = MemoryStore(latency_ms)
+    storage._store = store
+    codes: List[str] = []
+    for _ in range(games):
+        game = await create_game(store, GameMode.HOST_CONTROLLED, "operator")
+        await add_questions_to_game(store, game.code, make_questions(1))
+        codes.append(game.code)
+
+    headers = {"X-Host-Id": "operator"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_by_one() -> None:
+            for code in codes:
+                (await client.get(f"/api/games/{code}", headers=headers)).raise_for_status()
+
+        async def concurrent() -> None:
+            responses = await asyncio.gather(*(client.get(f"/api/games/{code}", headers=headers) for code in codes))
+            for response in responses:
+                response.raise_for_status()
+
+        async def batch() -> None:
+            (await client.get("/api/games", params={"codes": ",".join(codes)}, headers=headers)).raise_for_status()
+
+        results = {}
+        for name, poll in (("one_by_one", one_by_one), ("concurrent", concurrent), ("batch", batch)):
+            elapsed = 0.0
+            for _ in range(polls):
+                game_cache.clear()
+                question_set_cache.clear()
+                start = time.perf_counter()
+                await poll()
+                elapsed += time.perf_counter() - start
+            results[name] = {"poll_ms": round(elapsed / polls * 1000, 2)}
+    return results
+
+
+def run(games: int = 40, polls: int = 20, latency_ms: float = 10.0) -> Dict[str, Dict[str, float]]:
+    return asyncio.run(_poll(games, polls, latency_ms))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=40)
+    parser.add_argument("--polls", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.games, args.polls, args.latency_ms), indent=2))
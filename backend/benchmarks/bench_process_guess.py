@@ -0,0 +1,55 @@
+"""Per-guess latency of GameStateMachine.process_guess vs number of questions.
+
+Compares the current structurally-shared transition with the former approach
+of deep-copying the whole session before every guess.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from benchmarks.bench_write_bytes import make_questions
+from game_logic import GameStateMachine
+from models import GameMode, GameSession
+
+
+def make_game(question_count: int) -> GameSession:
+    now = datetime.now(timezone.utc)
+    return GameSession(
+        code="BNCH", mode=GameMode.HOST_CONTROLLED, host_id="host",
+        questions=make_questions(question_count), current_index=0, status="playing",
+        created_at=now, expires_at=now + timedelta(hours=1),
+    )
+
+
+def _latency_us(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return round((time.perf_counter() - start) / iterations * 1e6, 2)
+
+
+def run(question_counts=(10, 100, 1000), iterations: int = 2000) -> List[Dict[str, float]]:
+    machine = GameStateMachine()
+    results = []
+    for count in question_counts:
+        game = make_game(count)
+        guess = game.questions[0].answers[3].text
+        machine.process_guess(game, guess)  # compile the answer index
+        results.append({
+            "questions": count,
+            "shared_state_us": _latency_us(lambda: machine.process_guess(game, guess), iterations),
+            "deep_copy_us": _latency_us(
+                lambda: machine.process_guess(game.model_copy(deep=True), guess), iterations
+            ),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.questions, args.iterations), indent=2))
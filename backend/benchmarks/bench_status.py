@@ -0,0 +1,144 @@
+"""Game status responses per second on one core: model-based vs pre-serialized.
+
+The "model" path is how statuses used to be produced: a ``Question`` and a
+``GameStatus`` model are built per request and FastAPI validates and
+serializes them against ``response_model``. The "fast" path is the current
+one: plain dicts encoded once with orjson and cached per game version and
+role. Measured both as bare serialization and end to end through the app
+(requests are fed straight to the ASGI app so client overhead is excluded).
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Callable, Dict, Optional
+
+os.environ.setdefault("GAME_STORE", "memory")
+
+import httpx
+from fastapi import Header
+
+import status_payload
+from game_service import get_game
+from benchmarks.bench_write_bytes import make_questions
+from models import GameMode, GameSession, GameStatus, Question
+from storage import get_store
+
+
+def _model_status(game: GameSession, is_host: bool) -> GameStatus:
+    """The previous, model-based status builder."""
+    question = game.current_question()
+    revealed_answers = game.get_revealed_answer_objects()
+    sanitized_question = None
+    total_answers = 0
+    if question:
+        sanitized_question = Question(
+            id=question.id,
+            text=question.text,
+            answers=revealed_answers if not is_host else question.answers,
+        )
+        total_answers = len(question.answers)
+    return GameStatus(
+        code=game.code, mode=game.mode, status=game.status, question=sanitized_question,
+        revealed_answers=revealed_answers, score=game.score, strikes=game.strikes,
+        max_strikes=game.max_strikes,
+        current_index=game.current_index if game.status == "playing" else None,
+        total_questions=len(game.questions), total_answers=total_answers,
+        is_host=is_host, version=game.version,
+    )
+
+
+def _rate(fn: Callable[[], object], seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            fn()
+        count += 100
+    return round(count / seconds, 1)
+
+
+def _serialization(game: GameSession, seconds: float) -> Dict[str, float]:
+    def model() -> bytes:
+        # FastAPI re-validates the returned model against response_model
+        status = GameStatus.model_validate(_model_status(game, True).model_dump())
+        return status.model_dump_json().encode()
+
+    def fast_uncached() -> bytes:
+        status_payload.status_cache.clear()
+        return status_payload.game_status_json(game, True)
+
+    return {
+        "model": _rate(model, seconds),
+        "fast_uncached": _rate(fast_uncached, seconds),
+        "fast_cached": _rate(lambda: status_payload.game_status_json(game, True), seconds),
+    }
+
+
+async def _asgi_get(app, path: str, headers: Dict[str, str]) -> int:
+    """Issue a GET straight to the ASGI app, without an HTTP client."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+    status = 0
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _end_to_end(requests: int) -> Dict[str, float]:
+    from main import app
+
+    @app.get("/bench/model-status/{code}", response_model=GameStatus)
+    async def model_status(code: str, x_host_id: Optional[str] = Header(None)) -> GameStatus:
+        game = await get_game(get_store(), code)
+        return _model_status(game, x_host_id == game.host_id)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        created = (await client.post("/api/games", json={"mode": "auto"})).json()
+        code, host = created["code"], created["host_id"]
+        headers = {"X-Host-Id": host}
+        questions = [{"text": q.text, "answers": [a.model_dump() for a in q.answers]} for q in make_questions(5)]
+        await client.post(f"/api/games/{code}/questions/bulk", json={"questions": questions}, headers=headers)
+        await client.post(f"/api/games/{code}/start", headers=headers)
+
+    results = {}
+    for name, path in (("model", f"/bench/model-status/{code}"), ("fast", f"/api/games/{code}")):
+        start = time.perf_counter()
+        for _ in range(requests):
+            assert await _asgi_get(app, path, headers) == 200
+        results[name] = round(requests / (time.perf_counter() - start), 1)
+    return results
+
+
+def run(seconds: float = 1.0, requests: int = 2000) -> Dict[str, Dict[str, float]]:
+    game = GameSession(
+        code="BNCH", mode=GameMode.HOST_CONTROLLED, host_id="host", questions=make_questions(5),
+        current_index=0, status="playing", created_at=time.time(), expires_at=time.time() + 3600,
+    )
+    game.revealed_mask = 0b111
+    return {
+        "serializations_per_second": _serialization(game, seconds),
+        "requests_per_second": asyncio.run(_end_to_end(requests)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.seconds, args.requests), indent=2))
@@ -0,0 +1,77 @@
+"""Requests/sec per worker for game status polls, blocking vs async storage.
+
+Drives the real FastAPI app in-process against the in-memory store with a
+simulated network round trip. The "blocking" run sleeps synchronously inside
+each store call, which is what the synchronous Firestore client did to the
+event loop; the "async" run awaits the same latency. The game cache is
+turned off for both, so every poll reads the game from the store.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("GAME_STORE", "memory")
+
+import httpx
+
+import storage
+from game_cache import game_cache
+from storage import MemoryStore
+
+
+class BlockingLatencyStore(MemoryStore):
+    """Memory store whose round trips block the event loop."""
+
+    async def _round_trip(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+
+async def _measure(store: MemoryStore, requests: int, concurrency: int) -> dict:
+    storage._store = store
+    from main import app
+
+    # Cached polls would never reach the store, hiding the difference measured
+    ttl, game_cache.ttl_seconds = game_cache.ttl_seconds, 0
+    game_cache.clear()
+    try:
+        return await _poll(app, requests, concurrency)
+    finally:
+        game_cache.ttl_seconds = ttl
+
+
+async def _poll(app, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        code = (await client.post("/api/games", json={"mode": "auto"})).json()["code"]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def poll() -> None:
+            async with semaphore:
+                response = await client.get(f"/api/games/{code}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(poll() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    return {"requests": requests, "seconds": round(elapsed, 3), "rps": round(requests / elapsed, 1)}
+
+
+def run(latency_ms: float = 10.0, requests: int = 500, concurrency: int = 100) -> dict:
+    return {
+        "latency_ms": latency_ms,
+        "concurrency": concurrency,
+        "blocking": asyncio.run(_measure(BlockingLatencyStore(latency_ms), requests, concurrency)),
+        "async": asyncio.run(_measure(MemoryStore(latency_ms), requests, concurrency)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.latency_ms, args.requests, args.concurrency), indent=2))
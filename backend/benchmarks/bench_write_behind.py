@@ -0,0 +1,127 @@
+"""Guesses per second sustained on one game, with and without write-behind.
+
+Players submit guesses on a single game as fast as they are acknowledged.
+Every guess changes the game (a wrong guess adds a strike in host mode), so
+without write-behind each one is a document write. The store simulates a
+network round trip and a cap on sustained writes to one document, as
+Firestore has; write-behind turns a burst into one write per window. At the
+end the stored strikes must equal the number of acknowledged guesses.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import string
+import time
+from typing import Dict, Tuple
+
+import event_log
+import game_service
+from benchmarks.bench_write_bytes import make_questions
+from game_cache import game_cache
+from game_logic import GameStateMachine
+from models import GameMode
+from storage import MemoryStore
+
+
+class ThrottledStore(MemoryStore):
+    """In-memory store whose writes to one document are rate limited."""
+
+    def __init__(self, latency_ms: float, writes_per_second: float):
+        super().__init__(latency_ms)
+        self.interval = 1 / writes_per_second
+        self.writes = 0
+        self._next_write: Dict[Tuple[str, str], float] = {}
+
+    async def _throttle(self, collection: str, key: str) -> None:
+        now = time.perf_counter()
+        at = max(now, self._next_write.get((collection, key), 0.0))
+        self._next_write[(collection, key)] = at + self.interval
+        self.writes += 1
+        await asyncio.sleep(at - now)
+
+    async def put(self, collection: str, key: str, data: dict) -> None:
+        await self._throttle(collection, key)
+        await super().put(collection, key, data)
+
+    async def compare_and_update(self, collection: str, key: str, *args, **kwargs) -> bool:
+        await self._throttle(collection, key)
+        return await super().compare_and_update(collection, key, *args, **kwargs)
+
+
+def _miss(number: int) -> str:
+    """A guess that matches no answer (answers contain digits, this has none)."""
+    letters = []
+    while True:
+        number, digit = divmod(number, 26)
+        letters.append(string.ascii_lowercase[digit])
+        if not number:
+            return "zzq " + "".join(letters)
+
+
+async def _sustain(
+    window_ms: float, players: int, seconds: float, latency_ms: float, writes_per_second: float
+) -> Dict[str, float]:
+    game_cache.clear()
+    store = ThrottledStore(latency_ms, writes_per_second)
+    machine = GameStateMachine(max_strikes=3)
+    game = await game_service.create_game(store, GameMode.HOST_CONTROLLED, "host")
+    await game_service.add_questions_to_game(store, game.code, make_questions(3))
+    await game_service.start_game(store, game.code, "host")
+    writes_before = store.writes
+
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def player(number: int) -> None:
+        guess = 0
+        while time.perf_counter() < deadline:
+            guess += 1
+            text = _miss(number * 1_000_000 + guess)
+            start = time.perf_counter()
+            await game_service.mutate_game_buffered(
+                store, game.code, lambda g: machine.process_guess(g, text)[1], window_ms / 1000
+            )
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0)  # a real request yields while sending its response
+
+    start = time.perf_counter()
+    await asyncio.gather(*(player(i) for i in range(players)))
+    elapsed = time.perf_counter() - start
+    await game_service.flush_pending_writes(store)
+    await event_log.flush_heads()
+
+    stored = await game_service.decode_game(store, await store.get(game_service.GAMES_COLLECTION, game.code))
+    assert stored.strikes == len(latencies), (stored.strikes, len(latencies))
+    latencies.sort()
+    return {
+        "guesses_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "document_writes": store.writes - writes_before,
+    }
+
+
+def run(
+    players: int = 50, seconds: float = 3.0, latency_ms: float = 10.0,
+    writes_per_second: float = 10.0, window_ms: float = 100.0,
+) -> Dict[str, Dict[str, float]]:
+    return {
+        "write_per_guess": asyncio.run(_sustain(0, players, seconds, latency_ms, writes_per_second)),
+        f"write_behind_{window_ms:g}ms": asyncio.run(
+            _sustain(window_ms, players, seconds, latency_ms, writes_per_second)
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--writes-per-second", type=float, default=10.0, help="Sustained writes to one document")
+    parser.add_argument("--window-ms", type=float, default=100.0)
+    args = parser.parse_args()
+    print(json.dumps(run(
+        args.players, args.seconds, args.latency_ms, args.writes_per_second, args.window_ms
+    ), indent=2))
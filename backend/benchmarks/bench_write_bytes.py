@@ -0,0 +1,83 @@
+"""Bytes written to storage per guess, full-document vs field-level writes.
+
+Plays guesses against games with growing question counts on the in-memory
+store and records the estimated Firestore payload size of every write.
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import game_service
+from game_cache import game_cache
+from game_logic import GameStateMachine
+from models import Answer, GameMode, GameSession, Question
+from storage import MemoryStore, estimate_size
+
+
+class RecordingStore(MemoryStore):
+    """Memory store that records the size of each write payload."""
+
+    def __init__(self):
+        super().__init__()
+        self.written: List[int] = []
+
+    async def put(self, collection: str, key: str, data: dict) -> None:
+        self.written.append(estimate_size(data))
+        await super().put(collection, key, data)
+
+    async def compare_and_update(
+        self, collection: str, key: str, fields: Dict[str, Any], field: str, expected: Any
+    ) -> bool:
+        self.written.append(estimate_size(fields))
+        return await super().compare_and_update(collection, key, fields, field, expected)
+
+
+def make_questions(count: int, answers: int = 8) -> List[Question]:
+    return [
+        Question(
+            id=i + 1,
+            text=f"Name something you might find in room number {i + 1}",
+            answers=[Answer(text=f"Answer {i + 1}-{j + 1}", weight=answers - j) for j in range(answers)],
+        )
+        for i in range(count)
+    ]
+
+
+async def _bytes_per_guess(question_count: int, guesses: int) -> Dict[str, float]:
+    store = RecordingStore()
+    machine = GameStateMachine()
+    now = datetime.now(timezone.utc)
+    game = GameSession(
+        code="BNCH", mode=GameMode.HOST_CONTROLLED, host_id="host",
+        questions=make_questions(question_count), current_index=0, status="playing",
+        created_at=now, expires_at=now + timedelta(hours=1),
+    )
+    await game_service.update_game(store, game)
+    full_document = store.written[-1]
+    store.written.clear()
+
+    for i in range(guesses):
+        game_cache.clear()
+        current = await game_service.get_game(store, "BNCH")
+        guess = f"Answer 1-{i + 1}" if i % 2 == 0 else "wrong guess"
+        _, updated = machine.process_guess(current, guess)
+        await game_service.update_game(store, updated)
+
+    return {
+        "questions": question_count,
+        "full_document_bytes": full_document,
+        "bytes_per_guess": round(sum(store.written) / len(store.written), 1),
+    }
+
+
+def run(question_counts=(5, 50, 200), guesses: int = 6) -> List[Dict[str, float]]:
+    return [asyncio.run(_bytes_per_guess(n, guesses)) for n in question_counts]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--questions", type=int, nargs="+", default=[5, 50, 200])
+    args = parser.parse_args()
+    print(json.dumps(run(args.questions), indent=2))
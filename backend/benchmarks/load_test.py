@@ -0,0 +1,163 @@
+"""Load test: N games, each with M polling displays and K guessing players.
+
+Drives the real FastAPI app in-process against the in-memory store (with an
+optional simulated round-trip latency) and reports p50/p99 latency and
+throughput per endpoint. Displays poll the status endpoint with ETags (the
+frontend's fallback when it cannot stream); players submit a mix of correct,
+repeated and wrong guesses; each game's host advances to the next question
+periodically. Live updates over ``/events`` are not exercised: the in-process
+transport only returns a response once its body is complete.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+os.environ.setdefault("GAME_STORE", "memory")
+
+import httpx
+
+import storage
+from benchmarks.bench_write_bytes import make_questions
+from storage import MemoryStore
+
+
+def _summary(latencies: List[float], statuses: Dict[int, int], seconds: float) -> Dict[str, object]:
+    latencies = sorted(latencies)
+    if not latencies:
+        return {"requests": 0}
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def _load(
+    games: int, displays: int, players: int, seconds: float, poll_interval: float,
+    guess_interval: float, advance_interval: float, latency_ms: float, seed: int,
+) -> Dict[str, object]:
+    storage._store = MemoryStore(latency_ms)
+    from main import app
+
+    rng = random.Random(seed)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=60) as client:
+
+        async def call(endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies[endpoint].append(time.perf_counter() - start)
+            statuses[endpoint][response.status_code] += 1
+            return response
+
+        questions = [
+            {"text": q.text, "answers": [a.model_dump() for a in q.answers]} for q in make_questions(20)
+        ]
+        create_start = time.perf_counter()
+        created = await asyncio.gather(*(
+            call("create_new_game", "POST", "/api/games", json={"mode": "host"}) for _ in range(games)
+        ))
+        create_seconds = time.perf_counter() - create_start
+
+        sessions = []
+        for response in created:
+            code, headers = response.json()["code"], {"X-Host-Id": response.json()["host_id"]}
+            await client.post(f"/api/games/{code}/questions/bulk", json={"questions": questions}, headers=headers)
+            await client.post(f"/api/games/{code}/start", headers=headers)
+            sessions.append((code, headers))
+
+        deadline = time.perf_counter() + seconds
+        answer_texts = [a["text"] for a in questions[0]["answers"]]
+
+        async def display(code: str) -> None:
+            await asyncio.sleep(rng.uniform(0, poll_interval))
+            etag = None
+            while time.perf_counter() < deadline:
+                headers = {"If-None-Match": etag} if etag else {}
+                response = await call("get_game_status", "GET", f"/api/games/{code}", headers=headers)
+                etag = response.headers.get("etag", etag)
+                await asyncio.sleep(poll_interval)
+
+        async def player(code: str) -> None:
+            await asyncio.sleep(rng.uniform(0, guess_interval))
+            while time.perf_counter() < deadline:
+                roll = rng.random()
+                if roll < 0.5:
+                    text = rng.choice(answer_texts).lower()
+                elif roll < 0.7:
+                    text = rng.choice(answer_texts)[:-1]
+                else:
+                    text = f"nothing like it {rng.randrange(1000)}"
+                await call("make_guess", "POST", f"/api/games/{code}/guess", json={"text": text})
+                await asyncio.sleep(guess_interval)
+
+        async def host(code: str, headers: Dict[str, str]) -> None:
+            while time.perf_counter() + advance_interval < deadline:
+                await asyncio.sleep(advance_interval)
+                await call("advance_question", "POST", f"/api/games/{code}/next", headers=headers)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            task
+            for code, headers in sessions
+            for task in (
+                *(display(code) for _ in range(displays)),
+                *(player(code) for _ in range(players)),
+                host(code, headers),
+            )
+        ))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "config": {
+            "games": games, "displays_per_game": displays, "players_per_game": players,
+            "seconds": seconds, "poll_interval": poll_interval, "guess_interval": guess_interval,
+            "advance_interval": advance_interval, "latency_ms": latency_ms, "seed": seed,
+        },
+        "endpoints": {
+            endpoint: _summary(
+                values, statuses[endpoint], create_seconds if endpoint == "create_new_game" else elapsed
+            )
+            for endpoint, values in sorted(latencies.items())
+        },
+    }
+
+
+def run(
+    games: int = 20, displays: int = 3, players: int = 5, seconds: float = 10.0,
+    poll_interval: float = 1.0, guess_interval: float = 0.5, advance_interval: float = 4.0,
+    latency_ms: float = 5.0, seed: int = 1,
+) -> Dict[str, object]:
+    return asyncio.run(_load(
+        games, displays, players, seconds, poll_interval, guess_interval, advance_interval, latency_ms, seed
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--displays", type=int, default=3, help="Polling displays per game")
+    parser.add_argument("--players", type=int, default=5, help="Guessing players per game")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--guess-interval", type=float, default=0.5)
+    parser.add_argument("--advance-interval", type=float, default=4.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(run(
+        args.games, args.displays, args.players, args.seconds, args.poll_interval,
+        args.guess_interval, args.advance_interval, args.latency_ms, args.seed,
+    ), indent=2))
@@ -0,0 +1,70 @@
+"""Micro-benchmarks for the game core: guesses, matching and (de)serialization.
+
+Each case reports the mean time per call in microseconds, measured as the best
+of several repeats so background noise does not inflate results. The cases
+repeat the same guesses, so matching is timed with the match memo disabled;
+``match_question_memoized_us`` times the memo hit instead.
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict
+
+from benchmarks.bench_matcher import make_guesses, make_question
+from benchmarks.bench_write_bytes import make_questions
+import game_logic
+from game_logic import AnswerMatcher, GameStateMachine
+from models import GameMode, GameSession
+from question_bank import LRUCache
+
+
+def _per_call_us(fn: Callable[[], object], number: int, repeat: int) -> float:
+    best = min(timeit.repeat(fn, number=number, repeat=repeat))
+    return round(best / number * 1e6, 3)
+
+
+def run(number: int = 2000, repeat: int = 5) -> Dict[str, float]:
+    now = datetime.now(timezone.utc)
+    game = GameSession(
+        code="MICR", mode=GameMode.HOST_CONTROLLED, host_id="host", questions=make_questions(20),
+        current_index=0, status="playing", created_at=now, expires_at=now + timedelta(hours=1),
+    )
+    machine = GameStateMachine()
+    matcher = AnswerMatcher()
+    question = make_question(8)
+    guesses = make_guesses(question, 64)
+    correct = game.questions[0].answers[3].text.lower()
+    data = game.to_dict()
+    state = {"i": 0}
+
+    def next_guess() -> str:
+        state["i"] = (state["i"] + 1) % len(guesses)
+        return guesses[state["i"]]
+
+    shared, game_logic.match_cache = game_logic.match_cache, LRUCache(0)
+    try:
+        results = {
+            "process_guess_correct_us": _per_call_us(lambda: machine.process_guess(game, correct), number, repeat),
+            "process_guess_wrong_us": _per_call_us(lambda: machine.process_guess(game, "zzz qqq"), number, repeat),
+            "find_match_us": _per_call_us(lambda: matcher.find_match(next_guess(), question.answers), number, repeat),
+            "match_question_us": _per_call_us(lambda: matcher.match_question(next_guess(), question), number, repeat),
+        }
+    finally:
+        game_logic.match_cache = shared
+    return {
+        **results,
+        "match_question_memoized_us": _per_call_us(
+            lambda: matcher.match_question(next_guess(), question), number, repeat
+        ),
+        "to_dict_us": _per_call_us(game.to_dict, number, repeat),
+        "from_dict_us": _per_call_us(lambda: GameSession.from_dict(data, game.questions), number, repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.number, args.repeat), indent=2))
@@ -0,0 +1,99 @@
+"""Run the load test and micro-benchmarks and save the results as JSON.
+
+Results land in ``benchmarks/results/<timestamp>-<commit>.json`` together with
+the commit and interpreter they were measured on, so runs from different
+commits can be compared:
+
+    python -m benchmarks.run_all --compare benchmarks/results/<older>.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from benchmarks import load_test, micro
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Metrics where a smaller value is better; everything else numeric is a rate
+LOWER_IS_BETTER = ("_ms", "_us")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(quick: bool = False) -> Dict[str, object]:
+    if quick:
+        load = load_test.run(games=5, displays=2, players=3, seconds=3.0, advance_interval=1.0)
+        micro_results = micro.run(number=500, repeat=3)
+    else:
+        load = load_test.run()
+        micro_results = micro.run()
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "load_test": load,
+        "micro": micro_results,
+    }
+
+
+def _numbers(data: object, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Flatten nested results into (dotted path, value) pairs."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key not in ("meta", "config", "statuses"):
+                yield from _numbers(value, f"{prefix}{key}.")
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield prefix.rstrip("."), float(data)
+
+
+def compare(old: Dict[str, object], new: Dict[str, object]) -> str:
+    """Per-metric changes from ``old`` to ``new``, marking improvements with + and regressions with -."""
+    previous = dict(_numbers(old))
+    lines = [f"{old['meta']['commit']} -> {new['meta']['commit']}"]
+    for name, value in _numbers(new):
+        before = previous.get(name)
+        if not before:
+            continue
+        change = (value - before) / before * 100
+        better = change < 0 if name.endswith(LOWER_IS_BETTER) else change > 0
+        mark = "=" if change == 0 else "+" if better else "-"
+        lines.append(f"{mark} {name}: {before:g} -> {value:g} ({change:+.1f}%)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Smaller, shorter runs for a smoke check")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/...)")
+    args = parser.parse_args()
+
+    results = run(args.quick)
+    output = args.output
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}-{results['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Saved {output}", file=sys.stderr)
+
+    if args.compare:
+        print(compare(json.loads(args.compare.read_text()), results))
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,125 @@
+"""Concurrency stress test: hundreds of simultaneous guesses on one game.
+
+Guesses arrive through the real FastAPI app and, at the same time, from a
+simulated second worker that shares only the store (no process cache, no
+per-game queue), so optimistic-concurrency conflicts really happen. At the end
+the stored score, strikes and revealed answers must exactly match the sum of
+the guesses that were acknowledged as applied.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("GAME_STORE", "memory")
+
+import httpx
+
+import game_service
+import storage
+from game_logic import GameStateMachine
+from models import Answer, GameMode, Question
+from storage import MemoryStore
+
+ANSWERS = 60
+
+
+async def _foreign_guess(store: MemoryStore, code: str, guess: str) -> dict:
+    """Apply a guess the way another worker would: read, compute, CAS, retry."""
+    machine = GameStateMachine()
+    while True:
+        data = await store.get(game_service.GAMES_COLLECTION, code)
+        game = await game_service.decode_game(store, data)
+        result, updated = machine.process_guess(game, guess)
+        fields = updated.changed_fields()
+        if not fields:
+            return {"points": 0, "strike": 0, "answer": None}
+        fields["version"] = game.version + 1
+        if await store.compare_and_update(
+            game_service.GAMES_COLLECTION, code, fields, "version", game.version
+        ):
+            return {
+                "points": result.points_earned,
+                "strike": result.strikes_added,
+                "answer": result.matched_answer.text if result.correct else None,
+            }
+        await asyncio.sleep(random.uniform(0, 0.005))
+
+
+async def _stress(guesses: int, latency_ms: float) -> dict:
+    store = MemoryStore(latency_ms)
+    storage._store = store
+    from main import app
+
+    game = await game_service.create_game(store, GameMode.HOST_CONTROLLED, "host")
+    await game_service.add_question_to_game(store, game.code, Question(
+        text="Name a number",
+        answers=[Answer(text=f"number {i}", weight=i + 1) for i in range(ANSWERS)],
+    ))
+    await game_service.start_game(store, game.code, "host")
+
+    texts = [
+        f"number {random.randrange(ANSWERS)}" if random.random() < 0.7 else f"wrong {i}"
+        for i in range(guesses)
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://stress") as client:
+
+        async def via_app(text: str) -> dict:
+            response = await client.post(f"/api/games/{game.code}/guess", json={"text": text})
+            if response.status_code == 409:
+                return {"conflict": True}
+            response.raise_for_status()
+            body = response.json()
+            applied = body["correct"] or body["message"] == "Strike!"
+            return {
+                "points": body["answer"]["weight"] if body["correct"] else 0,
+                "strike": 0 if body["correct"] or not applied else 1,
+                "answer": body["answer"]["text"] if body["correct"] else None,
+            }
+
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(
+            _foreign_guess(store, game.code, text) if i % 2 else via_app(text)
+            for i, text in enumerate(texts)
+        ))
+        elapsed = time.perf_counter() - start
+
+    applied = [o for o in outcomes if not o.get("conflict")]
+    final = await store.get(game_service.GAMES_COLLECTION, game.code)
+    revealed = [f"number {i}" for i in range(ANSWERS) if final["revealed_mask"] >> i & 1]
+    expected_score = sum(o["points"] for o in applied)
+    expected_strikes = sum(o["strike"] for o in applied)
+    expected_revealed = sorted(o["answer"] for o in applied if o["answer"])
+    consistent = (
+        final["score"] == expected_score
+        and final["strikes"] == expected_strikes
+        and sorted(revealed) == expected_revealed
+    )
+    return {
+        "guesses": guesses,
+        "rejected_with_409": len(outcomes) - len(applied),
+        "final_score": final["score"],
+        "expected_score": expected_score,
+        "final_strikes": final["strikes"],
+        "revealed": len(revealed),
+        "seconds": round(elapsed, 3),
+        "consistent": consistent,
+    }
+
+
+def run(guesses: int = 400, latency_ms: float = 1.0) -> dict:
+    return asyncio.run(_stress(guesses, latency_ms))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--guesses", type=int, default=400)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    report = run(args.guesses, args.latency_ms)
+    print(json.dumps(report, indent=2))
+    if not report["consistent"]:
+        raise SystemExit("Final game state does not match the applied guesses")
@@ -0,0 +1,110 @@
+"""Expired game cleanup job.
+
+Deletes games and per-game question sets whose ``expires_at`` has passed. Each
+run walks the expired documents in ``expires_at`` order a page at a time,
+deleting every page with batched writes, and stops once its time budget is
+spent. The pagination cursor is saved in the ``maintenance`` collection after
+every page, so the next run resumes where the previous one stopped instead of
+rescanning deleted documents.
+
+With ``CLEANUP_MODE=ttl`` expired documents are left to Firestore's TTL policy
+on ``expires_at`` (see ``firestore.indexes.json``) and the job does nothing.
+
+Trigger it from a scheduler through ``POST /api/admin/cleanup`` or run it
+directly::
+
+    python cleanup.py --max-seconds 60
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from event_log import EVENTS_COLLECTION
+from game_cache import game_cache
+from game_service import GAMES_COLLECTION
+from models import CleanupReport
+from question_bank import QUESTION_SETS_COLLECTION
+from storage import DocumentStore, get_store
+
+MAINTENANCE_COLLECTION = "maintenance"
+CLEANUP_PROGRESS_KEY = "cleanup"
+CLEANUP_COLLECTIONS = (GAMES_COLLECTION, QUESTION_SETS_COLLECTION, EVENTS_COLLECTION)
+
+CLEANUP_MODE = os.getenv("CLEANUP_MODE", "batch").lower()
+CLEANUP_PAGE_SIZE = int(os.getenv("CLEANUP_PAGE_SIZE", "500"))
+CLEANUP_MAX_SECONDS = float(os.getenv("CLEANUP_MAX_SECONDS", "30"))
+
+
+async def run_cleanup(
+    store: DocumentStore,
+    max_seconds: float = CLEANUP_MAX_SECONDS,
+    page_size: int = CLEANUP_PAGE_SIZE,
+    mode: str = CLEANUP_MODE,
+) -> CleanupReport:
+    """Delete expired documents until done or ``max_seconds`` have passed."""
+    started = time.monotonic()
+    deleted: Dict[str, int] = dict.fromkeys(CLEANUP_COLLECTIONS, 0)
+    if mode == "ttl":
+        return CleanupReport(mode=mode, deleted=deleted, pages=0, complete=True, seconds=0.0)
+
+    progress = await store.get(MAINTENANCE_COLLECTION, CLEANUP_PROGRESS_KEY) or {}
+    cursors: Dict[str, Optional[dict]] = progress.get("cursors", {})
+    totals: Dict[str, int] = progress.get("deleted_total", {})
+    now = datetime.now(timezone.utc)
+    pages = 0
+    complete = True
+
+    for collection in CLEANUP_COLLECTIONS:
+        while True:
+            if time.monotonic() - started >= max_seconds:
+                complete = False
+                break
+            cursor = cursors.get(collection)
+            start_after = (cursor["expires_at"], cursor["key"]) if cursor else None
+            page = await store.query_expired(collection, now, limit=page_size, start_after=start_after)
+            if page:
+                keys = [key for key, _ in page]
+                await store.delete_many(collection, keys)
+                if collection == GAMES_COLLECTION:
+                    for key in keys:
+                        game_cache.unpin(key)
+                        game_cache.invalidate(key)
+                deleted[collection] += len(keys)
+                totals[collection] = totals.get(collection, 0) + len(keys)
+                pages += 1
+            if len(page) == page_size:
+                key, expires_at = page[-1]
+                cursors[collection] = {"expires_at": expires_at, "key": key}
+            else:
+                # A short page ends the pass; the next pass starts from the beginning
+                cursors[collection] = None
+            await store.put(MAINTENANCE_COLLECTION, CLEANUP_PROGRESS_KEY, {
+                "cursors": cursors,
+                "deleted_total": totals,
+                "updated_at": datetime.now(timezone.utc),
+            })
+            if cursors[collection] is None:
+                break
+        if not complete:
+            break
+
+    return CleanupReport(
+        mode=mode,
+        deleted=deleted,
+        pages=pages,
+        complete=complete,
+        seconds=round(time.monotonic() - started, 3),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete expired games and question sets.")
+    parser.add_argument("--max-seconds", type=float, default=CLEANUP_MAX_SECONDS)
+    parser.add_argument("--page-size", type=int, default=CLEANUP_PAGE_SIZE)
+    parser.add_argument("--mode", choices=["batch", "ttl"], default=CLEANUP_MODE)
+    args = parser.parse_args()
+    report = asyncio.run(run_cleanup(get_store(), args.max_seconds, args.page_size, args.mode))
+    print(report.model_dump_json(indent=2))
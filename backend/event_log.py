@@ -0,0 +1,219 @@
+"""Append-only game event log with snapshot compaction (opt-in).
+
+With ``GAME_EVENT_LOG=1`` a game change is no longer written to the game
+document. Instead it is appended as a small event holding the changed fields
+(a reveal, a strike, a round change, ...), so a guess costs one constant-size
+write. Each event is keyed by the version it applies to and created only if
+absent, which makes the append itself the optimistic concurrency check: of
+two writers starting from the same version, only one gets to append.
+
+The game document becomes a snapshot. It is rewritten after every
+``GAME_SNAPSHOT_EVERY`` events and on round or status changes. Between
+compactions the snapshot's ``head_version`` field, the latest version
+recorded in events, is raised at most once per ``GAME_HEAD_INTERVAL_MS``, so
+a burst of guesses costs one game document write per interval. Loading a
+game only queries its events when the snapshot is behind its head, and other
+workers watching the game document see changes with up to an interval's
+delay. A writer that finds its version already taken raises the head right
+away, so it retries against the latest events. The events of a game are
+kept until it expires, so a finished game can be replayed or analyzed.
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from models import GameSession
+from question_bank import LRUCache
+from storage import DocumentStore, Maximum
+
+logger = logging.getLogger(__name__)
+
+EVENTS_COLLECTION = "game_events"
+GAME_EVENT_LOG = os.getenv("GAME_EVENT_LOG", "0") == "1"
+SNAPSHOT_EVERY = int(os.getenv("GAME_SNAPSHOT_EVERY", "20"))
+HEAD_INTERVAL_SECONDS = float(os.getenv("GAME_HEAD_INTERVAL_MS", "1000")) / 1000
+# Events that change the round or status are compacted right away
+ROUND_EVENTS = {"start", "advance", "complete", "questions"}
+
+# Per game instance: (stored snapshot version or None if unknown, events since)
+_snapshots = LRUCache(int(os.getenv("GAME_CACHE_SIZE", "10000")))
+# Per game code: (store, games collection, head version) not yet written
+_pending_heads: Dict[str, Tuple[DocumentStore, str, int]] = {}
+_head_timers: Set["asyncio.Task[None]"] = set()
+
+
+def game_instance(code: str, created_at: datetime) -> str:
+    """Identifies one game, as codes are recycled once a game expires."""
+    return f"{code}-{int(created_at.timestamp())}"
+
+
+def event_key(instance: str, base_version: int) -> str:
+    return f"{instance}-{base_version:010d}"
+
+
+def transition_type(fields: Dict[str, Any]) -> str:
+    """Name the transition recorded by a set of changed fields."""
+    status = fields.get("status")
+    if status == "completed":
+        return "complete"
+    if status == "playing":
+        return "start"
+    if "current_index" in fields:
+        return "advance"
+    if "questions" in fields:
+        return "questions"
+    if "revealed_mask" in fields:
+        return "reveal"
+    if "strikes" in fields:
+        return "strike"
+    return "update"
+
+
+def apply_events(snapshot: dict, events: List[dict]) -> Tuple[dict, int]:
+    """Replay events onto a game document; returns it and the events applied.
+
+    Events must be ordered by base version; replay stops at the first one
+    that does not continue from the current version.
+    """
+    state = dict(snapshot)
+    applied = 0
+    for event in events:
+        if event["base"] != state.get("version", 0):
+            break
+        state.update(event["fields"])
+        state["version"] = event["version"]
+        applied += 1
+    return state, applied
+
+
+def head_version(snapshot: dict) -> int:
+    """The latest version of a game known from its snapshot document."""
+    return max(snapshot.get("version", 0), snapshot.get("head_version", 0))
+
+
+async def replay(store: DocumentStore, snapshot: dict) -> dict:
+    """Bring a game snapshot up to date with the events appended after it."""
+    instance = game_instance(snapshot["code"], snapshot["created_at"])
+    version = snapshot.get("version", 0)
+    if "head_version" in snapshot and snapshot["head_version"] <= version:
+        _snapshots.put(instance, (version, 0))
+        return snapshot  # no events after the snapshot
+    events = await store.query_range(EVENTS_COLLECTION, "game", instance, "base", version)
+    state, applied = apply_events(snapshot, events)
+    _snapshots.put(instance, (version, applied))
+    return state
+
+
+async def append(
+    store: DocumentStore, games_collection: str, game: GameSession, fields: Dict[str, Any], base_version: int
+) -> bool:
+    """Record a change of ``game`` from ``base_version`` to ``fields["version"]``.
+
+    Returns False if another change from ``base_version`` was recorded first.
+    Compacts the game into its snapshot when due.
+    """
+    instance = game_instance(game.code, game.created_at)
+    version = fields["version"]
+    kind = transition_type(fields)
+    event = {
+        "game": instance,
+        "code": game.code,
+        "base": base_version,
+        "version": version,
+        "type": kind,
+        "fields": {name: value for name, value in fields.items() if name != "version"},
+        "at": datetime.now(timezone.utc),
+        "expires_at": game.expires_at,
+    }
+    if not await store.compare_and_set(EVENTS_COLLECTION, event_key(instance, base_version), event, "base", None):
+        # The writer that got here first may not have raised the head yet;
+        # make sure the retry replays its event instead of trusting the snapshot
+        await _raise_head(store, games_collection, game.code, base_version + 1)
+        return False
+
+    snapshot_version, since = _snapshots.get(instance) or (None, 0)
+    compacted = False
+    if kind in ROUND_EVENTS or since + 1 >= SNAPSHOT_EVERY:
+        try:
+            snapshot_version = await _compact(store, games_collection, game, version, snapshot_version)
+            compacted = snapshot_version == version
+            since = -1
+        except Exception:  # the event is stored; compaction can wait
+            logger.exception("Compacting game %s failed", game.code)
+    if compacted:
+        pending = _pending_heads.get(game.code)
+        if pending is not None and pending[2] <= version:
+            del _pending_heads[game.code]  # the snapshot is at head already
+    else:
+        # Point readers (and other workers' watches) at the new event
+        await _raise_head_later(store, games_collection, game.code, version)
+    _snapshots.put(instance, (snapshot_version, since + 1))
+    return True
+
+
+async def _raise_head_later(store: DocumentStore, games_collection: str, code: str, version: int) -> None:
+    """Raise a game's head version within ``HEAD_INTERVAL_SECONDS``, batching appends."""
+    if HEAD_INTERVAL_SECONDS <= 0:
+        await _raise_head(store, games_collection, code, version)
+        return
+    pending = _pending_heads.get(code)
+    _pending_heads[code] = (store, games_collection, max(version, pending[2] if pending else version))
+    if pending is None:
+        timer = asyncio.create_task(_write_head_later(code))
+        _head_timers.add(timer)
+        timer.add_done_callback(_head_timers.discard)
+
+
+async def _write_head_later(code: str) -> None:
+    await asyncio.sleep(HEAD_INTERVAL_SECONDS)
+    pending = _pending_heads.pop(code, None)
+    if pending is not None:
+        await _raise_head(*pending[:2], code, pending[2])
+
+
+async def flush_heads() -> None:
+    """Write every head version still waiting for its interval (e.g. on shutdown)."""
+    for timer in list(_head_timers):
+        timer.cancel()
+    pending = list(_pending_heads.items())
+    _pending_heads.clear()
+    for code, (store, games_collection, version) in pending:
+        await _raise_head(store, games_collection, code, version)
+
+
+async def _raise_head(store: DocumentStore, games_collection: str, code: str, version: int) -> None:
+    try:
+        await store.merge(games_collection, code, {"head_version": Maximum(version)}, create=False)
+    except Exception:  # readers catch up at the next append or compaction
+        logger.exception("Raising the head version of game %s failed", code)
+
+
+async def _compact(
+    store: DocumentStore, games_collection: str, game: GameSession, version: int, snapshot_version: Optional[int]
+) -> Optional[int]:
+    """Write ``game`` at ``version`` as its snapshot unless a newer one exists."""
+    data = {**game.to_dict(), "version": version, "head_version": Maximum(version)}
+    for _ in range(2):
+        if snapshot_version is None:
+            doc = await store.get(games_collection, game.code)
+            if doc is None:
+                return None
+            snapshot_version = doc.get("version", 0)
+        if snapshot_version >= version:
+            return snapshot_version
+        if await store.compare_and_update(games_collection, game.code, data, "version", snapshot_version):
+            return version
+        snapshot_version = None  # compacted by another writer meanwhile; re-read
+    return None
+
+
+async def history(store: DocumentStore, game: GameSession) -> List[Dict[str, Any]]:
+    """Every recorded event of a game, oldest first."""
+    instance = game_instance(game.code, game.created_at)
+    events = await store.query_range(EVENTS_COLLECTION, "game", instance, "base", 0)
+    return [
+        {"version": e["version"], "type": e["type"], "fields": e["fields"], "at": e["at"]}
+        for e in events
+    ]
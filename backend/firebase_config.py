@@ -1,32 +1,65 @@
-"""Firebase configuration and Firestore client initialization."""
+"""Firebase configuration and Firestore client initialization.
+
+Importing this module loads the Firebase Admin SDK and the Firestore/gRPC
+stack, which takes a good fraction of a second; it is only imported when the
+Firestore store is first used, or by the startup warm-up.
+"""
 import os
+import threading
+
 import firebase_admin
-from firebase_admin import credentials, firestore
-from google.cloud.firestore_v1 import Client
+from firebase_admin import firestore, firestore_async
+from google.cloud.firestore_v1 import AsyncClient, Client
 
 # Initialize Firebase Admin SDK
 _app = None
 _db: Client | None = None
+_async_db: AsyncClient | None = None
+# The warm-up initializes the app on a worker thread while requests may too
+_lock = threading.Lock()
+
+
+def _get_app() -> firebase_admin.App:
+    """Get the Firebase app, initializing it if necessary."""
+    global _app
+
+    with _lock:
+        if _app is None:
+            # In Cloud Run, use default credentials
+            # Locally, use application default credentials or service account
+            if os.getenv("GOOGLE_CLOUD_PROJECT"):
+                # Running in GCP - use default credentials
+                _app = firebase_admin.initialize_app()
+            else:
+                # Local development - use application default credentials
+                _app = firebase_admin.initialize_app(options={
+                    "projectId": "feud-family"
+                })
+    return _app
+
+
+def initialize() -> None:
+    """Initialize the Firebase app ahead of first use (safe from any thread)."""
+    _get_app()
 
 
 def get_db() -> Client:
-    """Get Firestore database client, initializing if necessary."""
-    global _app, _db
-    
-    if _db is not None:
-        return _db
-    
-    if _app is None:
-        # In Cloud Run, use default credentials
-        # Locally, use application default credentials or service account
-        if os.getenv("GOOGLE_CLOUD_PROJECT"):
-            # Running in GCP - use default credentials
-            _app = firebase_admin.initialize_app()
-        else:
-            # Local development - use application default credentials
-            _app = firebase_admin.initialize_app(options={
-                "projectId": "feud-family"
-            })
-    
-    _db = firestore.client()
+    """Get synchronous Firestore client (used for snapshot listeners)."""
+    global _db
+
+    if _db is None:
+        _db = firestore.client(_get_app())
     return _db
+
+
+def get_async_db() -> AsyncClient:
+    """Get async Firestore client for request handlers.
+
+    Calls made through this client yield to the event loop while waiting on
+    the network, so one worker can serve many requests concurrently.
+    """
+    global _async_db
+
+    if _async_db is None:
+        _async_db = firestore_async.client(_get_app())
+    return _async_db
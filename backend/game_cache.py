@@ -0,0 +1,121 @@
+"""Per-process read-through cache of decoded game sessions.
+
+Entries are keyed by game code and carry the session's ``version``, which
+``update_game`` increments on every write. A cached entry is only ever
+replaced by a session with an equal or newer version, writes from this worker
+refresh the entry immediately, and entries expire after a short TTL so changes
+made by other workers become visible within a bounded delay.
+
+Games owned by this worker in affinity mode are pinned: their entries are
+authoritative, so they neither expire nor get evicted until unpinned, or until
+the game itself expires. At most ``max_pinned`` games are pinned at a time.
+
+Cached sessions are shared between requests and must be treated as read-only;
+the service layer copies a session before mutating it.
+"""
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+
+from models import GameSession
+
+
+class GameCache:
+    """LRU + TTL cache of GameSession objects with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 2.0, max_pinned: int = 5_000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_pinned = max_pinned
+        self._entries: "OrderedDict[str, Tuple[float, GameSession]]" = OrderedDict()
+        self._pinned: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, code: str) -> Optional[GameSession]:
+        """Return the cached session for a code, or None if absent or expired."""
+        entry = self._entries.get(code)
+        if entry is not None and code in self._pinned and entry[1].expires_at < datetime.now(timezone.utc):
+            # An expired game's code may be recycled; stop treating it as live
+            self._pinned.discard(code)
+            entry = (0.0, entry[1])
+        if entry is None or (entry[0] < time.monotonic() and code not in self._pinned):
+            if entry is not None:
+                del self._entries[code]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(code)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, game: GameSession) -> None:
+        """Cache a session unless a newer version is already cached.
+
+        A session of a recycled code (created later) replaces the old game's.
+        """
+        entry = self._entries.get(game.code)
+        if entry is not None and (entry[1].created_at, entry[1].version) > (game.created_at, game.version):
+            return
+        self._entries[game.code] = (time.monotonic() + self.ttl_seconds, game)
+        self._entries.move_to_end(game.code)
+        if len(self._entries) > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        for code in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                return
+            if code not in self._pinned:
+                del self._entries[code]
+                self.evictions += 1
+
+    def invalidate(self, code: str) -> None:
+        """Drop a cached session."""
+        self._entries.pop(code, None)
+
+    def pin(self, code: str) -> bool:
+        """Keep a game's entry until unpinned (its owner holds the live state).
+
+        Returns False, pinning nothing, if ``max_pinned`` games are pinned.
+        """
+        if code not in self._pinned and len(self._pinned) >= self.max_pinned:
+            return False
+        self._pinned.add(code)
+        return True
+
+    def unpin(self, code: str) -> None:
+        self._pinned.discard(code)
+
+    def is_pinned(self, code: str) -> bool:
+        return code in self._pinned
+
+    def pinned(self) -> Set[str]:
+        """Codes of the pinned games."""
+        return set(self._pinned)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._pinned.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "pinned": len(self._pinned),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared cache for this worker process
+game_cache = GameCache(
+    max_entries=int(os.getenv("GAME_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("GAME_CACHE_TTL_SECONDS", "2")),
+    max_pinned=int(os.getenv("GAME_CACHE_MAX_PINNED", "5000")),
+)
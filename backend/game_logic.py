@@ -2,19 +2,34 @@
 
 This module contains pure functions with no side effects for game state management.
 All I/O operations (database, HTTP) are handled by the imperative shell (main.py, game_service.py).
+
+Game states are structurally shared: a transition copies the session shallowly,
+so questions and answers are shared by reference, and list fields are replaced
+rather than mutated in place. Revealed answers are a bitmask over the current
+question's answer indices.
 """
-from dataclasses import dataclass
-from typing import Optional, List, Tuple
-from thefuzz import process
+import hashlib
+import os
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Tuple
 
+from metrics import timed
 from models import GameSession, GameMode, Answer, Question
+from question_bank import LRUCache
+
+# Fuzzy match outcomes shared by every game in this process, keyed by
+# (answer set hash, normalized guess, threshold); misses are stored as MISS
+match_cache = LRUCache(int(os.getenv("MATCH_CACHE_SIZE", "20000")))
+MISS = -1
 
 
 @dataclass
 class GuessResult:
     """Result of processing a guess - pure data, no side effects."""
     correct: bool
-    matched_answer: Optional[Answer] = None
+    matched_answer: Optional[Answer] = None  # Only when newly revealed
+    match_index: Optional[int] = None  # Answer the guess matched, even if already revealed
     message: Optional[str] = None
     points_earned: int = 0
     strikes_added: int = 0
@@ -23,6 +38,140 @@ class GuessResult:
     already_revealed: bool = False
 
 
+@dataclass
+class BatchGuessResult:
+    """Result of scoring a batch of guesses for one question - pure data."""
+    matches: List[Optional[Answer]] = field(default_factory=list)  # Per guess, in order
+    match_indices: List[Optional[int]] = field(default_factory=list)  # Answer index per guess
+    revealed: List[Answer] = field(default_factory=list)  # Newly revealed by this batch
+    points_earned: int = 0
+    strikes_added: int = 0
+    should_advance: bool = False
+    game_completed: bool = False
+    message: Optional[str] = None
+
+
+def normalize_text(text: str) -> str:
+    """Normalize an answer or guess for matching.
+
+    Accents do not count, as with the former thefuzz matcher (which dropped
+    non-ASCII characters): text is decomposed (NFKD) and its combining marks
+    removed before rapidfuzz's default processing (lowercase, alphanumerics
+    and spaces only).
+    """
+    from rapidfuzz.utils import default_process
+
+    if not text.isascii():
+        text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    return default_process(text)
+
+
+class AnswerIndex:
+    """Precompiled matching index for one question's answers.
+
+    Answer texts and aliases are normalized once; lookups try an exact hash
+    match on the normalized guess before falling back to fuzzy scoring, which
+    stops early once no choice can reach the threshold. Fuzzy outcomes are
+    memoized in ``match_cache`` under a hash of the normalized choices, so the
+    same question played in many games shares them, and an edited question
+    (a new index) never sees stale ones. Instances are immutable and shared,
+    so copies of a question reuse the same index.
+
+    rapidfuzz is imported on first use (see ``warm_up``) to keep startup fast.
+    """
+
+    def __init__(self, answers: List[Answer]):
+        self.answers = answers
+        self.choices: List[str] = []
+        self.owners: List[int] = []  # Answer index for each choice
+        self.exact: Dict[str, int] = {}
+        for i, answer in enumerate(answers):
+            for text in (answer.text, *answer.aliases):
+                normalized = normalize_text(text)
+                if not normalized:
+                    continue
+                self.choices.append(normalized)
+                self.owners.append(i)
+                self.exact.setdefault(normalized, i)
+        self.content_hash = hashlib.blake2b(
+            repr((self.choices, self.owners)).encode(), digest_size=12
+        ).digest()
+
+    def __deepcopy__(self, memo: dict) -> "AnswerIndex":
+        return self
+
+    def match_index(self, guess: str, threshold: int) -> Optional[int]:
+        """Index of the best matching answer, or None if below threshold."""
+        normalized = normalize_text(guess)
+        if not normalized:
+            return None
+        exact = self.exact.get(normalized)
+        if exact is not None:
+            return exact
+        key = (self.content_hash, normalized, threshold)
+        cached = match_cache.get(key)
+        if cached is not None:
+            return None if cached == MISS else cached
+        from rapidfuzz import fuzz, process
+
+        # Scores are compared after rounding to whole points, as before
+        match = process.extractOne(
+            normalized, self.choices,
+            scorer=fuzz.WRatio, processor=None, score_cutoff=threshold - 0.5,
+        )
+        index = self.owners[match[2]] if match else None
+        match_cache.put(key, MISS if index is None else index)
+        return index
+
+    def match_many(self, guesses: List[str], threshold: int) -> List[Optional[int]]:
+        """Answer index for each guess (None if below threshold).
+
+        Audience guesses repeat a lot, so each distinct normalized guess is
+        resolved once: exact matches by hash, then memoized outcomes, and the
+        rest scored against every choice in one vectorized score-matrix pass.
+        """
+        from rapidfuzz import fuzz, process
+
+        normalized = [normalize_text(g) for g in guesses]
+        resolved: Dict[str, Optional[int]] = {}
+        pending: List[str] = []
+        for text in set(normalized):
+            if text in self.exact:
+                resolved[text] = self.exact[text]
+            elif text and self.choices:
+                cached = match_cache.get((self.content_hash, text, threshold))
+                if cached is None:
+                    pending.append(text)
+                else:
+                    resolved[text] = None if cached == MISS else cached
+            else:
+                resolved[text] = None
+
+        if pending:
+            import numpy as np  # only needed for batches
+
+            cutoff = threshold - 0.5
+            scores = process.cdist(
+                pending, self.choices, scorer=fuzz.WRatio, processor=None,
+                score_cutoff=cutoff, dtype=np.float64, workers=-1,
+            )
+            best = scores.argmax(axis=1)
+            for row, text in enumerate(pending):
+                choice = best[row]
+                index = self.owners[choice] if scores[row, choice] >= cutoff else None
+                resolved[text] = index
+                match_cache.put((self.content_hash, text, threshold), MISS if index is None else index)
+
+        return [resolved[text] for text in normalized]
+
+
+def warm_up() -> None:
+    """Load the matching libraries so the first guess does not pay for it."""
+    index = AnswerIndex([Answer(text="warm up", weight=1)])
+    index.match_index("warm", 80)
+    index.match_many(["warm", "up"], 80)
+
+
 class AnswerMatcher:
     """Handles fuzzy matching of player guesses to answers."""
 
@@ -32,6 +181,9 @@ class AnswerMatcher:
     def find_match(self, guess: str, answers: List[Answer]) -> Optional[Answer]:
         """Find the best matching answer for a guess.
 
+        Builds a throwaway index; prefer ``match_question`` for questions,
+        which reuses the index compiled for the question.
+
         Args:
             guess: Player's guess text
             answers: List of possible answers
@@ -41,13 +193,31 @@ class AnswerMatcher:
         """
         if not guess or not answers:
             return None
+        with timed("match"):
+            index = AnswerIndex(answers).match_index(guess, self.threshold)
+        return answers[index] if index is not None else None
+
+    def match_question(self, guess: str, question: Question) -> Optional[Answer]:
+        """Find the best matching answer for a guess using the question's index."""
+        index = self.match_question_index(guess, question)
+        return question.answers[index] if index is not None else None
+
+    def match_question_index(self, guess: str, question: Question) -> Optional[int]:
+        """Index of the best matching answer of a question, or None."""
+        if not guess or not question.answers:
+            return None
+        with timed("match"):
+            return question.answer_index().match_index(guess, self.threshold)
 
-        choices = [a.text for a in answers]
-        match = process.extractOne(guess, choices)
+    def match_question_many(self, guesses: List[str], question: Question) -> List[Optional[int]]:
+        """Match many guesses against a question at once.
 
-        if match and match[1] >= self.threshold:
-            return next((a for a in answers if a.text == match[0]), None)
-        return None
+        Returns the matched answer index for each guess (None for a miss).
+        """
+        if not question.answers:
+            return [None] * len(guesses)
+        with timed("match"):
+            return question.answer_index().match_many(guesses, self.threshold)
 
 
 class GameStateMachine:
@@ -69,40 +239,93 @@ class GameStateMachine:
         Returns:
             Tuple of (GuessResult, updated GameSession copy)
         """
-        # Create a copy to avoid mutation
-        updated_game = game.model_copy(deep=True)
+        # Shallow copy: questions are shared, only per-round state changes
+        updated_game = game.model_copy()
 
         question = updated_game.current_question()
         if not question:
             return GuessResult(correct=False, message="No active question"), updated_game
 
         # Try to match the guess
-        matched = self.matcher.find_match(guess_text.strip(), question.answers)
+        index = self.matcher.match_question_index(guess_text.strip(), question)
 
-        if matched:
-            return self._handle_correct_guess(updated_game, matched, question)
+        if index is not None:
+            return self._handle_correct_guess(updated_game, index, question)
         else:
             return self._handle_wrong_guess(updated_game)
 
+    def process_guess_batch(
+        self, game: GameSession, guesses: List[str]
+    ) -> Tuple[BatchGuessResult, GameSession]:
+        """Score many guesses for the current question and apply them as one update.
+
+        Every newly matched answer is revealed and scored once. If the batch
+        reveals nothing new and at least one guess missed, a single strike is
+        added. Like process_guess, this returns a new game state.
+
+        Args:
+            game: Current game session (not mutated)
+            guesses: Guess texts, scored in one pass
+
+        Returns:
+            Tuple of (BatchGuessResult, updated GameSession copy)
+        """
+        updated_game = game.model_copy()
+
+        question = updated_game.current_question()
+        if not question:
+            return BatchGuessResult(message="No active question"), updated_game
+
+        indices = self.matcher.match_question_many([g.strip() for g in guesses], question)
+        matches = [question.answers[i] if i is not None else None for i in indices]
+        result = BatchGuessResult(matches=matches, match_indices=indices)
+
+        for index in indices:
+            if index is not None and not updated_game.is_revealed(index):
+                updated_game.reveal(index)
+                answer = question.answers[index]
+                result.revealed.append(answer)
+                result.points_earned += answer.weight or 0
+        updated_game.score += result.points_earned
+
+        if result.revealed:
+            all_revealed = updated_game.revealed_count == len(question.answers)
+            result.should_advance = all_revealed and updated_game.mode == GameMode.AUTO_ADVANCE
+        elif any(answer is None for answer in matches):
+            updated_game.strikes += 1
+            result.strikes_added = 1
+            result.message = "Strike!"
+            result.should_advance = (
+                updated_game.strikes >= self.max_strikes
+                and updated_game.mode == GameMode.AUTO_ADVANCE
+            )
+
+        if result.should_advance:
+            updated_game = self._advance_to_next(updated_game)
+        result.game_completed = updated_game.status == "completed"
+        return result, updated_game
+
     def _handle_correct_guess(
-        self, game: GameSession, matched: Answer, question: Question
+        self, game: GameSession, index: int, question: Question
     ) -> Tuple[GuessResult, GameSession]:
-        """Handle a correct guess."""
+        """Handle a guess matching answer ``index`` of the question."""
         # Check if already revealed
-        if matched.text in game.revealed_answers:
+        if game.is_revealed(index):
             return GuessResult(
                 correct=False,
+                match_index=index,
                 message="Already revealed!",
                 already_revealed=True
             ), game
 
         # Reveal the answer and add points
-        game.revealed_answers.append(matched.text)
+        matched = question.answers[index]
+        game.reveal(index)
         points = matched.weight or 0
         game.score += points
 
         # Check if all answers revealed
-        all_revealed = len(game.revealed_answers) == len(question.answers)
+        all_revealed = game.revealed_count == len(question.answers)
         should_advance = all_revealed and game.mode == GameMode.AUTO_ADVANCE
 
         if should_advance:
@@ -111,6 +334,7 @@ class GameStateMachine:
         return GuessResult(
             correct=True,
             matched_answer=matched,
+            match_index=index,
             points_earned=points,
             should_advance=should_advance,
             game_completed=game.status == "completed"
@@ -139,7 +363,7 @@ class GameStateMachine:
     def _advance_to_next(self, game: GameSession) -> GameSession:
         """Advance to the next question, resetting per-question state."""
         game.current_index += 1
-        game.revealed_answers = []
+        game.revealed_mask = 0
         game.strikes = 0
 
         if game.current_index >= len(game.questions):
@@ -148,6 +372,29 @@ class GameStateMachine:
         return game
 
 
+def tally_matches(
+    question: Question, match_indices: List[Optional[int]]
+) -> Tuple[List[Tuple[Answer, int, int]], int]:
+    """Bucket matched guesses by answer to build survey-style weights.
+
+    Returns ``(answer, count, suggested_weight)`` for every answer of the
+    question, where the weight is the answer's share of matched guesses in
+    percent, together with the number of guesses that matched nothing.
+    """
+    counts = [0] * len(question.answers)
+    misses = 0
+    for index in match_indices:
+        if index is None:
+            misses += 1
+        else:
+            counts[index] += 1
+    matched = len(match_indices) - misses
+    return [
+        (answer, count, round(100 * count / matched) if matched else 0)
+        for answer, count in zip(question.answers, counts)
+    ], misses
+
+
 # Default instances for convenience
 default_matcher = AnswerMatcher()
 default_state_machine = GameStateMachine()
@@ -1,44 +1,123 @@
-"""Game session management service with Firestore persistence."""
+"""Game session management service, persisted through a pluggable DocumentStore."""
+import asyncio
+import logging
+import os
 import random
 import string
+import uuid
+import weakref
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Optional
-from google.cloud.firestore_v1 import Client, DocumentReference
+from typing import Callable, Dict, List, Optional
 
+import event_log
+from game_cache import game_cache
 from models import GameSession, GameMode, Question, Answer
+from question_bank import load_question_set, load_question_sets, save_question_set
+from storage import DocumentStore
 
 # Characters for game codes (avoid confusing characters: 0/O, 1/I/L)
 CODE_CHARS = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
 CODE_LENGTH = 4
+# The frontend's join form mirrors this as REACT_APP_GAME_CODE_MAX_LENGTH
+CODE_MAX_LENGTH = int(os.getenv("GAME_CODE_MAX_LENGTH", "6"))
+
+
+def is_valid_code(code: str) -> bool:
+    """Whether ``code`` could be a game code (upper case)."""
+    return CODE_LENGTH <= len(code) <= CODE_MAX_LENGTH and all(c in CODE_CHARS for c in code)
+CODE_BATCH_SIZE = 16
 GAME_EXPIRY_HOURS = 24
+GAMES_COLLECTION = "games"
+MAX_UPDATE_RETRIES = 5
+RETRY_BACKOFF_SECONDS = 0.01
+# How long guesses on a game are buffered in memory before one write (0 = off)
+GUESS_WRITE_BEHIND_SECONDS = float(os.getenv("GUESS_WRITE_BEHIND_MS", "0")) / 1000
+
+logger = logging.getLogger(__name__)
+
+# Per-game write queues for this process; entries disappear once unused
+_game_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+class ConcurrentUpdateError(RuntimeError):
+    """Raised when a game changed in storage after it was read."""
+
+
+class CodeAllocator:
+    """Claims unused game codes with atomic create-if-absent writes.
+
+    Each attempt draws a batch of random candidates and reads them with one
+    multi-get. Free codes (missing, or held by an expired game) are then
+    claimed with a conditional write, so two creators can never end up with
+    the same code. The share of occupied candidates is tracked as a moving
+    average; once it passes ``grow_at`` the allocator switches to longer codes
+    (up to ``max_length``) instead of letting creation slow down as the
+    keyspace fills.
+    """
+
+    def __init__(
+        self,
+        length: int = CODE_LENGTH,
+        max_length: int = CODE_MAX_LENGTH,
+        batch_size: int = CODE_BATCH_SIZE,
+        max_batches: int = 8,
+        grow_at: float = 0.75,
+    ):
+        self.length = length
+        self.max_length = max(max_length, length)
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.grow_at = grow_at
+        self.occupancy = 0.0
 
+    def candidates(self) -> List[str]:
+        """A batch of distinct random codes of the current length."""
+        codes = {''.join(random.choices(CODE_CHARS, k=self.length)) for _ in range(self.batch_size)}
+        return list(codes)
 
-def generate_code(db: Client) -> str:
-    """Generate a unique 4-character game code."""
-    max_attempts = 100
-    for _ in range(max_attempts):
-        code = ''.join(random.choices(CODE_CHARS, k=CODE_LENGTH))
-        # Check if code already exists and is not expired
-        doc = db.collection("games").document(code).get()
-        if not doc.exists:
-            return code
-        # Check if existing game is expired (can recycle)
-        game_data = doc.to_dict()
-        if game_data and game_data.get("expires_at"):
-            expires_at = game_data["expires_at"]
-            if expires_at < datetime.now(timezone.utc):
-                return code  # Recycle expired code
-    raise RuntimeError("Could not generate unique game code")
-
-
-def create_game(db: Client, mode: GameMode, host_id: str) -> GameSession:
-    """Create a new game session in Firestore."""
-    code = generate_code(db)
+    def _observe(self, occupied: int, sampled: int) -> None:
+        self.occupancy = 0.8 * self.occupancy + 0.2 * (occupied / sampled)
+        if self.occupancy >= self.grow_at and self.length < self.max_length:
+            self.length += 1
+            self.occupancy = 0.0
+
+    async def claim(self, store: DocumentStore, game: GameSession) -> str:
+        """Assign a free code to ``game`` and create its document.
+
+        Raises RuntimeError if no code could be claimed.
+        """
+        for _ in range(self.max_batches):
+            codes = self.candidates()
+            existing = await store.get_many(GAMES_COLLECTION, codes)
+            now = datetime.now(timezone.utc)
+            free = [
+                code for code in codes
+                if existing[code] is None
+                or (existing[code].get("expires_at") is not None and existing[code]["expires_at"] < now)
+            ]
+            self._observe(len(codes) - len(free), len(codes))
+
+            for code in free:
+                game.code = code
+                previous = existing[code]
+                # Create if absent, or recycle the expired game we just read
+                expected = previous["expires_at"] if previous is not None else None
+                if await store.compare_and_set(GAMES_COLLECTION, code, game.to_dict(), "expires_at", expected):
+                    return code
+        raise RuntimeError("Could not generate unique game code")
+
+
+code_allocator = CodeAllocator()
+
+
+async def create_game(store: DocumentStore, mode: GameMode, host_id: str) -> GameSession:
+    """Create and persist a new game session under a newly claimed code."""
     now = datetime.now(timezone.utc)
     expires_at = now + timedelta(hours=GAME_EXPIRY_HOURS)
     
     game = GameSession(
-        code=code,
+        code="",
         mode=mode,
         host_id=host_id,
         questions=[],
@@ -47,95 +126,411 @@ def create_game(db: Client, mode: GameMode, host_id: str) -> GameSession:
         strikes=0,
         max_strikes=3,
         status="waiting",
-        revealed_answers=[],
         created_at=now,
         expires_at=expires_at,
     )
     
-    # Save to Firestore
-    db.collection("games").document(code).set(game.to_dict())
+    code = await code_allocator.claim(store, game)
+    game.mark_persisted()
+    # A recycled code may still have the expired game cached
+    game_cache.invalidate(code)
+    game_cache.put(game)
     return game
 
 
-def get_game(db: Client, code: str) -> Optional[GameSession]:
-    """Get a game session by code."""
-    doc = db.collection("games").document(code.upper()).get()
-    if not doc.exists:
+async def get_game(store: DocumentStore, code: str) -> Optional[GameSession]:
+    """Get a game session by code, served from the process cache when fresh.
+
+    The returned session may be shared with other requests; do not mutate it.
+    """
+    code = code.upper()
+    pending = _pending_writes.get(code)
+    if pending is not None:
+        return pending.game
+    game = game_cache.get(code)
+    if game is not None:
+        return game
+    return await _load_game(store, code)
+
+
+async def get_games(store: DocumentStore, codes: List[str]) -> Dict[str, Optional[GameSession]]:
+    """Get several game sessions by code, served from the process cache when fresh.
+
+    Games not cached are read with one multi-get, and the question sets they
+    need with one more. Every requested code is in the result, mapped to None
+    if there is no such game. The returned sessions may be shared with other
+    requests; do not mutate them.
+    """
+    games: Dict[str, Optional[GameSession]] = {}
+    for code in codes:
+        code = code.upper()
+        pending = _pending_writes.get(code)
+        games[code] = pending.game if pending is not None else game_cache.get(code)
+    missing = [code for code, game in games.items() if game is None]
+    if not missing:
+        return games
+
+    docs = await store.get_many(GAMES_COLLECTION, missing)
+    found = [data for data in docs.values() if data is not None]
+    if event_log.GAME_EVENT_LOG:
+        found = await asyncio.gather(*(event_log.replay(store, data) for data in found))
+    question_sets = await load_question_sets(
+        store, [data["question_set_id"] for data in found if data.get("question_set_id")]
+    )
+    for data in found:
+        set_id = data.get("question_set_id")
+        game = GameSession.from_dict(data, question_sets[set_id] if set_id else None)
+        game_cache.put(game)
+        games[game.code] = game
+    for code in missing:
+        if games[code] is None:
+            game_cache.unpin(code)
+            game_cache.invalidate(code)
+    return games
+
+
+async def _load_game(store: DocumentStore, code: str) -> Optional[GameSession]:
+    """Read a game session from storage, bypassing the cache."""
+    data = await store.get(GAMES_COLLECTION, code)
+    if data is None:
+        game_cache.unpin(code)
+        game_cache.invalidate(code)
         return None
-    return GameSession.from_dict(doc.to_dict())
+    game = await decode_game(store, data)
+    game_cache.put(game)
+    return game
+
+
+async def decode_game(store: DocumentStore, data: dict) -> GameSession:
+    """Build a session from its game document, attaching its question set.
+
+    With the event log on, the document is a snapshot and the events recorded
+    after it are replayed first.
+    """
+    if event_log.GAME_EVENT_LOG:
+        data = await event_log.replay(store, data)
+    questions = None
+    if data.get("question_set_id"):
+        questions = await load_question_set(store, data["question_set_id"])
+    return GameSession.from_dict(data, questions)
+
+
+async def _get_game_for_update(
+    store: DocumentStore, code: str, fresh: bool = False
+) -> Optional[GameSession]:
+    """Get a private copy of a game session that is safe to mutate.
+
+    With ``fresh=True`` the session is re-read from storage instead of the cache.
+    """
+    code = code.upper()
+    game = await (_load_game(store, code) if fresh else get_game(store, code))
+    if game is None:
+        return None
+    # List fields are replaced, never mutated in place, so a shallow copy suffices
+    return game.model_copy()
+
+
+async def update_game(
+    store: DocumentStore, game: GameSession, base_version: Optional[int] = None
+) -> None:
+    """Persist a game session, bumping its version and refreshing the cache.
+
+    While the game is waiting its questions are written inline, as the host
+    may still add more; the question set is stored once, when play starts.
+    Only fields changed since the session was loaded are written, and only if
+    the stored version is still the one the session was loaded with; otherwise
+    ``ConcurrentUpdateError`` is raised. A session with no changes is not
+    written at all.
+
+    A session whose version was already advanced in memory (write-behind)
+    passes the stored version it was loaded with as ``base_version`` and is
+    written under its own version.
+
+    With the event log on, the changed fields are appended as an event
+    instead of written to the game document (see ``event_log``).
+    """
+    expected = game.version if base_version is None else base_version
+    new_version = game.version + 1 if base_version is None else game.version
+    if game.status == "waiting":
+        if game.questions_changed():
+            game.question_set_id = None
+    elif game.questions and game.question_set_id is None:
+        game.question_set_id = await save_question_set(store, game.questions, game.expires_at)
+        # Share the cached list, and its compiled matchers, with other games
+        game.questions = await load_question_set(store, game.question_set_id)
+    try:
+        if game.is_persisted:
+            fields = game.changed_fields()
+            if not fields:
+                return
+            fields["version"] = new_version
+            if event_log.GAME_EVENT_LOG:
+                written = await event_log.append(store, GAMES_COLLECTION, game, fields, expected)
+            else:
+                written = await store.compare_and_update(
+                    GAMES_COLLECTION, game.code, fields, "version", expected
+                )
+            if not written:
+                raise ConcurrentUpdateError(f"Game {game.code} was modified concurrently")
+        else:
+            await store.put(GAMES_COLLECTION, game.code, {**game.to_dict(), "version": new_version})
+    except Exception:
+        game_cache.invalidate(game.code)
+        raise
+    game.version = new_version
+    game.mark_persisted()
+    game_cache.put(game)
+
 
+async def mutate_game(
+    store: DocumentStore,
+    code: str,
+    mutate: Callable[[GameSession], GameSession],
+    max_retries: int = MAX_UPDATE_RETRIES,
+) -> GameSession:
+    """Apply a read-modify-write to a game with optimistic concurrency.
 
-def update_game(db: Client, game: GameSession) -> None:
-    """Update a game session in Firestore."""
-    db.collection("games").document(game.code).set(game.to_dict())
+    ``mutate`` receives a private copy of the current session and returns the
+    updated session (it may raise to abort). The write only succeeds if no
+    other writer changed the game in between; on conflict the game is re-read
+    and ``mutate`` re-applied, up to ``max_retries`` times. Writers in the same
+    process are queued per game so they do not conflict with each other, and
+    buffered guesses are written first.
+    """
+    code = code.upper()
+    lock = _game_locks.setdefault(code, asyncio.Lock())
+    async with lock:
+        await _flush_locked(store, code)
+        for attempt in range(max_retries + 1):
+            game = await _get_game_for_update(store, code, fresh=attempt > 0)
+            if not game:
+                raise ValueError(f"Game {code} not found")
+            updated = mutate(game)
+            try:
+                await update_game(store, updated)
+                return updated
+            except ConcurrentUpdateError:
+                if attempt == max_retries:
+                    raise
+                # Jittered backoff so competing workers do not retry in lockstep
+                await asyncio.sleep(random.uniform(0, RETRY_BACKOFF_SECONDS * 2 ** attempt))
+    raise AssertionError("unreachable")
 
 
-def delete_game(db: Client, code: str) -> None:
+@dataclass
+class _PendingWrite:
+    """Guesses applied to a game in memory and not yet written."""
+    game: GameSession  # Latest in-memory state
+    base_version: int  # Stored version the buffered changes apply to
+    lock: asyncio.Lock  # Keeps the game's lock alive while buffered
+    window: float  # Delay before writing, and before retrying a failed write
+    tag: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    mutations: List[Callable[[GameSession], GameSession]] = field(default_factory=list)
+    timer: Optional[asyncio.Task] = None
+
+
+# Buffered writes of this process, by game code
+_pending_writes: Dict[str, _PendingWrite] = {}
+
+
+async def mutate_game_buffered(
+    store: DocumentStore,
+    code: str,
+    mutate: Callable[[GameSession], GameSession],
+    window_seconds: float = GUESS_WRITE_BEHIND_SECONDS,
+) -> GameSession:
+    """Apply a mutation in memory now and write it with others shortly after.
+
+    For bursts of guesses on one game: instead of one write per guess, the
+    state changes of every guess within ``window_seconds`` are written
+    together, as a single document update. The returned session is the
+    post-mutation state and is what this process serves until the write.
+    Changing round or status is written immediately, as is anything buffered
+    before another ``mutate_game`` or on ``flush_pending_writes``. If the game
+    changed in storage meanwhile, the buffered mutations are re-applied to the
+    stored state (those no longer applicable are dropped), so a replay can
+    take back points or strikes already reported to players. A write that
+    still fails is kept buffered, on top of the latest stored state, and
+    retried after another window.
+
+    Until written, the state lives in this worker only. With a window of 0
+    this is ``mutate_game``.
+    """
+    if window_seconds <= 0:
+        return await mutate_game(store, code, mutate)
+
+    code = code.upper()
+    lock = _game_locks.setdefault(code, asyncio.Lock())
+    async with lock:
+        pending = _pending_writes.get(code)
+        if pending is None:
+            game = await _get_game_for_update(store, code)
+            if not game:
+                raise ValueError(f"Game {code} not found")
+            pending = _PendingWrite(game=game, base_version=game.version, lock=lock, window=window_seconds)
+
+        previous = pending.game
+        updated = mutate(previous.model_copy())
+        if updated._tracked_values() == previous._tracked_values():
+            return previous
+        updated.version = previous.version + 1
+        updated.mark_unsaved(pending.tag)
+        pending.game = updated
+        pending.mutations.append(mutate)
+        game_cache.put(updated)
+
+        if code not in _pending_writes:
+            _pending_writes[code] = pending
+            pending.timer = asyncio.create_task(_flush_later(store, code, pending, window_seconds))
+        if updated.current_index != previous.current_index or updated.status != previous.status:
+            await _flush_locked(store, code)
+        return updated
+
+
+async def _flush_later(store: DocumentStore, code: str, pending: _PendingWrite, delay: float) -> None:
+    await asyncio.sleep(delay)
+    async with pending.lock:
+        if _pending_writes.get(code) is not pending:
+            return
+        pending.timer = None
+        try:
+            await _flush_locked(store, code)
+        except Exception:
+            logger.exception("Buffered write of game %s failed", code)
+
+
+async def _flush_locked(store: DocumentStore, code: str, max_retries: int = MAX_UPDATE_RETRIES) -> None:
+    """Write a game's buffered changes; the caller holds the game's lock."""
+    pending = _pending_writes.pop(code, None)
+    if pending is None:
+        return
+    if pending.timer is not None:
+        pending.timer.cancel()
+
+    game, base_version = pending.game, pending.base_version
+    try:
+        for attempt in range(max_retries + 1):
+            try:
+                await update_game(store, game, base_version=base_version)
+                return
+            except ConcurrentUpdateError:
+                if attempt == max_retries:
+                    raise
+            await asyncio.sleep(random.uniform(0, RETRY_BACKOFF_SECONDS * 2 ** attempt))
+            fresh = await _get_game_for_update(store, code, fresh=True)
+            if fresh is None:
+                raise ValueError(f"Game {code} not found")
+            base_version = fresh.version
+            replayed = fresh
+            for mutate in pending.mutations:
+                try:
+                    replayed = mutate(replayed.model_copy())
+                except Exception:
+                    continue  # e.g. the round moved on; this guess no longer applies
+            # Never reuse a version number served for a different state
+            replayed.version = max(fresh.version, game.version) + 1
+            replayed.mark_unsaved(pending.tag)
+            game = replayed
+    except ValueError:
+        game_cache.invalidate(code)
+        raise  # the game is gone, and its buffered guesses with it
+    except Exception:
+        # Guesses were already reported as accepted: keep them and try again later
+        pending.game, pending.base_version = game, base_version
+        _pending_writes[code] = pending
+        pending.timer = asyncio.create_task(_flush_later(store, code, pending, pending.window))
+        game_cache.invalidate(code)
+        raise
+
+
+async def flush_game_writes(store: DocumentStore, code: str) -> None:
+    """Write a game's buffered changes now, if it has any."""
+    code = code.upper()
+    pending = _pending_writes.get(code)
+    if pending is not None:
+        async with pending.lock:
+            await _flush_locked(store, code)
+
+
+async def flush_pending_writes(store: DocumentStore) -> None:
+    """Write every buffered game now (e.g. on shutdown)."""
+    for code, pending in list(_pending_writes.items()):
+        async with pending.lock:
+            try:
+                await _flush_locked(store, code)
+            except Exception:
+                logger.exception("Buffered write of game %s failed", code)
+
+
+async def delete_game(store: DocumentStore, code: str) -> None:
     """Delete a game session."""
-    db.collection("games").document(code.upper()).delete()
+    await store.delete(GAMES_COLLECTION, code.upper())
+    game_cache.unpin(code.upper())
+    game_cache.invalidate(code.upper())
 
 
-def add_question_to_game(db: Client, code: str, question: Question) -> GameSession:
+async def add_question_to_game(store: DocumentStore, code: str, question: Question) -> GameSession:
     """Add a question to a game."""
-    game = get_game(db, code)
-    if not game:
-        raise ValueError(f"Game {code} not found")
-    
-    # Generate question ID
-    question.id = len(game.questions) + 1
-    game.questions.append(question)
-    update_game(db, game)
-    return game
+    return await add_questions_to_game(store, code, [question])
+
+
+async def add_questions_to_game(
+    store: DocumentStore, code: str, questions: List[Question]
+) -> GameSession:
+    """Append questions to a game in a single write.
+
+    Questions are numbered after the game's existing ones. When a game without
+    questions receives an already-numbered shared list (a question pack), the
+    list itself is attached, so every game using the pack shares it.
+    """
+    def add(game: GameSession) -> GameSession:
+        if game.status != "waiting":
+            raise ValueError("Cannot add questions after game started")
+        start = len(game.questions) + 1
+        numbered = [
+            q if q.id == i else q.model_copy(update={"id": i})
+            for i, q in enumerate(questions, start=start)
+        ]
+        if not game.questions and all(a is b for a, b in zip(numbered, questions)):
+            game.questions = questions
+        else:
+            game.questions = [*game.questions, *numbered]
+        return game
 
+    return await mutate_game(store, code, add)
 
-def start_game(db: Client, code: str, host_id: str) -> GameSession:
+
+async def start_game(store: DocumentStore, code: str, host_id: str) -> GameSession:
     """Start a game (transition from waiting to playing)."""
-    game = get_game(db, code)
-    if not game:
-        raise ValueError(f"Game {code} not found")
-    if game.host_id != host_id:
-        raise PermissionError("Only the host can start the game")
-    if not game.questions:
-        raise ValueError("Cannot start game with no questions")
-    
-    game.status = "playing"
-    game.current_index = 0
-    game.revealed_answers = []
-    game.score = 0
-    game.strikes = 0
-    update_game(db, game)
-    return game
+    def start(game: GameSession) -> GameSession:
+        if game.host_id != host_id:
+            raise PermissionError("Only the host can start the game")
+        if not game.questions:
+            raise ValueError("Cannot start game with no questions")
+
+        game.status = "playing"
+        game.current_index = 0
+        game.revealed_mask = 0
+        game.score = 0
+        game.strikes = 0
+        return game
+
+    return await mutate_game(store, code, start)
 
 
-def advance_question(db: Client, code: str, host_id: Optional[str] = None) -> GameSession:
+async def advance_question(store: DocumentStore, code: str, host_id: Optional[str] = None) -> GameSession:
     """Advance to the next question."""
-    game = get_game(db, code)
-    if not game:
-        raise ValueError(f"Game {code} not found")
-    
-    # In host mode, only host can advance
-    if game.mode == GameMode.HOST_CONTROLLED and host_id != game.host_id:
-        raise PermissionError("Only the host can advance questions")
-    
-    game.current_index += 1
-    game.revealed_answers = []
-    game.strikes = 0
-    
-    if game.current_index >= len(game.questions):
-        game.status = "completed"
-    
-    update_game(db, game)
-    return game
+    def advance(game: GameSession) -> GameSession:
+        # In host mode, only host can advance
+        if game.mode == GameMode.HOST_CONTROLLED and host_id != game.host_id:
+            raise PermissionError("Only the host can advance questions")
 
+        game.current_index += 1
+        game.revealed_mask = 0
+        game.strikes = 0
 
-def cleanup_expired_games(db: Client) -> int:
-    """Delete expired games. Returns count of deleted games."""
-    now = datetime.now(timezone.utc)
-    expired_games = db.collection("games").where("expires_at", "<", now).stream()
-    
-    count = 0
-    for doc in expired_games:
-        doc.reference.delete()
-        count += 1
-    
-    return count
+        if game.current_index >= len(game.questions):
+            game.status = "completed"
+        return game
+
+    return await mutate_game(store, code, advance)
@@ -0,0 +1,123 @@
+"""Live game update fan-out for streaming clients (Server-Sent Events).
+
+Each worker keeps one in-process subscriber list per game code. Writes made by
+this worker are published directly; writes made by other gunicorn workers (or
+other instances) arrive through a single store watch per game (a Firestore
+snapshot listener in production), which is opened when the first local
+subscriber connects and closed when the last one leaves. Sessions arriving
+through a watch also refresh the process game cache, so polls for a watched
+game are served without storage reads. Read traffic therefore scales with
+state changes, not with the number of connected screens.
+
+A watched change can arrive after this worker already published a newer
+state (the listener echoes our own writes), so subscribers only ever receive
+states newer than the last one published for the game.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import event_log
+from game_cache import game_cache
+from game_service import GAMES_COLLECTION, decode_game
+from models import GameSession
+from storage import DocumentStore
+
+logger = logging.getLogger(__name__)
+
+
+class GameUpdateBroker:
+    """Fans out game session updates to local subscribers, keyed by game code."""
+
+    def __init__(self, store_factory: Callable[[], DocumentStore]):
+        self._store_factory = store_factory
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._watches: Dict[str, Callable[[], None]] = {}
+        # Last published (creation time, version) per subscribed game
+        self._published: Dict[str, Tuple[float, int]] = {}
+
+    def subscribe(self, code: str) -> asyncio.Queue:
+        """Register a subscriber for a game and return its update queue.
+
+        The queue only ever holds the latest session: a slow consumer skips
+        intermediate states instead of building up a backlog.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        subscribers = self._subscribers.setdefault(code, set())
+        subscribers.add(queue)
+        if code not in self._watches:
+            self._start_watch(code)
+        return queue
+
+    def unsubscribe(self, code: str, queue: asyncio.Queue) -> None:
+        """Remove a subscriber, closing the game's listener if it was the last."""
+        subscribers = self._subscribers.get(code)
+        if not subscribers:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[code]
+            self._published.pop(code, None)
+            self._stop_watch(code)
+
+    def _is_newer(self, code: str, created_at: datetime, version: int) -> bool:
+        """Whether a state is newer than the last one published for ``code``.
+
+        The creation time orders states of a recycled code before its version.
+        """
+        last = self._published.get(code)
+        return last is None or (created_at.timestamp(), version) > last
+
+    def publish(self, game: GameSession) -> None:
+        """Push a game session to every local subscriber of its code.
+
+        States not newer than the last published one are dropped.
+        """
+        if not self._is_newer(game.code, game.created_at, game.version):
+            return
+        game_cache.put(game)
+        if game.code not in self._subscribers:
+            return
+        self._published[game.code] = (game.created_at.timestamp(), game.version)
+        for queue in self._subscribers.get(game.code, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(game)
+
+    def subscriber_count(self, code: Optional[str] = None) -> int:
+        """Number of local subscribers, for one game or across all games."""
+        if code is not None:
+            return len(self._subscribers.get(code, ()))
+        return sum(len(s) for s in self._subscribers.values())
+
+    def _start_watch(self, code: str) -> None:
+        """Listen for changes made by other workers to this game's document."""
+        loop = asyncio.get_running_loop()
+
+        store = self._store_factory()
+
+        async def publish_remote(data: dict) -> None:
+            # Skip decoding echoes of states this worker already published
+            if not self._is_newer(code, data["created_at"], event_log.head_version(data)):
+                return
+            try:
+                self.publish(await decode_game(store, data))
+            except Exception:
+                logger.exception("Could not decode update for game %s", code)
+
+        def on_change(data: Optional[dict]) -> None:
+            # May run on a listener thread; hand off to the event loop.
+            if data is not None:
+                asyncio.run_coroutine_threadsafe(publish_remote(data), loop)
+
+        try:
+            self._watches[code] = store.watch(GAMES_COLLECTION, code, on_change)
+        except Exception:
+            # Streaming still works for writes made by this worker.
+            logger.exception("Could not start snapshot listener for game %s", code)
+
+    def _stop_watch(self, code: str) -> None:
+        unsubscribe = self._watches.pop(code, None)
+        if unsubscribe is not None:
+            unsubscribe()
@@ -1,34 +1,104 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import hashlib
+import hmac
 import os
+import secrets
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi import FastAPI, HTTPException, Header, Depends, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, Annotated
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncIterator, List, Optional, Annotated
 import uuid
 
-from firebase_config import get_db
 from game_service import (
+    CODE_MAX_LENGTH,
+    ConcurrentUpdateError,
     create_game,
+    flush_pending_writes,
     get_game,
-    update_game,
-    add_question_to_game,
+    get_games,
+    is_valid_code,
+    mutate_game,
+    mutate_game_buffered,
+    add_questions_to_game,
     start_game,
     advance_question,
 )
 from models import (
     Answer,
+    AttachPackRequest,
+    BatchGuessMode,
+    BatchGuessRequest,
+    BatchGuessResponse,
+    BulkQuestionsCreate,
+    CleanupReport,
     CreateGameRequest,
     GameMode,
     GameSession,
     GameStatus,
+    GameStatusBatch,
     Guess,
     GuessResponse,
+    MAX_ANSWERS_PER_QUESTION,
     Question,
     QuestionCreate,
+    QuestionPack,
+    QuestionPackCreate,
 )
-from game_logic import GameStateMachine
-
-
-app = FastAPI(title="Family Feud API", version="2.0.0")
+from cleanup import CLEANUP_MAX_SECONDS, run_cleanup
+import event_log
+import metrics
+from affinity import AffinityMiddleware, membership
+from analytics import guess_analytics
+from game_cache import game_cache
+from game_logic import GameStateMachine, match_cache, tally_matches
+from live_updates import GameUpdateBroker
+from question_bank import create_pack, get_pack, load_question_set, pack_cache, question_set_cache
+from status_payload import (
+    ORJSONResponse,
+    answer_payload,
+    game_status_etag,
+    game_status_json,
+    game_status_payload,
+    game_statuses_etag,
+    game_statuses_json,
+    status_cache,
+)
+from startup import STARTUP_WARMUP, startup_report, warm_up
+from storage import get_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Warm up in the background so health checks are answered right away.
+
+    In affinity mode the worker heartbeats while running, and on shutdown
+    hands its games off and closes its connections to peers. Buffered guesses and queued guess analytics are written
+    before the worker exits.
+    """
+    startup_report.record("import", _IMPORT_STARTED)
+    warmup = asyncio.create_task(warm_up()) if STARTUP_WARMUP else None
+    heartbeat = asyncio.create_task(membership.run(get_store())) if membership.enabled else None
+    analytics = asyncio.create_task(guess_analytics.run(get_store())) if guess_analytics.enabled else None
+    yield
+    for task in (warmup, heartbeat, analytics):
+        if task is not None:
+            task.cancel()
+    if membership.enabled:
+        await membership.leave(get_store())
+        await membership.aclose()
+    await flush_pending_writes(get_store())
+    await event_log.flush_heads()
+    if guess_analytics.enabled:
+        await guess_analytics.flush(get_store())
+
+
+app = FastAPI(title="Family Feud API", version="2.0.0", lifespan=lifespan)
 
 # CORS configuration - restrict to known domains
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "").split(",") if os.getenv("ALLOWED_ORIGINS") else [
@@ -45,22 +115,37 @@ app.add_middleware(
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "X-Host-Id", "Authorization"],
+    allow_headers=["Content-Type", "X-Host-Id", "Authorization", "If-None-Match", "X-Debug-Timing"],
+    expose_headers=["ETag", "Server-Timing"],
 )
+app.add_middleware(AffinityMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Configuration - can be overridden via environment variables
 FUZZ_THRESHOLD = int(os.getenv("FUZZ_THRESHOLD", "80"))
 MAX_STRIKES = int(os.getenv("MAX_STRIKES", "3"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+STREAM_TOKEN_SECONDS = int(os.getenv("STREAM_TOKEN_SECONDS", "60"))
+MAX_STATUS_BATCH = int(os.getenv("MAX_STATUS_BATCH", "100"))
 
 # Game state machine for processing guesses (pure functional core)
 game_state_machine = GameStateMachine(max_strikes=MAX_STRIKES, fuzz_threshold=FUZZ_THRESHOLD)
 
+# Pushes game changes to streaming clients (TV displays, players, hosts)
+update_broker = GameUpdateBroker(get_store)
+
+
+@app.exception_handler(ConcurrentUpdateError)
+async def concurrent_update_handler(request: Request, exc: ConcurrentUpdateError) -> JSONResponse:
+    """Too many simultaneous writers on one game; the client may retry."""
+    return JSONResponse(status_code=409, content={"detail": "Game is busy, please try again"})
+
 
 # FastAPI dependency for game lookup - eliminates repeated get_game() + 404 pattern
 async def get_game_or_404(code: str) -> GameSession:
     """Dependency to fetch a game by code, raising 404 if not found."""
-    db = get_db()
-    game = get_game(db, code.upper())
+    store = get_store()
+    game = await get_game(store, code.upper())
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
     return game
@@ -70,37 +155,19 @@ async def get_game_or_404(code: str) -> GameSession:
 GameDep = Annotated[GameSession, Depends(get_game_or_404)]
 
 
-def _build_game_status(game: GameSession, is_host: bool = False) -> GameStatus:
-    """Build public game status from session."""
-    question = game.current_question()
-    revealed_answers = game.get_revealed_answer_objects()
-    
-    # For players, hide the full answers list to not reveal count
-    # Create a sanitized question copy without exposing all answers
-    sanitized_question = None
-    total_answers = 0
-    if question:
-        sanitized_question = Question(
-            id=question.id,
-            text=question.text,
-            answers=revealed_answers if not is_host else question.answers
-        )
-        total_answers = len(question.answers)
-    
-    return GameStatus(
-        code=game.code,
-        mode=game.mode,
-        status=game.status,
-        question=sanitized_question,
-        revealed_answers=revealed_answers,
-        score=game.score,
-        strikes=game.strikes,
-        max_strikes=game.max_strikes,
-        current_index=game.current_index if game.status == "playing" else None,
-        total_questions=len(game.questions),
-        total_answers=total_answers,
-        is_host=is_host,
-    )
+def _status_response(game: GameSession, is_host: bool, headers: Optional[dict] = None) -> Response:
+    """Game status response from the pre-serialized status cache."""
+    return Response(content=game_status_json(game, is_host), media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (weak comparison) against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
 
 
 @app.get("/")
@@ -108,33 +175,138 @@ async def read_root() -> dict:
     return {"app": "family-feud", "version": "2.0.0"}
 
 
+@app.get("/healthz", include_in_schema=False)
+async def healthz() -> Response:
+    """Health check; also reports startup timings and whether warm-up is done."""
+    return ORJSONResponse(startup_report.as_dict())
+
+
 @app.post("/api/games")
 async def create_new_game(
     request: CreateGameRequest,
     x_host_id: Optional[str] = Header(None)
 ) -> dict:
     """Create a new game and return the game code with host_id."""
-    db = get_db()
+    store = get_store()
     # Use provided host ID or generate a new one
     host_id = x_host_id or str(uuid.uuid4())
-    game = create_game(db, request.mode, host_id)
+    game = await create_game(store, request.mode, host_id)
     
     # Return status with host_id for the host to store
-    status = _build_game_status(game, is_host=True)
-    return {
-        **status.model_dump(),
+    return ORJSONResponse({
+        **game_status_payload(game, is_host=True),
         "host_id": host_id  # Include host_id for frontend to store
-    }
+    })
 
 
-@app.get("/api/games/{code}", response_model=GameStatus)
+@app.get(
+    "/api/games/{code}",
+    response_model=GameStatus,
+    responses={304: {"description": "Game unchanged since the given ETag"}},
+)
 async def get_game_status(
     game: GameDep,
-    x_host_id: Optional[str] = Header(None)
-) -> GameStatus:
-    """Get the current game status."""
+    x_host_id: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
+    """Get the current game status.
+
+    Supports conditional requests: when ``If-None-Match`` carries the current
+    ETag, a bodiless 304 is returned without rebuilding the status.
+    """
     is_host = x_host_id == game.host_id
-    return _build_game_status(game, is_host=is_host)
+    headers = {
+        "ETag": game_status_etag(game, is_host),
+        # Let browsers cache the body but revalidate on every poll
+        "Cache-Control": "no-cache",
+        "Vary": "X-Host-Id",
+    }
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    return _status_response(game, is_host, headers)
+
+
+@app.get(
+    "/api/games",
+    response_model=GameStatusBatch,
+    responses={304: {"description": "No game changed since the given ETag"}},
+)
+async def get_game_statuses(
+    codes: str = Query(
+        ..., description="Comma-separated game codes", max_length=MAX_STATUS_BATCH * (CODE_MAX_LENGTH + 1)
+    ),
+    x_host_id: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+) -> Response:
+    """Get the status of several games at once (e.g. an operator dashboard).
+
+    Games are fetched with a single multi-get. Each status is the host view
+    for games hosted by ``X-Host-Id``. Codes that cannot exist are reported
+    as missing without a lookup. The ETag covers every requested game.
+    """
+    listed = [code.strip().upper() for code in codes.split(",") if code.strip()]
+    if not listed:
+        raise HTTPException(status_code=400, detail="At least one game code required")
+    if len(listed) > MAX_STATUS_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_STATUS_BATCH} games per request")
+    requested = list(dict.fromkeys(listed))
+
+    games = await get_games(get_store(), [code for code in requested if is_valid_code(code)])
+    statuses = [(game, x_host_id == game.host_id) for game in games.values() if game is not None]
+    missing = [code for code in requested if games.get(code) is None]
+    headers = {
+        "ETag": game_statuses_etag(statuses, missing),
+        "Cache-Control": "no-cache",
+        "Vary": "X-Host-Id",
+    }
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=game_statuses_json(statuses, missing), media_type="application/json", headers=headers)
+
+
+def _clean_question(question: QuestionCreate) -> Question:
+    """Validate and normalize a submitted question; raises ValueError."""
+    answers = [
+        Answer(
+            text=a.text.strip(),
+            weight=a.weight,
+            aliases=[alias.strip() for alias in a.aliases if alias.strip()],
+        )
+        for a in question.answers if a.text.strip()
+    ]
+    if not answers:
+        raise ValueError("At least one answer required")
+    if len(answers) > MAX_ANSWERS_PER_QUESTION:
+        raise ValueError(f"At most {MAX_ANSWERS_PER_QUESTION} answers allowed")
+    if not question.text.strip():
+        raise ValueError("Question text required")
+    return Question(text=question.text.strip(), answers=answers)
+
+
+def _clean_questions(questions: List[QuestionCreate]) -> List[Question]:
+    """Validate a batch of questions, reporting every invalid one at once."""
+    cleaned, errors = [], []
+    for i, question in enumerate(questions, start=1):
+        try:
+            cleaned.append(_clean_question(question))
+        except ValueError as e:
+            errors.append(f"Question {i}: {e}")
+    if errors:
+        raise HTTPException(status_code=400, detail="; ".join(errors))
+    return cleaned
+
+
+async def _add_questions(game: GameSession, questions: List[Question], x_host_id: Optional[str]) -> Response:
+    store = get_store()
+    try:
+        game = await add_questions_to_game(store, game.code, questions)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    update_broker.publish(game)
+
+    is_host = x_host_id == game.host_id
+    return _status_response(game, is_host)
 
 
 @app.post("/api/games/{code}/questions", response_model=GameStatus)
@@ -142,43 +314,85 @@ async def add_question(
     game: GameDep,
     question: QuestionCreate,
     x_host_id: Optional[str] = Header(None)
-) -> GameStatus:
+) -> Response:
     """Add a question to the game."""
     # Only host can add questions in waiting state
     if game.status != "waiting":
         raise HTTPException(status_code=400, detail="Cannot add questions after game started")
 
-    # Validate question
-    answers = [Answer(text=a.text.strip(), weight=a.weight) for a in question.answers if a.text.strip()]
-    if not answers:
-        raise HTTPException(status_code=400, detail="At least one answer required")
-    if not question.text.strip():
-        raise HTTPException(status_code=400, detail="Question text required")
+    try:
+        new_question = _clean_question(question)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    new_question = Question(
-        id=len(game.questions) + 1,
-        text=question.text.strip(),
-        answers=answers
-    )
-    game.questions.append(new_question)
+    return await _add_questions(game, [new_question], x_host_id)
 
-    db = get_db()
-    update_game(db, game)
 
-    is_host = x_host_id == game.host_id
-    return _build_game_status(game, is_host=is_host)
+@app.post("/api/games/{code}/questions/bulk", response_model=GameStatus)
+async def add_questions_bulk(
+    game: GameDep,
+    request: BulkQuestionsCreate,
+    x_host_id: Optional[str] = Header(None)
+) -> Response:
+    """Add many questions to the game in one request and one write.
+
+    All questions are validated before anything is stored; if any is invalid
+    none are added and every problem is listed in the error.
+    """
+    if game.status != "waiting":
+        raise HTTPException(status_code=400, detail="Cannot add questions after game started")
+
+    return await _add_questions(game, _clean_questions(request.questions), x_host_id)
+
+
+@app.post("/api/games/{code}/pack", response_model=GameStatus)
+async def attach_pack(
+    game: GameDep,
+    request: AttachPackRequest,
+    x_host_id: Optional[str] = Header(None)
+) -> Response:
+    """Add the questions of a stored question pack to the game."""
+    if game.status != "waiting":
+        raise HTTPException(status_code=400, detail="Cannot add questions after game started")
+
+    store = get_store()
+    pack = await get_pack(store, request.pack_id)
+    if pack is None:
+        raise HTTPException(status_code=404, detail="Question pack not found")
+
+    questions = await load_question_set(store, pack.question_set_id)
+    return await _add_questions(game, questions, x_host_id)
+
+
+@app.post("/api/packs", response_model=QuestionPack)
+async def create_pack_endpoint(request: QuestionPackCreate) -> QuestionPack:
+    """Store a reusable, named question pack."""
+    if not request.name.strip():
+        raise HTTPException(status_code=400, detail="Pack name required")
+    questions = _clean_questions(request.questions)
+    return await create_pack(get_store(), request.name.strip(), questions)
+
+
+@app.get("/api/packs/{pack_id}", response_model=QuestionPack)
+async def get_pack_endpoint(pack_id: str) -> QuestionPack:
+    """Get a question pack's details."""
+    pack = await get_pack(get_store(), pack_id)
+    if pack is None:
+        raise HTTPException(status_code=404, detail="Question pack not found")
+    return pack
 
 
 @app.post("/api/games/{code}/start", response_model=GameStatus)
 async def start_game_endpoint(
     code: str,
     x_host_id: str = Header(...)
-) -> GameStatus:
+) -> Response:
     """Start the game (host only)."""
-    db = get_db()
+    store = get_store()
     try:
-        game = start_game(db, code.upper(), x_host_id)
-        return _build_game_status(game, is_host=True)
+        game = await start_game(store, code.upper(), x_host_id)
+        update_broker.publish(game)
+        return _status_response(game, is_host=True)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except PermissionError as e:
@@ -189,13 +403,14 @@ async def start_game_endpoint(
 async def next_question(
     code: str,
     x_host_id: Optional[str] = Header(None)
-) -> GameStatus:
+) -> Response:
     """Advance to the next question."""
-    db = get_db()
+    store = get_store()
     try:
-        game = advance_question(db, code.upper(), x_host_id)
+        game = await advance_question(store, code.upper(), x_host_id)
+        update_broker.publish(game)
         is_host = x_host_id == game.host_id
-        return _build_game_status(game, is_host=is_host)
+        return _status_response(game, is_host)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except PermissionError as e:
@@ -207,7 +422,7 @@ async def make_guess(
     game: GameDep,
     player_guess: Guess,
     x_host_id: Optional[str] = Header(None)
-) -> GuessResponse:
+) -> Response:
     """Submit a guess for the current question."""
     if game.status != "playing":
         raise HTTPException(status_code=400, detail="Game is not in progress")
@@ -219,25 +434,271 @@ async def make_guess(
     if not guess_text:
         raise HTTPException(status_code=400, detail="Guess cannot be empty")
 
-    # Process guess using pure game logic (Functional Core)
-    result, updated_game = game_state_machine.process_guess(game, guess_text)
-
-    # Persist updated state (Imperative Shell)
-    db = get_db()
-    update_game(db, updated_game)
+    result = None
+    question = None
+
+    def apply_guess(current: GameSession) -> GameSession:
+        nonlocal result, question
+        question = current.current_question()
+        # Re-check against the latest state, which may have moved on since the lookup
+        if current.status != "playing" or not question:
+            raise HTTPException(status_code=400, detail="Game is not in progress")
+        # Process guess using pure game logic (Functional Core)
+        result, updated = game_state_machine.process_guess(current, guess_text)
+        return updated
+
+    # Persist updated state with optimistic concurrency (Imperative Shell);
+    # bursts of guesses on one game may be written together (write-behind)
+    store = get_store()
+    updated_game = await mutate_game_buffered(
+        store, game.code, apply_guess, membership.write_behind_seconds(game.code)
+    )
+    update_broker.publish(updated_game)
+    guess_analytics.record(question, guess_text, result.match_index)
 
     is_host = x_host_id == updated_game.host_id
-    return GuessResponse(
-        correct=result.correct,
-        answer=result.matched_answer,
-        message=result.message,
-        strikes=updated_game.strikes,
-        score=updated_game.score,
-        advanced=result.should_advance,
-        status=_build_game_status(updated_game, is_host=is_host),
+    return ORJSONResponse({
+        "correct": result.correct,
+        "answer": answer_payload(result.matched_answer),
+        "message": result.message,
+        "strikes": updated_game.strikes,
+        "score": updated_game.score,
+        "advanced": result.should_advance,
+        "status": game_status_payload(updated_game, is_host=is_host),
+    })
+
+
+def _tally_payload(tally) -> List[dict]:
+    return [
+        {"answer": answer_payload(answer), "count": count, "suggested_weight": weight}
+        for answer, count, weight in tally
+    ]
+
+
+@app.post("/api/games/{code}/guesses", response_model=BatchGuessResponse)
+async def make_guesses(
+    game: GameDep,
+    batch: BatchGuessRequest,
+    x_host_id: Optional[str] = Header(None)
+) -> Response:
+    """Score many audience guesses for the current question in one pass (host only).
+
+    In ``apply`` mode newly matched answers are revealed and scored with a
+    single write; in ``tally`` mode guesses are only counted per answer.
+    """
+    if x_host_id != game.host_id:
+        raise HTTPException(status_code=403, detail="Only the host can submit guess batches")
+    if game.status != "playing" or not game.current_question():
+        raise HTTPException(status_code=400, detail="Game is not in progress")
+
+    if batch.mode == BatchGuessMode.TALLY:
+        question = game.current_question()
+        indices = game_state_machine.matcher.match_question_many(batch.guesses, question)
+        guess_analytics.record_many(question, batch.guesses, indices)
+        tally, misses = tally_matches(question, indices)
+        return ORJSONResponse({
+            "mode": batch.mode.value,
+            "matches": [answer_payload(question.answers[i]) if i is not None else None for i in indices],
+            "revealed": [],
+            "points_earned": 0,
+            "strikes_added": 0,
+            "advanced": False,
+            "tally": _tally_payload(tally),
+            "misses": misses,
+            "status": game_status_payload(game, is_host=True),
+        })
+
+    result = None
+    question = None
+
+    def apply_guesses(current: GameSession) -> GameSession:
+        nonlocal result, question
+        question = current.current_question()
+        if current.status != "playing" or not question:
+            raise HTTPException(status_code=400, detail="Game is not in progress")
+        result, updated = game_state_machine.process_guess_batch(current, batch.guesses)
+        return updated
+
+    store = get_store()
+    updated_game = await mutate_game(store, game.code, apply_guesses)
+    update_broker.publish(updated_game)
+    guess_analytics.record_many(question, batch.guesses, result.match_indices)
+
+    tally, misses = tally_matches(question, result.match_indices)
+    return ORJSONResponse({
+        "mode": batch.mode.value,
+        "matches": [answer_payload(a) for a in result.matches],
+        "revealed": [answer_payload(a) for a in result.revealed],
+        "points_earned": result.points_earned,
+        "strikes_added": result.strikes_added,
+        "advanced": result.should_advance,
+        "tally": _tally_payload(tally),
+        "misses": misses,
+        "status": game_status_payload(updated_game, is_host=True),
+    })
+
+
+def _stream_token(game: GameSession, expires: int) -> str:
+    # Keyed with the host ID: any worker can check it, and it does not reveal the ID
+    message = f"{game.code}|{int(game.created_at.timestamp())}|{expires}".encode()
+    return f"{expires}.{hmac.new(game.host_id.encode(), message, hashlib.sha256).hexdigest()}"
+
+
+def _valid_stream_token(game: GameSession, token: str) -> bool:
+    expires, _, _ = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(token, _stream_token(game, int(expires)))
+
+
+@app.post("/api/games/{code}/events/token")
+async def create_stream_token(game: GameDep, x_host_id: Optional[str] = Header(None)) -> Response:
+    """Short-lived token that opens the host view of the event stream.
+
+    EventSource cannot send ``X-Host-Id``, and the host ID must not appear in
+    URLs (they end up in logs and browser history), so hosts exchange it for
+    a token to pass as the ``token`` query parameter.
+    """
+    if x_host_id != game.host_id:
+        raise HTTPException(status_code=403, detail="Only the host can open the host stream")
+    expires = int(time.time()) + STREAM_TOKEN_SECONDS
+    return ORJSONResponse({"token": _stream_token(game, expires), "expires_in": STREAM_TOKEN_SECONDS})
+
+
+@app.get("/api/games/{code}/events")
+async def stream_game_events(
+    request: Request,
+    game: GameDep,
+    token: Optional[str] = Query(None),
+    x_host_id: Optional[str] = Header(None)
+) -> StreamingResponse:
+    """Stream game status as Server-Sent Events whenever the game changes.
+
+    Hosts authenticate with ``X-Host-Id`` or, from EventSource, with a token
+    from ``POST /api/games/{code}/events/token``. An expired or invalid token
+    is rejected so the client fetches a new one.
+    """
+    if token is not None and not _valid_stream_token(game, token):
+        raise HTTPException(status_code=403, detail="Stream token expired or invalid")
+    is_host = x_host_id == game.host_id or token is not None
+    queue = update_broker.subscribe(game.code)
+
+    async def event_stream() -> AsyncIterator[str]:
+        last_payload = None
+        current = game
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if current is not None:
+                    payload = game_status_json(current, is_host).decode()
+                    if payload != last_payload:
+                        last_payload = payload
+                        yield f"data: {payload}\n\n"
+                try:
+                    current = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    current = None
+                    yield ": keepalive\n\n"
+        finally:
+            update_broker.unsubscribe(game.code, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/games/{code}/history")
+async def get_game_history(game: GameDep, x_host_id: Optional[str] = Header(None)) -> Response:
+    """Every recorded change of a game, oldest first (host only, event log mode)."""
+    if x_host_id != game.host_id:
+        raise HTTPException(status_code=403, detail="Only the host can view the game history")
+    if not event_log.GAME_EVENT_LOG:
+        raise HTTPException(status_code=404, detail="Game history is not recorded")
+    return ORJSONResponse({"code": game.code, "events": await event_log.history(get_store(), game)})
+
+
+@app.get("/api/games/{code}/analytics")
+async def get_game_analytics(
+    game: GameDep,
+    top: int = Query(10, ge=1, le=100),
+    x_host_id: Optional[str] = Header(None)
+) -> Response:
+    """Guess statistics for each question of a game, across every game that asked it (host only)."""
+    if x_host_id != game.host_id:
+        raise HTTPException(status_code=403, detail="Only the host can view guess analytics")
+    if not guess_analytics.enabled:
+        raise HTTPException(status_code=404, detail="Guess analytics are not recorded")
+    questions = await guess_analytics.question_stats(get_store(), game.questions, top)
+    return ORJSONResponse({"code": game.code, "questions": questions})
+
+
+@app.get("/api/packs/{pack_id}/analytics")
+async def get_pack_analytics(pack_id: str, top: int = Query(10, ge=1, le=100)) -> Response:
+    """Guess statistics for each question of a question pack."""
+    if not guess_analytics.enabled:
+        raise HTTPException(status_code=404, detail="Guess analytics are not recorded")
+    store = get_store()
+    pack = await get_pack(store, pack_id)
+    if pack is None:
+        raise HTTPException(status_code=404, detail="Question pack not found")
+    questions = await load_question_set(store, pack.question_set_id)
+    stats = await guess_analytics.question_stats(store, questions, top)
+    return ORJSONResponse({"pack_id": pack.id, "questions": stats})
+
+
+_CACHES = {
+    "game": game_cache,
+    "question_set": question_set_cache,
+    "pack": pack_cache,
+    "status": status_cache,
+    "match": match_cache,
+}
+for _stat, _kind, _help in (
+    ("hits", "counter", "Cache lookups served from the cache."),
+    ("misses", "counter", "Cache lookups not found in the cache."),
+    ("evictions", "counter", "Entries evicted to stay within the size limit."),
+    ("size", "gauge", "Entries currently cached."),
+    ("hit_rate", "gauge", "Share of lookups served from the cache."),
+):
+    metrics.registry.callback(
+        f"feud_cache_{_stat}", _help, _kind, "cache",
+        lambda stat=_stat: {name: cache.stats()[stat] for name, cache in _CACHES.items()},
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(authorization: Optional[str] = Header(None)) -> Response:
+    """Process metrics in the Prometheus text format.
+
+    If ``METRICS_TOKEN`` is set, scrapers must send it as a bearer token.
+    """
+    token = os.getenv("METRICS_TOKEN")
+    if token and not secrets.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=403, detail="Metrics token required")
+    return Response(content=metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/api/admin/cleanup", response_model=CleanupReport)
+async def cleanup_endpoint(
+    max_seconds: float = Query(CLEANUP_MAX_SECONDS, gt=0, le=540),
+    x_admin_token: Optional[str] = Header(None),
+) -> CleanupReport:
+    """Delete expired games and question sets (for a scheduler).
+
+    Requires the ``ADMIN_TOKEN`` environment variable to be set and sent in
+    ``X-Admin-Token``. Runs for at most ``max_seconds``; call again while the
+    report says it is not ``complete``.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or not x_admin_token or not secrets.compare_digest(admin_token, x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return await run_cleanup(get_store(), max_seconds=max_seconds)
+
+
 # Keep the old endpoints for backwards compatibility during transition
 @app.get("/api/game/state", response_model=dict)
 async def legacy_game_state() -> dict:
@@ -0,0 +1,248 @@
+"""In-process metrics: counters, histograms and per-request timing breakdowns.
+
+Metrics are kept per worker process and exposed in the Prometheus text format
+on ``GET /metrics``. ``MetricsMiddleware`` times every request by route
+template and tracks storage traffic per request; code paths worth sizing wrap
+themselves in ``timed(phase)``. Clients sending ``X-Debug-Timing: 1`` get the
+current request's breakdown back in a ``Server-Timing`` header.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+BYTES_BUCKETS = (0, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+TIMING_HEADER = b"x-debug-timing"
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: [count per bucket..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = entry
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        total[0] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {total[0]}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+class CallbackMetric:
+    """Metric whose values are read from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, kind: str, label: str, collect: Callable[[], Dict[str, float]]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label = label
+        self.collect = collect
+
+    def samples(self) -> Iterator[str]:
+        for label_value, value in self.collect().items():
+            yield f"{self.name}{_format_labels((self.label,), (label_value,))} {value}"
+
+
+class Registry:
+    """The metrics of this process."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), **kwargs) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, labels, **kwargs))
+
+    def callback(
+        self, name: str, help: str, kind: str, label: str, collect: Callable[[], Dict[str, float]]
+    ) -> None:
+        """Register a gauge or counter read from ``collect`` (label value -> value)."""
+        self._metrics[name] = CallbackMetric(name, help, kind, label, collect)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_seconds = registry.histogram(
+    "feud_request_duration_seconds", "Time until the response starts, by route.", ("method", "route", "status")
+)
+request_store_reads = registry.histogram(
+    "feud_request_store_reads", "Storage reads per request.", ("route",), buckets=COUNT_BUCKETS
+)
+request_store_writes = registry.histogram(
+    "feud_request_store_writes", "Storage writes per request.", ("route",), buckets=COUNT_BUCKETS
+)
+request_store_bytes = registry.histogram(
+    "feud_request_store_bytes", "Storage bytes read and written per request.", ("route",), buckets=BYTES_BUCKETS
+)
+store_operations = registry.counter(
+    "feud_store_operations_total", "Storage operations.", ("operation", "collection")
+)
+store_bytes = registry.counter(
+    "feud_store_bytes_total", "Estimated storage bytes transferred.", ("direction", "collection")
+)
+phase_seconds = registry.histogram(
+    "feud_phase_duration_seconds", "Time spent in instrumented code paths.", ("phase",)
+)
+
+
+@dataclass
+class RequestTimings:
+    """Breakdown of one request: time per phase and storage traffic."""
+    phases: Dict[str, List[float]] = field(default_factory=dict)  # phase -> [seconds, calls]
+    reads: int = 0
+    writes: int = 0
+    bytes: int = 0
+
+    def add(self, phase: str, seconds: float) -> None:
+        entry = self.phases.setdefault(phase, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def server_timing(self, total: float) -> str:
+        """Value for a ``Server-Timing`` response header."""
+        parts = [f"total;dur={total * 1000:.2f}"]
+        for phase, (seconds, calls) in self.phases.items():
+            parts.append(f'{phase};dur={seconds * 1000:.2f};desc="{calls} calls"')
+        parts.append(f'io;desc="{self.reads} reads, {self.writes} writes, {self.bytes} bytes"')
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Time a block into the phase histogram and the request breakdown."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        phase_seconds.observe(elapsed, phase)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(phase, elapsed)
+
+
+def record_store_call(operation: str, collection: str, write: bool, nbytes: int) -> None:
+    """Count a storage operation and its estimated payload size."""
+    store_operations.inc(1, operation, collection)
+    store_bytes.inc(nbytes, "write" if write else "read", collection)
+    timings = _current.get()
+    if timings is not None:
+        if write:
+            timings.writes += 1
+        else:
+            timings.reads += 1
+        timings.bytes += nbytes
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and storage traffic.
+
+    Latency is measured until the response starts, so long-lived streams
+    (Server-Sent Events) count their setup time only.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        timings = RequestTimings()
+        token = _current.set(timings)
+        want_timing = any(name == TIMING_HEADER and value != b"0" for name, value in scope["headers"])
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - start
+                route = scope.get("route")
+                path = getattr(route, "path", "unmatched")
+                request_seconds.observe(elapsed, scope["method"], path, str(message["status"]))
+                request_store_reads.observe(timings.reads, path)
+                request_store_writes.observe(timings.writes, path)
+                request_store_bytes.observe(timings.bytes, path)
+                if want_timing:
+                    header = timings.server_timing(elapsed).encode("latin-1")
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current.reset(token)
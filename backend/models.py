@@ -1,17 +1,25 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
+if TYPE_CHECKING:
+    from game_logic import AnswerIndex
+
 
 class GameMode(str, Enum):
     HOST_CONTROLLED = "host"    # Host advances questions manually
     AUTO_ADVANCE = "auto"       # Auto-advance when all revealed or 3 strikes
 
 
+# Revealed answers are stored as bits of a Firestore int64
+MAX_ANSWERS_PER_QUESTION = 63
+
+
 class Answer(BaseModel):
     text: str
     weight: Optional[int] = Field(default=None, ge=0)
+    aliases: List[str] = []  # Alternative spellings/synonyms that also match
 
 
 class Question(BaseModel):
@@ -19,60 +27,188 @@ class Question(BaseModel):
     text: str
     answers: List[Answer]
 
+    # Compiled answer matcher, built on first use and reused afterwards
+    _answer_index: Optional["AnswerIndex"] = PrivateAttr(default=None)
+
+    def answer_index(self) -> "AnswerIndex":
+        """Get the precompiled AnswerIndex for this question's answers."""
+        index = self._answer_index
+        if index is None or index.answers is not self.answers:
+            from game_logic import AnswerIndex
+            index = self._answer_index = AnswerIndex(self.answers)
+        return index
+
 
 class QuestionCreate(BaseModel):
     text: str
     answers: List[Answer]
 
 
+class BulkQuestionsCreate(BaseModel):
+    questions: List[QuestionCreate] = Field(min_length=1, max_length=1000)
+
+
+class QuestionPackCreate(BaseModel):
+    name: str
+    questions: List[QuestionCreate] = Field(min_length=1, max_length=1000)
+
+
+class QuestionPack(BaseModel):
+    """A named, reusable question set."""
+    id: str
+    name: str
+    question_set_id: str
+    question_count: int
+    created_at: datetime
+
+
+class AttachPackRequest(BaseModel):
+    pack_id: str
+
+
 class GameSession(BaseModel):
     code: str
     mode: GameMode
     host_id: str
-    questions: List[Question] = []
+    questions: List[Question] = []  # Inline while waiting, then a shared question set
+    question_set_id: Optional[str] = None
     current_index: int = -1
     score: int = 0
     strikes: int = 0
     max_strikes: int = 3
     status: str = "waiting"  # waiting, playing, completed
-    revealed_answers: List[str] = []  # Store answer texts that are revealed
+    revealed_mask: int = 0  # Bit i is set once answer i of the current question is revealed
     created_at: datetime
     expires_at: datetime
+    version: int = 0  # Incremented on every write
+
+    # Field values as last loaded from / written to storage (dirty tracking)
+    _persisted: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    # Set on states applied in this process but not yet written (write-behind)
+    _unsaved_tag: Optional[str] = PrivateAttr(default=None)
     
     def to_dict(self) -> dict:
-        """Convert to Firestore-compatible dictionary."""
+        """Convert to Firestore-compatible dictionary.
+
+        Once the game has a ``question_set_id`` its questions live in that
+        shared set, so the game document only holds live state. Until then
+        (while the host is still adding questions) they are stored inline.
+        """
         return {
             "code": self.code,
             "mode": self.mode.value,
             "host_id": self.host_id,
-            "questions": [q.model_dump() for q in self.questions],
+            "questions": self._serialize_field("questions"),
+            "question_set_id": self.question_set_id,
             "current_index": self.current_index,
             "score": self.score,
             "strikes": self.strikes,
             "max_strikes": self.max_strikes,
             "status": self.status,
-            "revealed_answers": self.revealed_answers,
+            "revealed_mask": self.revealed_mask,
             "created_at": self.created_at,
             "expires_at": self.expires_at,
+            "version": self.version,
         }
     
     @classmethod
-    def from_dict(cls, data: dict) -> "GameSession":
-        """Create from Firestore document."""
-        return cls(
+    def from_dict(cls, data: dict, questions: Optional[List[Question]] = None) -> "GameSession":
+        """Create from Firestore document.
+
+        ``questions`` is the loaded question set; documents of games not
+        started yet, or written before question sets existed, carry their
+        questions inline instead. Older
+        documents list revealed answers by text rather than as a bitmask.
+        """
+        if questions is None:
+            questions = [Question(**q) for q in data.get("questions", [])]
+        legacy_reveals = "revealed_mask" not in data
+        game = cls(
             code=data["code"],
             mode=GameMode(data["mode"]),
             host_id=data["host_id"],
-            questions=[Question(**q) for q in data.get("questions", [])],
+            questions=questions,
+            question_set_id=data.get("question_set_id"),
             current_index=data.get("current_index", -1),
             score=data.get("score", 0),
             strikes=data.get("strikes", 0),
             max_strikes=data.get("max_strikes", 3),
             status=data.get("status", "waiting"),
-            revealed_answers=data.get("revealed_answers", []),
+            revealed_mask=data.get("revealed_mask", 0),
             created_at=data["created_at"],
             expires_at=data["expires_at"],
+            version=data.get("version", 0),
         )
+        if legacy_reveals:
+            texts = set(data.get("revealed_answers", []))
+            question = game.current_question()
+            if question and texts:
+                for i, answer in enumerate(question.answers):
+                    if answer.text in texts:
+                        game.reveal(i)
+        game.mark_persisted()
+        if legacy_reveals:
+            # Store the mask with the next write
+            game._persisted["revealed_mask"] = None
+        return game
+
+    def _tracked_values(self) -> Dict[str, Any]:
+        # The question list is replaced (never mutated in place) when questions
+        # change, so it is tracked by identity instead of copying it; all
+        # other fields are immutable values.
+        return dict(self.__dict__)
+
+    def questions_changed(self) -> bool:
+        """Whether the question list was replaced since last persisted."""
+        return self._persisted is None or self._persisted["questions"] is not self.questions
+
+    def mark_persisted(self) -> None:
+        """Record the current field values as the stored state."""
+        self._persisted = self._tracked_values()
+        self._unsaved_tag = None
+
+    def mark_unsaved(self, tag: str) -> None:
+        """Mark this state as held in memory only, pending a buffered write.
+
+        Other processes may hold different states under the same version, so
+        ``tag`` (unique per buffer) keeps its status ETags distinct.
+        """
+        self._unsaved_tag = tag
+
+    @property
+    def unsaved_tag(self) -> Optional[str]:
+        return self._unsaved_tag
+
+    @property
+    def is_persisted(self) -> bool:
+        """Whether this session was loaded from or saved to storage."""
+        return self._persisted is not None
+
+    def changed_fields(self) -> Dict[str, Any]:
+        """Storage-compatible values of fields changed since last persisted.
+
+        Returns every field if the session has never been persisted.
+        """
+        if self._persisted is None:
+            return self.to_dict()
+        fields = {
+            name: self._serialize_field(name)
+            for name, value in self._tracked_values().items()
+            if name != "questions" and self._persisted.get(name) != value
+        }
+        if self.questions_changed() or "question_set_id" in fields:
+            fields["questions"] = self._serialize_field("questions")
+        return fields
+
+    def _serialize_field(self, name: str) -> Any:
+        if name == "mode":
+            return self.mode.value
+        if name == "questions":
+            # The inline copy is dropped once the questions are in a set
+            if self.question_set_id is not None:
+                return []
+            return [q.model_dump() for q in self.questions]
+        return getattr(self, name)
     
     def current_question(self) -> Optional[Question]:
         """Get the current question."""
@@ -82,12 +218,25 @@ class GameSession(BaseModel):
             return None
         return self.questions[self.current_index]
     
+    def is_revealed(self, index: int) -> bool:
+        """Whether answer ``index`` of the current question is revealed."""
+        return bool(self.revealed_mask >> index & 1)
+
+    def reveal(self, index: int) -> None:
+        """Mark answer ``index`` of the current question as revealed."""
+        self.revealed_mask |= 1 << index
+
+    @property
+    def revealed_count(self) -> int:
+        """Number of revealed answers of the current question."""
+        return bin(self.revealed_mask).count("1")
+
     def get_revealed_answer_objects(self) -> List[Answer]:
-        """Get Answer objects for revealed answers."""
+        """Get Answer objects for revealed answers, in answer order."""
         question = self.current_question()
-        if not question:
+        if not question or not self.revealed_mask:
             return []
-        return [a for a in question.answers if a.text in self.revealed_answers]
+        return [a for i, a in enumerate(question.answers) if self.revealed_mask >> i & 1]
 
 
 class CreateGameRequest(BaseModel):
@@ -116,6 +265,29 @@ class GameStatus(BaseModel):
     total_questions: int
     total_answers: int = 0
     is_host: bool = False
+    version: int = 0  # Changes whenever the game changes; basis of the ETag
+
+
+class GameStatusBatch(BaseModel):
+    """Statuses of several games; codes with no game are listed as missing."""
+    games: List[GameStatus]
+    missing: List[str] = []
+
+
+class BatchGuessMode(str, Enum):
+    APPLY = "apply"    # Reveal/score the matched answers on the game
+    TALLY = "tally"    # Only count guesses per answer (survey collection)
+
+
+class BatchGuessRequest(BaseModel):
+    guesses: List[str] = Field(min_length=1, max_length=5000)
+    mode: BatchGuessMode = BatchGuessMode.APPLY
+
+
+class AnswerTally(BaseModel):
+    answer: Answer
+    count: int
+    suggested_weight: int  # Share of matched guesses, in percent
 
 
 class GuessResponse(BaseModel):
@@ -126,3 +298,24 @@ class GuessResponse(BaseModel):
     score: int
     advanced: bool = False
     status: GameStatus
+
+
+class BatchGuessResponse(BaseModel):
+    mode: BatchGuessMode
+    matches: List[Optional[Answer]]  # Matched answer per submitted guess
+    revealed: List[Answer] = []
+    points_earned: int = 0
+    strikes_added: int = 0
+    advanced: bool = False
+    tally: List[AnswerTally]
+    misses: int
+    status: GameStatus
+
+
+class CleanupReport(BaseModel):
+    """Outcome of one run of the expired-document cleanup job."""
+    mode: str
+    deleted: Dict[str, int]
+    pages: int
+    complete: bool  # False when the time budget ran out; the next run resumes
+    seconds: float
@@ -0,0 +1,189 @@
+"""Immutable, content-addressed question sets and the question pack library.
+
+A game document only references its questions by ``question_set_id``; the
+questions themselves are stored once in the ``question_sets`` collection under
+a hash of their content. Sets never change after they are written, so decoded
+sets are cached per process without invalidation and every game using the
+same set shares one list of Question objects (and their compiled matchers).
+
+Question packs are named, reusable sets that hosts attach to a game in one
+call; packs are likewise immutable and cached.
+"""
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from models import Question, QuestionPack
+from storage import DocumentStore
+
+QUESTION_SETS_COLLECTION = "question_sets"
+PACKS_COLLECTION = "packs"
+
+
+class LRUCache:
+    """LRU cache for immutable values keyed by id, with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared caches for this worker process
+question_set_cache = LRUCache(int(os.getenv("QUESTION_SET_CACHE_SIZE", "1000")))
+pack_cache = LRUCache(int(os.getenv("PACK_CACHE_SIZE", "1000")))
+
+
+def question_set_id(questions: List[Question]) -> str:
+    """Content hash identifying a list of questions."""
+    payload = json.dumps([q.model_dump() for q in questions], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+async def save_question_set(
+    store: DocumentStore, questions: List[Question], expires_at: Optional[datetime] = None
+) -> str:
+    """Store a question set (if not stored yet) and return its id.
+
+    Sets created for a single game pass that game's ``expires_at`` so the
+    cleanup job can remove them; sets without an expiry are kept. Because
+    identical sets are shared, saving an existing set pushes its expiry out
+    to the later of the two, so it outlives every game using it. Saving
+    without an expiry always writes the set, clearing any expiry it had.
+    """
+    set_id = question_set_id(questions)
+    cached = question_set_cache.get(set_id) is not None
+    if expires_at is None:
+        # The set may already be stored (and cached) for a game, with its expiry
+        await store.put(QUESTION_SETS_COLLECTION, set_id, _set_document(questions, None))
+    else:
+        existing = await store.get(QUESTION_SETS_COLLECTION, set_id)
+        if existing is None:
+            await store.compare_and_set(
+                QUESTION_SETS_COLLECTION, set_id, _set_document(questions, expires_at), "expires_at", None
+            )
+        elif existing["expires_at"] is not None and existing["expires_at"] < expires_at:
+            await store.compare_and_update(
+                QUESTION_SETS_COLLECTION, set_id, {"expires_at": expires_at},
+                "expires_at", existing["expires_at"],
+            )
+    if not cached:
+        _cache_question_set(set_id, questions)
+    return set_id
+
+
+def _set_document(questions: List[Question], expires_at: Optional[datetime]) -> dict:
+    return {
+        "questions": [q.model_dump() for q in questions],
+        "question_count": len(questions),
+        "expires_at": expires_at,
+    }
+
+
+def _cache_question_set(set_id: str, questions: List[Question]) -> None:
+    # Compile answer matchers up front; every game using the set shares them
+    for question in questions:
+        question.answer_index()
+    question_set_cache.put(set_id, questions)
+
+
+async def load_question_set(store: DocumentStore, set_id: str) -> List[Question]:
+    """Get a question set by id, from the process cache when possible.
+
+    The returned list is shared and must not be mutated.
+    """
+    questions = question_set_cache.get(set_id)
+    if questions is not None:
+        return questions
+    data = await store.get(QUESTION_SETS_COLLECTION, set_id)
+    if data is None:
+        raise LookupError(f"Question set {set_id} not found")
+    questions = [Question(**q) for q in data["questions"]]
+    _cache_question_set(set_id, questions)
+    return questions
+
+
+async def load_question_sets(store: DocumentStore, set_ids: List[str]) -> Dict[str, List[Question]]:
+    """Get several question sets by id, reading the uncached ones with one multi-get.
+
+    The returned lists are shared and must not be mutated.
+    """
+    sets: Dict[str, List[Question]] = {}
+    missing = []
+    for set_id in dict.fromkeys(set_ids):
+        questions = question_set_cache.get(set_id)
+        if questions is None:
+            missing.append(set_id)
+        else:
+            sets[set_id] = questions
+    if missing:
+        for set_id, data in (await store.get_many(QUESTION_SETS_COLLECTION, missing)).items():
+            if data is None:
+                raise LookupError(f"Question set {set_id} not found")
+            questions = [Question(**q) for q in data["questions"]]
+            _cache_question_set(set_id, questions)
+            sets[set_id] = questions
+    return sets
+
+
+async def create_pack(store: DocumentStore, name: str, questions: List[Question]) -> QuestionPack:
+    """Store a named question pack; its question set never expires."""
+    questions = [q.model_copy(update={"id": i}) for i, q in enumerate(questions, start=1)]
+    pack = QuestionPack(
+        id=uuid.uuid4().hex[:12],
+        name=name,
+        question_set_id=await save_question_set(store, questions),
+        question_count=len(questions),
+        created_at=datetime.now(timezone.utc),
+    )
+    await store.put(PACKS_COLLECTION, pack.id, pack.model_dump())
+    pack_cache.put(pack.id, pack)
+    return pack
+
+
+async def get_pack(store: DocumentStore, pack_id: str) -> Optional[QuestionPack]:
+    """Get a question pack by id, from the process cache when possible."""
+    pack = pack_cache.get(pack_id)
+    if pack is not None:
+        return pack
+    data = await store.get(PACKS_COLLECTION, pack_id)
+    if data is None:
+        return None
+    pack = QuestionPack(**data)
+    pack_cache.put(pack_id, pack)
+    return pack
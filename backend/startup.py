@@ -0,0 +1,80 @@
+"""Startup timing and background warm-up.
+
+Instances scale to zero, so the first player after a quiet spell waits for a
+cold start. Heavy dependencies are loaded on first use rather than at import
+time: the Firebase Admin SDK and the Firestore/gRPC stack when the store is
+first needed, rapidfuzz and numpy on the first guess. ``warm_up`` runs from the
+app's lifespan and loads them in the background, then opens the store's
+connection with one read, so health checks are answered immediately and the
+first real request usually finds everything ready.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import game_logic
+import metrics
+from cleanup import MAINTENANCE_COLLECTION
+from storage import get_store
+
+logger = logging.getLogger(__name__)
+
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "1") != "0"
+WARMUP_KEY = "warmup"
+
+
+@dataclass
+class StartupReport:
+    """How long this process took to get ready, by phase."""
+    phases: Dict[str, float] = field(default_factory=dict)  # phase -> seconds
+    ready: bool = False
+    error: Optional[str] = None
+
+    def record(self, phase: str, started: float) -> None:
+        self.phases[phase] = round(time.perf_counter() - started, 4)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "phases": dict(self.phases), "error": self.error}
+
+
+startup_report = StartupReport()
+
+metrics.registry.callback(
+    "feud_startup_seconds", "Time spent in each startup phase.", "gauge", "phase",
+    lambda: dict(startup_report.phases),
+)
+
+
+def _initialize_firebase() -> None:
+    import firebase_config
+
+    firebase_config.initialize()
+
+
+async def warm_up() -> None:
+    """Load heavy dependencies and connect to the store, recording timings."""
+    started = time.perf_counter()
+    try:
+        if os.getenv("GAME_STORE", "firestore").lower() == "firestore":
+            step = time.perf_counter()
+            # Imports and credentials are CPU and file bound; keep the loop free
+            await asyncio.to_thread(_initialize_firebase)
+            startup_report.record("firebase_init", step)
+
+        step = time.perf_counter()
+        await get_store().get(MAINTENANCE_COLLECTION, WARMUP_KEY)
+        startup_report.record("store_connect", step)
+
+        step = time.perf_counter()
+        await asyncio.to_thread(game_logic.warm_up)
+        startup_report.record("matcher", step)
+
+        startup_report.ready = True
+    except Exception as exc:  # the app still works, just colder
+        startup_report.error = repr(exc)
+        logger.warning("Startup warm-up failed: %r", exc)
+    startup_report.record("warmup", started)
+    logger.info("Startup timings: %s", startup_report.phases)
@@ -0,0 +1,114 @@
+"""Fast game status serialization.
+
+Every poll, stream event and action response carries a game status. Building
+it as a ``GameStatus`` model and letting FastAPI validate and serialize it
+again costs far more than the underlying request. Instead the status is built
+once per game version and role as plain dicts (the session is already
+validated), encoded once with orjson, and served from a per-process LRU cache
+keyed by the status ETag. The JSON shape is exactly that of ``GameStatus``.
+"""
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import Response
+
+from metrics import timed
+from models import Answer, GameSession
+from question_bank import LRUCache
+
+# Cached (payload, encoded payload) pairs keyed by ETag
+status_cache = LRUCache(int(os.getenv("STATUS_CACHE_SIZE", "10000")))
+
+
+class ORJSONResponse(Response):
+    """JSON response encoded with orjson; content must be plain JSON data."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def game_status_etag(game: GameSession, is_host: bool) -> str:
+    """Entity tag for a game status response.
+
+    The status body is fully determined by the game's version and whether the
+    caller is the host; the creation time distinguishes recycled game codes.
+    States not yet written (write-behind) are only valid in this process and
+    carry their buffer's tag.
+    """
+    role = "host" if is_host else "player"
+    etag = f"{game.code}-{int(game.created_at.timestamp())}-{game.version}-{role}"
+    if game.unsaved_tag:
+        etag = f"{etag}-{game.unsaved_tag}"
+    return f'"{etag}"'
+
+
+def answer_payload(answer: Optional[Answer]) -> Optional[Dict[str, Any]]:
+    return answer.model_dump() if answer is not None else None
+
+
+def _build(game: GameSession, is_host: bool) -> Dict[str, Any]:
+    question = game.current_question()
+    revealed_answers = [answer_payload(a) for a in game.get_revealed_answer_objects()]
+
+    # For players, only the revealed answers are sent so the count stays hidden
+    question_payload = None
+    total_answers = 0
+    if question:
+        question_payload = {
+            "id": question.id,
+            "text": question.text,
+            "answers": [answer_payload(a) for a in question.answers] if is_host else revealed_answers,
+        }
+        total_answers = len(question.answers)
+
+    return {
+        "code": game.code,
+        "mode": game.mode.value,
+        "status": game.status,
+        "question": question_payload,
+        "revealed_answers": revealed_answers,
+        "score": game.score,
+        "strikes": game.strikes,
+        "max_strikes": game.max_strikes,
+        "current_index": game.current_index if game.status == "playing" else None,
+        "total_questions": len(game.questions),
+        "total_answers": total_answers,
+        "is_host": is_host,
+        "version": game.version,
+    }
+
+
+def _cached(game: GameSession, is_host: bool) -> Tuple[Dict[str, Any], bytes]:
+    etag = game_status_etag(game, is_host)
+    entry = status_cache.get(etag)
+    if entry is None:
+        with timed("serialize"):
+            payload = _build(game, is_host)
+            entry = (payload, orjson.dumps(payload))
+        status_cache.put(etag, entry)
+    return entry
+
+
+def game_status_payload(game: GameSession, is_host: bool = False) -> Dict[str, Any]:
+    """Public game status as a dict. Shared between requests; do not mutate."""
+    return _cached(game, is_host)[0]
+
+
+def game_status_json(game: GameSession, is_host: bool = False) -> bytes:
+    """Public game status encoded as JSON."""
+    return _cached(game, is_host)[1]
+
+
+def game_statuses_etag(statuses: Sequence[Tuple[GameSession, bool]], missing: Sequence[str]) -> str:
+    """Entity tag for a batch of game statuses, derived from each one's ETag."""
+    parts = [game_status_etag(game, is_host) for game, is_host in statuses] + list(missing)
+    return f'"{hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()}"'
+
+
+def game_statuses_json(statuses: Sequence[Tuple[GameSession, bool]], missing: List[str]) -> bytes:
+    """Several game statuses as one ``GameStatusBatch``, joined from their cached encodings."""
+    games = b",".join(game_status_json(game, is_host) for game, is_host in statuses)
+    return b'{"games":[' + games + b'],"missing":' + orjson.dumps(missing) + b"}"
@@ -0,0 +1,563 @@
+"""Pluggable document storage backends.
+
+The game service talks to storage only through the ``DocumentStore`` protocol,
+so the API can run against Firestore in production or against a fast
+in-process store for local development, tests and benchmarks.
+
+Select the backend with the ``GAME_STORE`` environment variable:
+``firestore`` (default) or ``memory``. Calls are timed and counted for
+``/metrics`` unless ``STORE_METRICS=0``.
+"""
+import asyncio
+import copy
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
+
+import metrics
+
+# Called with the new document data (or None when deleted). Firestore invokes
+# watch callbacks on a background thread.
+WatchCallback = Callable[[Optional[dict]], None]
+Unsubscribe = Callable[[], None]
+
+
+@dataclass(frozen=True)
+class Increment:
+    """Field value that adds ``amount`` to a number (a missing field counts as 0)."""
+    amount: int
+
+
+@dataclass(frozen=True)
+class Maximum:
+    """Field value that raises a number to at least ``value`` (a missing field is set)."""
+    value: int
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate stored size in bytes, using Firestore's size rules."""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime, Increment, Maximum)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, dict):
+        return sum(estimate_size(str(k)) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value)
+    return len(str(value)) + 1
+
+
+class DocumentStore(Protocol):
+    """Minimal document store interface used by the game service."""
+
+    async def get(self, collection: str, key: str) -> Optional[dict]:
+        """Return a document's data, or None if it does not exist."""
+        ...
+
+    async def get_many(self, collection: str, keys: List[str]) -> Dict[str, Optional[dict]]:
+        """Fetch several documents in one round trip; missing ones map to None."""
+        ...
+
+    async def put(self, collection: str, key: str, data: dict) -> None:
+        """Create or overwrite a document."""
+        ...
+
+    async def merge(self, collection: str, key: str, data: Dict[str, Any], create: bool = True) -> None:
+        """Merge fields into a document, creating it if it does not exist.
+
+        Nested maps are merged key by key. Values may be ``Increment`` to
+        add to a counter or ``Maximum`` to only ever raise it. With
+        ``create=False`` a missing document is left missing.
+        """
+        ...
+
+    async def delete(self, collection: str, key: str) -> None:
+        """Delete a document (no-op if it does not exist)."""
+        ...
+
+    async def delete_many(self, collection: str, keys: List[str]) -> None:
+        """Delete several documents using batched writes."""
+        ...
+
+    async def compare_and_set(
+        self, collection: str, key: str, data: dict, field: str, expected: Any
+    ) -> bool:
+        """Overwrite a document only if ``field`` currently equals ``expected``.
+
+        ``expected=None`` means the document must not exist yet. Returns
+        whether the write happened.
+        """
+        ...
+
+    async def compare_and_update(
+        self, collection: str, key: str, fields: Dict[str, Any], field: str, expected: Any
+    ) -> bool:
+        """Apply a field-level update only if ``field`` currently equals ``expected``.
+
+        A missing field counts as 0, so documents written before a counter
+        field existed match ``expected=0``. Returns False (and writes nothing)
+        if the document is missing or the field has a different value. Values
+        may be ``Maximum`` to only ever raise a number.
+        """
+        ...
+
+    async def query_expired(
+        self,
+        collection: str,
+        before: datetime,
+        limit: Optional[int] = None,
+        start_after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Tuple[str, datetime]]:
+        """Return ``(key, expires_at)`` of documents expiring before ``before``.
+
+        Results are ordered by ``expires_at`` then key; pass the last pair
+        (as ``(expires_at, key)``) as ``start_after`` to get the next page.
+        """
+        ...
+
+    async def query_range(
+        self, collection: str, field: str, value: Any, order_by: str, start_at: Any
+    ) -> List[dict]:
+        """Documents where ``field == value`` and ``order_by >= start_at``.
+
+        Results are ordered by ``order_by``.
+        """
+        ...
+
+    def watch(self, collection: str, key: str, callback: WatchCallback) -> Unsubscribe:
+        """Invoke ``callback`` whenever the document changes."""
+        ...
+
+
+class MemoryStore:
+    """In-process document store for local runs, tests and benchmarks.
+
+    Documents are deep-copied on the way in and out so callers cannot mutate
+    stored state, mirroring the serialization boundary of a real database.
+    An optional artificial latency simulates network round trips.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self._collections: Dict[str, Dict[str, dict]] = {}
+        self._watchers: Dict[tuple, List[WatchCallback]] = {}
+
+    async def _round_trip(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _docs(self, collection: str) -> Dict[str, dict]:
+        return self._collections.setdefault(collection, {})
+
+    def _notify(self, collection: str, key: str, data: Optional[dict]) -> None:
+        for callback in list(self._watchers.get((collection, key), ())):
+            callback(copy.deepcopy(data))
+
+    async def get(self, collection: str, key: str) -> Optional[dict]:
+        await self._round_trip()
+        data = self._docs(collection).get(key)
+        return copy.deepcopy(data) if data is not None else None
+
+    async def get_many(self, collection: str, keys: List[str]) -> Dict[str, Optional[dict]]:
+        await self._round_trip()
+        docs = self._docs(collection)
+        return {key: copy.deepcopy(docs[key]) if key in docs else None for key in keys}
+
+    async def put(self, collection: str, key: str, data: dict) -> None:
+        await self._round_trip()
+        self._docs(collection)[key] = copy.deepcopy(data)
+        self._notify(collection, key, data)
+
+    def _apply_update(self, collection: str, key: str, data: dict, fields: Dict[str, Any]) -> None:
+        for name, value in fields.items():
+            if isinstance(value, Maximum):
+                data[name] = max(data.get(name, value.value), value.value)
+            else:
+                data[name] = copy.deepcopy(value)
+        self._notify(collection, key, data)
+
+    async def merge(self, collection: str, key: str, data: Dict[str, Any], create: bool = True) -> None:
+        await self._round_trip()
+        docs = self._docs(collection)
+        if not create and key not in docs:
+            return
+        current = docs.setdefault(key, {})
+        self._merge_into(current, data)
+        self._notify(collection, key, current)
+
+    @classmethod
+    def _merge_into(cls, target: dict, data: Dict[str, Any]) -> None:
+        for name, value in data.items():
+            if isinstance(value, Increment):
+                target[name] = target.get(name, 0) + value.amount
+            elif isinstance(value, Maximum):
+                target[name] = max(target.get(name, value.value), value.value)
+            elif isinstance(value, dict):
+                if not isinstance(target.get(name), dict):
+                    target[name] = {}
+                cls._merge_into(target[name], value)
+            else:
+                target[name] = copy.deepcopy(value)
+
+    async def delete(self, collection: str, key: str) -> None:
+        await self._round_trip()
+        if self._docs(collection).pop(key, None) is not None:
+            self._notify(collection, key, None)
+
+    async def compare_and_set(
+        self, collection: str, key: str, data: dict, field: str, expected: Any
+    ) -> bool:
+        await self._round_trip()
+        current = self._docs(collection).get(key)
+        if expected is None:
+            if current is not None:
+                return False
+        elif current is None or current.get(field) != expected:
+            return False
+        self._docs(collection)[key] = copy.deepcopy(data)
+        self._notify(collection, key, data)
+        return True
+
+    async def compare_and_update(
+        self, collection: str, key: str, fields: Dict[str, Any], field: str, expected: Any
+    ) -> bool:
+        await self._round_trip()
+        data = self._docs(collection).get(key)
+        if data is None or data.get(field, 0) != expected:
+            return False
+        self._apply_update(collection, key, data, fields)
+        return True
+
+    async def delete_many(self, collection: str, keys: List[str]) -> None:
+        await self._round_trip()
+        docs = self._docs(collection)
+        for key in keys:
+            if docs.pop(key, None) is not None:
+                self._notify(collection, key, None)
+
+    async def query_expired(
+        self,
+        collection: str,
+        before: datetime,
+        limit: Optional[int] = None,
+        start_after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Tuple[str, datetime]]:
+        await self._round_trip()
+        expired = sorted(
+            (data["expires_at"], key) for key, data in self._docs(collection).items()
+            if data.get("expires_at") is not None and data["expires_at"] < before
+        )
+        if start_after is not None:
+            expired = [entry for entry in expired if entry > start_after]
+        if limit is not None:
+            expired = expired[:limit]
+        return [(key, expires_at) for expires_at, key in expired]
+
+    async def query_range(
+        self, collection: str, field: str, value: Any, order_by: str, start_at: Any
+    ) -> List[dict]:
+        await self._round_trip()
+        matches = [
+            data for data in self._docs(collection).values()
+            if data.get(field) == value and data.get(order_by) is not None and data[order_by] >= start_at
+        ]
+        return copy.deepcopy(sorted(matches, key=lambda data: data[order_by]))
+
+    def watch(self, collection: str, key: str, callback: WatchCallback) -> Unsubscribe:
+        callbacks = self._watchers.setdefault((collection, key), [])
+        callbacks.append(callback)
+
+        def unsubscribe() -> None:
+            callbacks.remove(callback)
+            if not callbacks:
+                self._watchers.pop((collection, key), None)
+
+        return unsubscribe
+
+
+# Maximum number of writes in one Firestore batch
+FIRESTORE_BATCH_LIMIT = 500
+
+
+class FirestoreStore:
+    """Document store backed by Cloud Firestore.
+
+    Reads and writes use the async client; snapshot listeners need the
+    synchronous client, which runs them on a background thread.
+    """
+
+    def __init__(self):
+        from firebase_config import get_async_db, get_db
+        self._async_db = get_async_db
+        self._db = get_db
+
+    def _ref(self, collection: str, key: str):
+        return self._async_db().collection(collection).document(key)
+
+    async def get(self, collection: str, key: str) -> Optional[dict]:
+        doc = await self._ref(collection, key).get()
+        return doc.to_dict() if doc.exists else None
+
+    async def get_many(self, collection: str, keys: List[str]) -> Dict[str, Optional[dict]]:
+        result: Dict[str, Optional[dict]] = dict.fromkeys(keys)
+        refs = [self._ref(collection, key) for key in keys]
+        async for doc in self._async_db().get_all(refs):
+            if doc.exists:
+                result[doc.id] = doc.to_dict()
+        return result
+
+    async def put(self, collection: str, key: str, data: dict) -> None:
+        await self._ref(collection, key).set(data)
+
+    @staticmethod
+    def _update_payload(fields: Dict[str, Any]) -> Dict[str, Any]:
+        from google.cloud.firestore_v1 import Maximum as FirestoreMaximum
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        # Quote names so they are not interpreted as dotted field paths
+        return {
+            FieldPath(name).to_api_repr(): FirestoreMaximum(value.value) if isinstance(value, Maximum) else value
+            for name, value in fields.items()
+        }
+
+    @classmethod
+    def _merge_payload(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        from google.cloud.firestore_v1 import Increment as FirestoreIncrement
+        from google.cloud.firestore_v1 import Maximum as FirestoreMaximum
+
+        return {
+            name: (
+                FirestoreIncrement(value.amount) if isinstance(value, Increment)
+                else FirestoreMaximum(value.value) if isinstance(value, Maximum)
+                else cls._merge_payload(value) if isinstance(value, dict)
+                else value
+            )
+            for name, value in data.items()
+        }
+
+    @classmethod
+    def _field_paths(cls, data: Dict[str, Any], prefix: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        from google.cloud.firestore_v1.field_path import FieldPath
+
+        # update() replaces nested maps, so merge them leaf by leaf instead
+        paths: Dict[str, Any] = {}
+        for name, value in data.items():
+            if isinstance(value, dict) and value:
+                paths.update(cls._field_paths(value, prefix + (name,)))
+            else:
+                paths[FieldPath(*prefix, name).to_api_repr()] = value
+        return paths
+
+    async def merge(self, collection: str, key: str, data: Dict[str, Any], create: bool = True) -> None:
+        from google.api_core.exceptions import NotFound
+
+        payload = self._merge_payload(data)
+        if create:
+            await self._ref(collection, key).set(payload, merge=True)
+            return
+        try:
+            await self._ref(collection, key).update(self._field_paths(payload))
+        except NotFound:
+            pass
+
+    async def delete(self, collection: str, key: str) -> None:
+        await self._ref(collection, key).delete()
+
+    async def compare_and_set(
+        self, collection: str, key: str, data: dict, field: str, expected: Any
+    ) -> bool:
+        from google.api_core.exceptions import Conflict
+        from google.cloud.firestore_v1 import async_transactional
+
+        db = self._async_db()
+        ref = self._ref(collection, key)
+        if expected is None:
+            # A plain create is conditional on absence; no transaction needed
+            try:
+                await ref.create(data)
+            except Conflict:  # AlreadyExists
+                return False
+            return True
+
+        @async_transactional
+        async def write_if_unchanged(transaction) -> bool:
+            doc = await ref.get(transaction=transaction)
+            if not doc.exists or doc.to_dict().get(field) != expected:
+                return False
+            transaction.set(ref, data)
+            return True
+
+        return await write_if_unchanged(db.transaction())
+
+    async def compare_and_update(
+        self, collection: str, key: str, fields: Dict[str, Any], field: str, expected: Any
+    ) -> bool:
+        from google.cloud.firestore_v1 import async_transactional
+
+        db = self._async_db()
+        ref = self._ref(collection, key)
+        payload = self._update_payload(fields)
+
+        @async_transactional
+        async def update_if_unchanged(transaction) -> bool:
+            doc = await ref.get(transaction=transaction)
+            # DocumentSnapshot.get raises KeyError for a missing field
+            if not doc.exists or doc.to_dict().get(field, 0) != expected:
+                return False
+            transaction.update(ref, payload)
+            return True
+
+        return await update_if_unchanged(db.transaction())
+
+    async def delete_many(self, collection: str, keys: List[str]) -> None:
+        db = self._async_db()
+        for start in range(0, len(keys), FIRESTORE_BATCH_LIMIT):
+            batch = db.batch()
+            for key in keys[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.delete(self._ref(collection, key))
+            await batch.commit()
+
+    async def query_expired(
+        self,
+        collection: str,
+        before: datetime,
+        limit: Optional[int] = None,
+        start_after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Tuple[str, datetime]]:
+        from google.cloud.firestore_v1 import FieldFilter
+
+        query = (
+            self._async_db().collection(collection)
+            .where(filter=FieldFilter("expires_at", "<", before))
+            .order_by("expires_at")
+            .order_by("__name__")
+            .select(["expires_at"])
+        )
+        if start_after is not None:
+            expires_at, key = start_after
+            query = query.start_after({"expires_at": expires_at, "__name__": key})
+        if limit is not None:
+            query = query.limit(limit)
+        return [(doc.id, doc.get("expires_at")) async for doc in query.stream()]
+
+    async def query_range(
+        self, collection: str, field: str, value: Any, order_by: str, start_at: Any
+    ) -> List[dict]:
+        from google.cloud.firestore_v1 import FieldFilter
+
+        query = (
+            self._async_db().collection(collection)
+            .where(filter=FieldFilter(field, "==", value))
+            .where(filter=FieldFilter(order_by, ">=", start_at))
+            .order_by(order_by)
+        )
+        return [doc.to_dict() async for doc in query.stream()]
+
+    def watch(self, collection: str, key: str, callback: WatchCallback) -> Unsubscribe:
+        def on_snapshot(docs, changes, read_time) -> None:
+            for doc in docs:
+                callback(doc.to_dict() if doc.exists else None)
+
+        ref = self._db().collection(collection).document(key)
+        return ref.on_snapshot(on_snapshot).unsubscribe
+
+
+class InstrumentedStore:
+    """Wraps a store to time its calls and count operations and bytes."""
+
+    def __init__(self, inner: DocumentStore):
+        self.inner = inner
+
+    async def get(self, collection: str, key: str) -> Optional[dict]:
+        with metrics.timed("store"):
+            data = await self.inner.get(collection, key)
+        metrics.record_store_call("get", collection, False, estimate_size(data) if data else 0)
+        return data
+
+    async def get_many(self, collection: str, keys: List[str]) -> Dict[str, Optional[dict]]:
+        with metrics.timed("store"):
+            docs = await self.inner.get_many(collection, keys)
+        metrics.record_store_call("get_many", collection, False, estimate_size([d for d in docs.values() if d]))
+        return docs
+
+    async def put(self, collection: str, key: str, data: dict) -> None:
+        with metrics.timed("store"):
+            await self.inner.put(collection, key, data)
+        metrics.record_store_call("put", collection, True, estimate_size(data))
+
+    async def merge(self, collection: str, key: str, data: Dict[str, Any], create: bool = True) -> None:
+        with metrics.timed("store"):
+            await self.inner.merge(collection, key, data, create)
+        metrics.record_store_call("merge", collection, True, estimate_size(data))
+
+    async def delete(self, collection: str, key: str) -> None:
+        with metrics.timed("store"):
+            await self.inner.delete(collection, key)
+        metrics.record_store_call("delete", collection, True, 0)
+
+    async def delete_many(self, collection: str, keys: List[str]) -> None:
+        with metrics.timed("store"):
+            await self.inner.delete_many(collection, keys)
+        metrics.record_store_call("delete_many", collection, True, 0)
+
+    async def compare_and_set(
+        self, collection: str, key: str, data: dict, field: str, expected: Any
+    ) -> bool:
+        with metrics.timed("store"):
+            written = await self.inner.compare_and_set(collection, key, data, field, expected)
+        metrics.record_store_call("compare_and_set", collection, True, estimate_size(data) if written else 0)
+        return written
+
+    async def compare_and_update(
+        self, collection: str, key: str, fields: Dict[str, Any], field: str, expected: Any
+    ) -> bool:
+        with metrics.timed("store"):
+            written = await self.inner.compare_and_update(collection, key, fields, field, expected)
+        metrics.record_store_call("compare_and_update", collection, True, estimate_size(fields) if written else 0)
+        return written
+
+    async def query_expired(
+        self,
+        collection: str,
+        before: datetime,
+        limit: Optional[int] = None,
+        start_after: Optional[Tuple[datetime, str]] = None,
+    ) -> List[Tuple[str, datetime]]:
+        with metrics.timed("store"):
+            results = await self.inner.query_expired(collection, before, limit, start_after)
+        metrics.record_store_call("query_expired", collection, False, estimate_size(results))
+        return results
+
+    async def query_range(
+        self, collection: str, field: str, value: Any, order_by: str, start_at: Any
+    ) -> List[dict]:
+        with metrics.timed("store"):
+            results = await self.inner.query_range(collection, field, value, order_by, start_at)
+        metrics.record_store_call("query_range", collection, False, estimate_size(results))
+        return results
+
+    def watch(self, collection: str, key: str, callback: WatchCallback) -> Unsubscribe:
+        return self.inner.watch(collection, key, callback)
+
+
+_store: Optional[DocumentStore] = None
+
+
+def get_store() -> DocumentStore:
+    """Get the configured document store, creating it on first use."""
+    global _store
+
+    if _store is None:
+        backend = os.getenv("GAME_STORE", "firestore").lower()
+        if backend == "memory":
+            _store = MemoryStore(float(os.getenv("MEMORY_STORE_LATENCY_MS", "0")))
+        elif backend == "firestore":
+            _store = FirestoreStore()
+        else:
+            raise ValueError(f"Unknown GAME_STORE backend: {backend}")
+        if os.getenv("STORE_METRICS", "1") != "0":
+            _store = InstrumentedStore(_store)
+    return _store
@@ -0,0 +1,109 @@
+"""Game ownership: pinning owned games, forwarding requests and falling back."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from affinity import FORWARDED_HEADER, AffinityMiddleware, Membership
+from game_cache import GameCache, game_cache
+from models import GameMode, GameSession
+from storage import MemoryStore
+
+
+def make_game(code: str, expires_in: timedelta) -> GameSession:
+    now = datetime.now(timezone.utc)
+    return GameSession(code=code, mode=GameMode.HOST_CONTROLLED, host_id="h", created_at=now, expires_at=now + expires_in)
+
+
+def test_pinned_set_is_bounded():
+    cache = GameCache(max_pinned=2)
+    assert cache.pin("AAAA") and cache.pin("BBBB")
+    assert not cache.pin("CCCC")
+    assert cache.pinned() == {"AAAA", "BBBB"}
+
+
+def test_expired_game_is_unpinned():
+    cache = GameCache()
+    cache.put(make_game("AAAA", timedelta(seconds=-1)))
+    cache.pin("AAAA")
+    assert cache.get("AAAA") is None
+    assert not cache.is_pinned("AAAA")
+
+
+def test_forwarded_header_must_be_signed_by_a_peer():
+    member = Membership(["http://a", "http://b"], "http://a", secret="secret")
+    scope = {"method": "GET", "path": "/api/games/ABCD", "query_string": b""}
+
+    assert not member.is_forwarded({**scope, "headers": [(FORWARDED_HEADER, b"1")]})
+    signed = member.sign("GET", b"/api/games/ABCD")
+    assert member.is_forwarded({**scope, "headers": [(FORWARDED_HEADER, signed)]})
+    assert not member.is_forwarded({**scope, "method": "POST", "headers": [(FORWARDED_HEADER, signed)]})
+
+
+def test_peers_require_a_secret():
+    with pytest.raises(ValueError):
+        Membership(["http://a"], "http://a", secret="")
+
+
+def _run_middleware(error: Exception, method: str = "POST"):
+    """Send one request for a game owned by the other peer, whose forwarding fails with ``error``."""
+    member = Membership(["http://a", "http://b"], "http://a", secret="secret")
+    code = next(c for c in ("AAAA", "BBBB", "CCCC", "DDDD") if member.owner(c) == "http://b")
+
+    def fail(request):
+        raise error
+
+    member._client = httpx.AsyncClient(transport=httpx.MockTransport(fail))
+    served_here = []
+
+    async def app(scope, receive, send):
+        served_here.append(scope["path"])
+
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "method": method, "path": f"/api/games/{code}/guess", "query_string": b"", "headers": [],
+    }
+    asyncio.run(AffinityMiddleware(app, member)(scope, receive, send))
+    status = next((m["status"] for m in sent if m["type"] == "http.response.start"), None)
+    return member, code, served_here, status
+
+
+def test_unreached_owner_falls_back_and_announces_the_write():
+    member, code, served_here, _ = _run_middleware(httpx.ConnectError("refused"))
+    assert served_here == [f"/api/games/{code}/guess"]
+    assert code in member._fallback_writes
+
+
+def test_owner_that_may_have_applied_the_request_is_not_retried_here():
+    for error, expected in ((httpx.ReadTimeout("slow"), 504), (httpx.RemoteProtocolError("closed"), 502)):
+        member, _, served_here, status = _run_middleware(error)
+        assert (served_here, status) == ([], expected)
+        assert not member._fallback_writes
+
+
+def test_owner_drops_its_copy_of_a_game_written_by_a_fallback():
+    store = MemoryStore()
+    peers = ["http://a", "http://b"]
+    owner = Membership(peers, "http://a", secret="secret")
+    other = Membership(peers, "http://b", secret="secret")
+    code = next(c for c in ("AAAA", "BBBB", "CCCC", "DDDD") if owner.owner(c) == "http://a")
+    game_cache.clear()
+    game_cache.put(make_game(code, timedelta(hours=1)))
+    game_cache.pin(code)
+
+    async def scenario():
+        other.note_fallback_write(code)
+        await other.heartbeat(store)
+        await owner.heartbeat(store)
+
+    asyncio.run(scenario())
+    assert game_cache.get(code) is None and game_cache.is_pinned(code)
+    game_cache.clear()
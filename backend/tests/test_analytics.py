@@ -0,0 +1,41 @@
+"""Guess analytics keep their per-guess maps bounded."""
+import asyncio
+
+from analytics import ANALYTICS_COLLECTION, GuessAnalytics, question_key, shard_key
+from models import Answer, Question
+from storage import MemoryStore
+
+QUESTION = Question(id=1, text="Name a fruit", answers=[Answer(text="Apple", weight=40)])
+
+
+def test_flush_keeps_top_terms_and_counts_the_rest():
+    analytics = GuessAnalytics(enabled=True, shards=1, max_terms=2)
+    store = MemoryStore()
+    for guess in ["kiwi", "kiwi", "kiwi", "plum", "plum", "fig", "date", "apple"]:
+        analytics.record(QUESTION, guess, 0 if guess == "apple" else None)
+
+    async def scenario():
+        await analytics.flush(store)
+        return await analytics.question_stats(store, [QUESTION])
+
+    [stats] = asyncio.run(scenario())
+    assert [g["guess"] for g in stats["top_misses"]] == ["kiwi", "plum"]
+    assert stats["other_misses"] == 2
+    assert stats["guesses"] == 8 and stats["other_guesses"] == 3
+
+
+def test_trim_cuts_large_shards_to_their_most_frequent_terms():
+    analytics = GuessAnalytics(enabled=True, shards=1, max_terms=100, max_shard_terms=4)
+    store = MemoryStore()
+    for count, guess in enumerate(["a", "b", "c", "d", "e", "f"], start=1):
+        for _ in range(count):
+            analytics.record(QUESTION, guess, None)
+
+    async def scenario():
+        await analytics.flush(store)
+        return await store.get(ANALYTICS_COLLECTION, shard_key(question_key(QUESTION.text), 0))
+
+    doc = asyncio.run(scenario())
+    assert doc["missed_terms"] == {"f": 6, "e": 5}
+    assert doc["missed_other"] == 1 + 2 + 3 + 4
+    assert doc["misses"] == 21
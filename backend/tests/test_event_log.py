@@ -0,0 +1,116 @@
+"""Game event log: the head version marker on the snapshot."""
+import asyncio
+
+import pytest
+
+import event_log
+import game_service
+from game_cache import game_cache
+from game_logic import GameStateMachine
+from models import Answer, GameMode, Question
+from storage import MemoryStore
+
+
+class CountingStore(MemoryStore):
+    def __init__(self):
+        super().__init__()
+        self.range_queries = 0
+        self.merges = 0
+        self.fail_merges = 0
+
+    async def query_range(self, *args, **kwargs):
+        self.range_queries += 1
+        return await super().query_range(*args, **kwargs)
+
+    async def merge(self, *args, **kwargs):
+        self.merges += 1
+        if self.fail_merges:
+            self.fail_merges -= 1
+            raise ConnectionError("merge lost")
+        await super().merge(*args, **kwargs)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(event_log, "GAME_EVENT_LOG", True)
+    monkeypatch.setattr(event_log, "HEAD_INTERVAL_SECONDS", 0)
+    game_cache.clear()
+    yield CountingStore()
+    game_cache.clear()
+
+
+def _guess(store, code, text):
+    machine = GameStateMachine(max_strikes=100)
+    return game_service.mutate_game(store, code, lambda game: machine.process_guess(game, text)[1])
+
+
+async def _started_game(store):
+    game = await game_service.create_game(store, GameMode.HOST_CONTROLLED, "host")
+    questions = [Question(id=i, text=f"Q{i}", answers=[Answer(text="Apple", weight=40)]) for i in range(2)]
+    await game_service.add_questions_to_game(store, game.code, questions)
+    await game_service.start_game(store, game.code, "host")
+    return game.code
+
+
+def test_load_skips_event_query_when_snapshot_is_current(store):
+    async def scenario():
+        code = await _started_game(store)
+        await _guess(store, code, "nope")
+        game_cache.clear()
+        behind = await game_service.get_game(store, code)
+        queries_behind = store.range_queries
+
+        await game_service.advance_question(store, code, "host")
+        game_cache.clear()
+        current = await game_service.get_game(store, code)
+        return behind, queries_behind, current, store.range_queries - queries_behind
+
+    behind, queries_behind, current, queries_current = asyncio.run(scenario())
+    assert behind.strikes == 1 and queries_behind == 1
+    assert current.current_index == 1 and queries_current == 0
+
+
+def test_appends_notify_watchers_of_the_game_document(store):
+    async def scenario():
+        code = await _started_game(store)
+        seen = []
+        store.watch(game_service.GAMES_COLLECTION, code, lambda data: seen.append(event_log.head_version(data)))
+        game = await _guess(store, code, "nope")
+        return game.version, seen
+
+    version, seen = asyncio.run(scenario())
+    assert seen and seen[-1] == version
+
+
+def test_lost_head_update_is_repaired_by_the_next_writer(store):
+    async def scenario():
+        code = await _started_game(store)
+        await _guess(store, code, "nope")
+        await game_service.advance_question(store, code, "host")
+        store.fail_merges = 1
+        await _guess(store, code, "nope")
+        game_cache.clear()
+        stale = await game_service.get_game(store, code)
+        return stale, await _guess(store, code, "apple")
+
+    stale, game = asyncio.run(scenario())
+    assert stale.strikes == 0
+    assert (game.strikes, game.score) == (1, 40)
+
+
+def test_head_updates_are_batched_per_interval(store, monkeypatch):
+    monkeypatch.setattr(event_log, "HEAD_INTERVAL_SECONDS", 0.05)
+
+    async def scenario():
+        code = await _started_game(store)
+        merges = store.merges
+        for guess in ("one", "two", "three"):
+            game = await _guess(store, code, guess)
+        batched = store.merges - merges
+        await asyncio.sleep(0.1)
+        snapshot = await store.get(game_service.GAMES_COLLECTION, code)
+        return game.version, batched, store.merges - merges, snapshot
+
+    version, batched, merges, snapshot = asyncio.run(scenario())
+    assert (batched, merges) == (0, 1)
+    assert snapshot["head_version"] == version
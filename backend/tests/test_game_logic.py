@@ -0,0 +1,32 @@
+"""Guess matching ignores accents in answers and guesses."""
+import pytest
+
+from game_logic import AnswerIndex, AnswerMatcher, normalize_text
+from models import Answer, Question
+
+QUESTION = Question(
+    text="Name something you order at a cafe",
+    answers=[Answer(text="Café", weight=30), Answer(text="Crème brûlée", weight=20), Answer(text="Tea", weight=10)],
+)
+
+
+def test_normalize_text_folds_accents():
+    assert normalize_text("Crème  Brûlée!") == "creme  brulee"
+    assert normalize_text("ＣＡＦＥ") == "cafe"
+
+
+@pytest.mark.parametrize("guess, expected", [
+    ("cafe", "Café"),
+    ("CAFÉ", "Café"),
+    ("creme brulee", "Crème brûlée"),
+    ("crème brulée", "Crème brûlée"),
+    ("creme brule", "Crème brûlée"),
+])
+def test_accented_answers_match_plain_guesses(guess, expected):
+    match = AnswerMatcher(threshold=80).match_question(guess, QUESTION)
+    assert match is not None and match.text == expected
+
+
+def test_accented_guesses_match_plain_answers():
+    index = AnswerIndex([Answer(text="Cafe", weight=1), Answer(text="Jalapeno", weight=1)])
+    assert index.match_many(["café", "jalapeño", "tea"], 80) == [0, 1, None]
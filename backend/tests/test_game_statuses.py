@@ -0,0 +1,42 @@
+"""Batched game status lookups."""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import storage
+from game_cache import game_cache
+from storage import MemoryStore
+
+
+class StrictStore(MemoryStore):
+    """Rejects keys Firestore cannot address, like FirestoreStore does."""
+
+    async def get_many(self, collection, keys):
+        if any("/" in key or not key for key in keys):
+            raise ValueError("invalid document key")
+        return await super().get_many(collection, keys)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(storage, "_store", StrictStore())
+    game_cache.clear()
+    with TestClient(main.app) as client:
+        yield client
+    game_cache.clear()
+
+
+def test_invalid_codes_are_reported_missing(client):
+    code = client.post("/api/games", json={"mode": "host"}).json()["code"]
+    response = client.get("/api/games", params={"codes": f"A/B,{code.lower()},ZZZZZZZZ,OOOO"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [game["code"] for game in body["games"]] == [code]
+    assert body["missing"] == ["A/B", "ZZZZZZZZ", "OOOO"]
+
+
+def test_request_size_is_capped(client):
+    too_many = ",".join(["ABCD"] * (main.MAX_STATUS_BATCH + 1))
+    assert client.get("/api/games", params={"codes": too_many}).status_code == 400
+    too_long = "A" * (main.MAX_STATUS_BATCH * (main.CODE_MAX_LENGTH + 1) + 1)
+    assert client.get("/api/games", params={"codes": too_long}).status_code == 422
@@ -0,0 +1,69 @@
+"""Games stored before the ``version`` field existed can still be written."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import event_log
+import game_service
+from game_cache import game_cache
+from game_logic import GameStateMachine
+from storage import MemoryStore
+
+CODE = "LGCY"
+
+
+def _legacy_game() -> dict:
+    """A game document as written before versioning: no ``version`` field."""
+    now = datetime.now(timezone.utc)
+    return {
+        "code": CODE,
+        "mode": "host",
+        "host_id": "host",
+        "questions": [
+            {"id": 1, "text": "Name a fruit", "answers": [{"text": "Apple", "weight": 40}, {"text": "Banana", "weight": 30}]},
+            {"id": 2, "text": "Name a color", "answers": [{"text": "Red", "weight": 50}]},
+        ],
+        "current_index": 0,
+        "score": 0,
+        "strikes": 0,
+        "max_strikes": 3,
+        "status": "playing",
+        "revealed_answers": [],
+        "created_at": now,
+        "expires_at": now + timedelta(hours=1),
+    }
+
+
+@pytest.fixture(params=[False, True], ids=["document", "event_log"])
+def store(request, monkeypatch):
+    monkeypatch.setattr(event_log, "GAME_EVENT_LOG", request.param)
+    game_cache.clear()
+    store = MemoryStore()
+    asyncio.run(store.put(game_service.GAMES_COLLECTION, CODE, _legacy_game()))
+    yield store
+    game_cache.clear()
+
+
+def test_compare_and_update_treats_missing_field_as_zero(store):
+    written = asyncio.run(store.compare_and_update(
+        game_service.GAMES_COLLECTION, CODE, {"strikes": 1, "version": 1}, "version", 0
+    ))
+    assert written
+
+
+def test_guess_and_advance_on_legacy_game(store):
+    machine = GameStateMachine()
+
+    async def play():
+        guessed = await game_service.mutate_game(
+            store, CODE, lambda game: machine.process_guess(game, "apple")[1]
+        )
+        advanced = await game_service.advance_question(store, CODE, "host")
+        game_cache.clear()
+        return guessed, advanced, await game_service.get_game(store, CODE)
+
+    guessed, advanced, reloaded = asyncio.run(play())
+    assert guessed.score == 40 and guessed.version == 1
+    assert advanced.current_index == 1 and advanced.version == 2
+    assert (reloaded.current_index, reloaded.score, reloaded.version) == (1, 40, 2)
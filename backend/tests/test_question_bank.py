@@ -0,0 +1,48 @@
+"""Question sets shared between games and packs."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import event_log
+import game_service
+from game_cache import game_cache
+from models import Answer, GameMode, Question
+from question_bank import QUESTION_SETS_COLLECTION, create_pack, question_set_cache, save_question_set
+from storage import MemoryStore
+
+
+def test_pack_clears_expiry_of_set_saved_for_a_game():
+    store = MemoryStore()
+    questions = [Question(id=1, text="Name a fruit", answers=[Answer(text="Apple", weight=40)])]
+    question_set_cache.clear()
+
+    async def scenario():
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        set_id = await save_question_set(store, questions, expires_at)
+        pack = await create_pack(store, "Fruit", questions)
+        return set_id, pack, await store.get(QUESTION_SETS_COLLECTION, set_id)
+
+    set_id, pack, stored = asyncio.run(scenario())
+    assert pack.question_set_id == set_id
+    assert stored["expires_at"] is None
+
+
+def test_game_stores_its_question_set_once_when_started(monkeypatch):
+    monkeypatch.setattr(event_log, "GAME_EVENT_LOG", False)
+    store = MemoryStore()
+    question_set_cache.clear()
+    game_cache.clear()
+
+    async def scenario():
+        game = await game_service.create_game(store, GameMode.HOST_CONTROLLED, "host")
+        for i in range(3):
+            question = Question(id=i, text=f"Q{i}", answers=[Answer(text="Apple", weight=40)])
+            await game_service.add_question_to_game(store, game.code, question)
+        waiting = dict(store._docs(QUESTION_SETS_COLLECTION))
+        await game_service.start_game(store, game.code, "host")
+        game_cache.clear()
+        return waiting, store._docs(QUESTION_SETS_COLLECTION), await game_service.get_game(store, game.code)
+
+    waiting, sets, game = asyncio.run(scenario())
+    assert waiting == {}
+    assert list(sets) == [game.question_set_id]
+    assert [q.text for q in game.questions] == ["Q0", "Q1", "Q2"]
@@ -0,0 +1,45 @@
+"""Hosts open the event stream with a short-lived token, not their host ID."""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import storage
+from game_cache import game_cache
+from storage import MemoryStore
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(storage, "_store", MemoryStore())
+    game_cache.clear()
+    with TestClient(main.app) as client:
+        yield client
+    game_cache.clear()
+
+
+def _create(client):
+    game = client.post("/api/games", json={"mode": "host"}).json()
+    return game["code"], game["host_id"]
+
+
+def test_token_requires_the_host_id(client):
+    code, host_id = _create(client)
+    assert client.post(f"/api/games/{code}/events/token").status_code == 403
+    response = client.post(f"/api/games/{code}/events/token", headers={"X-Host-Id": host_id})
+    assert response.status_code == 200
+    assert host_id not in response.json()["token"]
+
+
+def test_token_is_checked_and_expires(client, monkeypatch):
+    code, host_id = _create(client)
+    token = client.post(f"/api/games/{code}/events/token", headers={"X-Host-Id": host_id}).json()["token"]
+    game = main.game_cache.get(code)
+    assert main._valid_stream_token(game, token)
+    assert not main._valid_stream_token(game, token[:-1] + ("0" if token[-1] != "0" else "1"))
+    monkeypatch.setattr(main.time, "time", lambda: int(token.split(".")[0]) + 1)
+    assert not main._valid_stream_token(game, token)
+
+
+def test_invalid_token_is_rejected_by_the_stream(client):
+    code, _ = _create(client)
+    assert client.get(f"/api/games/{code}/events", params={"token": "1.abc"}).status_code == 403
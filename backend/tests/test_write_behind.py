@@ -0,0 +1,93 @@
+"""Buffered guesses survive conflicting and failing writes."""
+import asyncio
+
+import pytest
+
+import event_log
+import game_service
+from game_cache import game_cache
+from game_logic import GameStateMachine
+from models import Answer, GameMode, Question
+from storage import MemoryStore
+
+WINDOW = 60.0  # long enough that only explicit flushes write
+
+
+class FlakyStore(MemoryStore):
+    """Memory store whose next ``failures`` versioned writes fail."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 0
+
+    async def compare_and_update(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            return False
+        return await super().compare_and_update(*args, **kwargs)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(event_log, "GAME_EVENT_LOG", False)
+    monkeypatch.setattr(game_service, "RETRY_BACKOFF_SECONDS", 0)
+    game_cache.clear()
+    yield FlakyStore()
+    game_service._pending_writes.clear()
+    game_cache.clear()
+
+
+async def _started_game(store):
+    game = await game_service.create_game(store, GameMode.HOST_CONTROLLED, "host")
+    question = Question(id=1, text="Name a fruit", answers=[Answer(text="Apple", weight=40)])
+    await game_service.add_questions_to_game(store, game.code, [question])
+    await game_service.start_game(store, game.code, "host")
+    return game.code
+
+
+def _guess(store, code, text):
+    machine = GameStateMachine(max_strikes=100)
+    return game_service.mutate_game_buffered(
+        store, code, lambda game: machine.process_guess(game, text)[1], WINDOW
+    )
+
+
+async def _stored(store, code):
+    return await store.get(game_service.GAMES_COLLECTION, code)
+
+
+def test_buffered_guesses_are_replayed_onto_a_concurrent_write(store):
+    async def scenario():
+        code = await _started_game(store)
+        await _guess(store, code, "kiwi")
+        await _guess(store, code, "apple")
+        # Another worker adds a strike meanwhile
+        doc = await _stored(store, code)
+        await store.compare_and_update(
+            game_service.GAMES_COLLECTION, code,
+            {"strikes": doc["strikes"] + 1, "version": doc["version"] + 1}, "version", doc["version"],
+        )
+        await game_service.flush_game_writes(store, code)
+        return await _stored(store, code)
+
+    stored = asyncio.run(scenario())
+    assert (stored["strikes"], stored["score"]) == (2, 40)
+
+
+def test_failed_flush_keeps_the_buffered_guesses(store):
+    async def scenario():
+        code = await _started_game(store)
+        await _guess(store, code, "kiwi")
+        await _guess(store, code, "apple")
+        store.failures = game_service.MAX_UPDATE_RETRIES + 1
+        with pytest.raises(game_service.ConcurrentUpdateError):
+            await game_service.flush_game_writes(store, code)
+        served = await game_service.get_game(store, code)
+        still_buffered = code in game_service._pending_writes
+        await game_service.flush_game_writes(store, code)
+        return served, still_buffered, await _stored(store, code)
+
+    served, still_buffered, stored = asyncio.run(scenario())
+    assert still_buffered
+    assert (served.strikes, served.score) == (1, 40)
+    assert (stored["strikes"], stored["score"]) == (1, 40)
@@ -1,40 +1,20 @@
-import React, { useState, useEffect, useCallback, useRef } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams } from 'react-router-dom';
 import { QRCodeSVG } from 'qrcode.react';
-import api from './api';
-import { GameStatus } from './types';
+import { useGameState } from './hooks/useGameState';
 import { useCountUp } from './hooks/useCountUp';
 import StrikeFlashOverlay from './components/StrikeFlashOverlay';
 
 const Display: React.FC = () => {
     const { code } = useParams<{ code: string }>();
-    const [gameState, setGameState] = useState<GameStatus | null>(null);
-    const [error, setError] = useState('');
+    // Live updates are pushed; faster polling fallback for TV display - every 1.5 seconds
+    const { gameState, error } = useGameState(code, { pollIntervalMs: 1500 });
     const [showStrikeFlash, setShowStrikeFlash] = useState(false);
     const previousStrikes = useRef(0);
 
     // Animated score counter
     const { count: animatedScore, isAnimating: isScoreAnimating } = useCountUp(gameState?.score ?? 0);
 
-    const fetchGameState = useCallback(async () => {
-        if (!code) return;
-
-        try {
-            const response = await api.get(`/api/games/${code}`);
-            setGameState(response.data);
-            setError('');
-        } catch (err) {
-            setError('Game not found');
-        }
-    }, [code]);
-
-    useEffect(() => {
-        fetchGameState();
-        // Faster polling for TV display - update every 1.5 seconds
-        const interval = setInterval(fetchGameState, 1500);
-        return () => clearInterval(interval);
-    }, [fetchGameState]);
-
     // Detect strike increases and trigger flash
     useEffect(() => {
         const currentStrikes = gameState?.strikes ?? 0;
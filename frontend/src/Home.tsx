@@ -3,6 +3,11 @@ import { useNavigate } from 'react-router-dom';
 import api from './api';
 import { GameMode } from './types';
 
+// Codes start at 4 characters; the server lengthens them when most are in use,
+// up to its GAME_CODE_MAX_LENGTH, which REACT_APP_GAME_CODE_MAX_LENGTH must match
+const MIN_CODE_LENGTH = 4;
+const MAX_CODE_LENGTH = Number(process.env.REACT_APP_GAME_CODE_MAX_LENGTH) || 6;
+
 const Home: React.FC = () => {
     const navigate = useNavigate();
     const [joinCode, setJoinCode] = useState('');
@@ -33,8 +38,8 @@ const Home: React.FC = () => {
     const handleJoinGame = (e: React.FormEvent) => {
         e.preventDefault();
         const code = joinCode.trim().toUpperCase();
-        if (code.length !== 4) {
-            setError('Please enter a 4-character game code');
+        if (code.length < MIN_CODE_LENGTH || code.length > MAX_CODE_LENGTH) {
+            setError('Please enter a valid game code');
             return;
         }
         navigate(`/game/${code}`);
@@ -98,7 +103,7 @@ const Home: React.FC = () => {
                 {/* Join Game Card */}
                 <article className="home-card">
                     <h2>Join Game</h2>
-                    <p>Enter a 4-letter game code to join an existing Family Feud game</p>
+                    <p>Enter a game code to join an existing Family Feud game</p>
 
                     <form onSubmit={handleJoinGame} className="join-form" aria-label="Join game form">
                         <label htmlFor="game-code" className="visually-hidden">Game Code</label>
@@ -109,9 +114,9 @@ const Home: React.FC = () => {
                             value={joinCode}
                             onChange={(e) => setJoinCode(e.target.value.toUpperCase())}
                             placeholder="ABCD"
-                            maxLength={4}
+                            maxLength={MAX_CODE_LENGTH}
                             autoComplete="off"
-                            aria-label="Enter 4-letter game code"
+                            aria-label="Enter game code"
                         />
                         <button type="submit" className="btn-primary-custom btn-large">
                             Join Game
@@ -155,7 +160,7 @@ const Home: React.FC = () => {
                     <ol>
                         <li><strong>Create a Game:</strong> Click "Create Free Game" to start hosting</li>
                         <li><strong>Add Questions:</strong> Write your own survey questions with answers and point values</li>
-                        <li><strong>Share the Code:</strong> Give players your 4-letter game code</li>
+                        <li><strong>Share the Code:</strong> Give players your game code</li>
                         <li><strong>Play Together:</strong> Guess the top answers - 3 strikes and you're out!</li>
                     </ol>
 
@@ -128,4 +128,21 @@ const getErrorMessage = (error: AxiosError): string => {
 // Create and export the singleton API client
 const api = createApiClient();
 
+/**
+ * Opens a Server-Sent Events stream of game status updates.
+ * EventSource cannot send custom headers, and the host ID must stay out of URLs,
+ * so hosts first exchange it for a short-lived stream token.
+ */
+export const openGameEvents = async (code: string, hostId?: string): Promise<EventSource> => {
+    const baseUrl = process.env.REACT_APP_API_URL || '';
+    let query = '';
+    if (hostId) {
+        const response = await api.post(`/api/games/${code}/events/token`, null, {
+            headers: { 'X-Host-Id': hostId }
+        });
+        query = `?token=${encodeURIComponent(response.data.token)}`;
+    }
+    return new EventSource(`${baseUrl}/api/games/${code}/events${query}`);
+};
+
 export default api;
@@ -1,13 +1,15 @@
 import { useState, useEffect, useCallback } from 'react';
-import api from '../api';
+import api, { openGameEvents } from '../api';
 import { GameStatus } from '../types';
 
 // Configuration constants
 const POLL_INTERVAL_MS = 2000;
+const STREAM_RETRY_MS = 3000;
 
 interface UseGameStateOptions {
     hostId?: string;
     enabled?: boolean;
+    pollIntervalMs?: number;
 }
 
 interface UseGameStateResult {
@@ -18,10 +20,13 @@ interface UseGameStateResult {
 }
 
 /**
- * Custom hook for fetching and polling game state.
- * Eliminates duplicated polling logic between Host and Player components.
+ * Custom hook for fetching and live-updating game state.
+ * Eliminates duplicated polling logic between Host, Player and Display components.
  *
- * @param code - The 4-character game code
+ * Updates are pushed over Server-Sent Events; polling is only used as a
+ * fallback while the stream is unavailable or reconnecting.
+ *
+ * @param code - The game code
  * @param options - Configuration options
  * @returns Game state, error, loading status, and refresh function
  */
@@ -29,11 +34,12 @@ export function useGameState(
     code: string | undefined,
     options: UseGameStateOptions = {}
 ): UseGameStateResult {
-    const { hostId, enabled = true } = options;
+    const { hostId, enabled = true, pollIntervalMs = POLL_INTERVAL_MS } = options;
 
     const [gameState, setGameState] = useState<GameStatus | null>(null);
     const [error, setError] = useState<string | null>(null);
     const [isLoading, setIsLoading] = useState(true);
+    const [isStreaming, setIsStreaming] = useState(false);
 
     const fetchGame = useCallback(async () => {
         if (!code || !enabled) return;
@@ -59,13 +65,58 @@ export function useGameState(
         }
     }, [fetchGame, enabled]);
 
-    // Set up polling
+    // Subscribe to pushed updates
+    useEffect(() => {
+        if (!code || !enabled || typeof EventSource === 'undefined') return;
+
+        let source: EventSource | null = null;
+        let retry: ReturnType<typeof setTimeout> | undefined;
+        let closed = false;
+
+        const connect = async () => {
+            let opened: EventSource;
+            try {
+                opened = await openGameEvents(code, hostId);
+            } catch (err) {
+                if (!closed) retry = setTimeout(connect, STREAM_RETRY_MS);
+                return;
+            }
+            if (closed) {
+                opened.close();
+                return;
+            }
+            source = opened;
+            opened.onopen = () => setIsStreaming(true);
+            opened.onmessage = (event: MessageEvent) => {
+                setGameState(JSON.parse(event.data));
+                setError(null);
+                setIsLoading(false);
+            };
+            // A host's stream token expires, so reconnect with a fresh one
+            // instead of letting EventSource reuse the URL; polling covers the gap
+            opened.onerror = () => {
+                setIsStreaming(false);
+                opened.close();
+                retry = setTimeout(connect, STREAM_RETRY_MS);
+            };
+        };
+        connect();
+
+        return () => {
+            closed = true;
+            clearTimeout(retry);
+            source?.close();
+            setIsStreaming(false);
+        };
+    }, [code, hostId, enabled]);
+
+    // Fall back to polling while the stream is down
     useEffect(() => {
-        if (!enabled) return;
+        if (!enabled || isStreaming) return;
 
-        const interval = setInterval(fetchGame, POLL_INTERVAL_MS);
+        const interval = setInterval(fetchGame, pollIntervalMs);
         return () => clearInterval(interval);
-    }, [fetchGame, enabled]);
+    }, [fetchGame, enabled, isStreaming, pollIntervalMs]);
 
     return {
         gameState,
@@ -1,6 +1,7 @@
 export interface Answer {
   text: string;
   weight?: number | null;
+  aliases?: string[];
 }
 
 export interface Question {
@@ -24,6 +25,7 @@ export interface GameStatus {
   total_questions: number;
   total_answers: number;
   is_host: boolean;
+  version: number;
 }
 
 export interface GuessResponse {